@@ -0,0 +1,54 @@
+"""fetch run journal: backfill range, checkpoint, counters and per-window rows
+
+Revision ID: 000000000002
+Revises: 000000000001
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '000000000002'
+down_revision = '000000000001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('fetch_runs') as batch_op:
+        batch_op.add_column(sa.Column('symbol', sa.String(length=128), nullable=True))
+        batch_op.add_column(sa.Column('timeframe', sa.String(length=16), nullable=True))
+        batch_op.add_column(sa.Column('status', sa.String(length=16), server_default='running', nullable=False))
+        batch_op.add_column(sa.Column('range_start_ms', sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column('range_end_ms', sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column('checkpoint_ms', sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column('rows_written', sa.BigInteger(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('request_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('retry_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('elapsed_seconds', sa.Float(), server_default='0', nullable=False))
+    op.create_index('ix_fetch_runs_source_symbol_tf', 'fetch_runs', ['source', 'symbol', 'timeframe'])
+
+    op.create_table(
+        'fetch_run_windows',
+        sa.Column('id', sa.BigInteger(), primary_key=True),
+        sa.Column('fetch_run_id', sa.BigInteger(), sa.ForeignKey('fetch_runs.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('window_start_ms', sa.BigInteger(), nullable=False),
+        sa.Column('window_end_ms', sa.BigInteger(), nullable=False),
+        sa.Column('rows_written', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('request_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('retry_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('elapsed_seconds', sa.Float(), server_default='0', nullable=False),
+        sa.Column('committed_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    op.create_index('ix_fetch_run_windows_fetch_run_id', 'fetch_run_windows', ['fetch_run_id'])
+
+
+def downgrade():
+    op.drop_index('ix_fetch_run_windows_fetch_run_id', table_name='fetch_run_windows')
+    op.drop_table('fetch_run_windows')
+    op.drop_index('ix_fetch_runs_source_symbol_tf', table_name='fetch_runs')
+    with op.batch_alter_table('fetch_runs') as batch_op:
+        for col in ('elapsed_seconds', 'retry_count', 'request_count', 'rows_written',
+                    'checkpoint_ms', 'range_end_ms', 'range_start_ms', 'status', 'timeframe', 'symbol'):
+            batch_op.drop_column(col)
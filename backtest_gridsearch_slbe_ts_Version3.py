@@ -322,6 +322,202 @@ def simulate_trade(pair, df_candle, sl, be, ts_trig, ts_step):
         'tsTrig': ts_trig,
         'tsStep': ts_step
     }, log
+
+# === DOMINANCE: bỏ qua tổ hợp SL/BE/TS cho kết quả giống nhau ===
+class TradeExcursion:
+    """
+    Price path of one trade exactly as simulate_trade() walks it (candles after the entry
+    candle, O-H-L-C for LONG / O-L-H-C for SHORT), with running max/min arrays so the
+    first point touching any price is a binary search.
+    """
+    def __init__(self, entry_idx, exit_idx, entry_price, side, path):
+        self.entry_idx = entry_idx
+        self.exit_idx = exit_idx
+        self.entry_price = entry_price
+        self.side = side
+        self.path = path
+        # NaN prices never compare true in simulate_trade(); such trades are not collapsed
+        self.comparable = not np.isnan(path).any()
+        self.running_max = np.maximum.accumulate(path) if len(path) else path
+        self.running_min = np.minimum.accumulate(path) if len(path) else path
+
+    def first_at_or_above(self, price):
+        """First path point with value >= price (len(path) if never)"""
+        return int(np.searchsorted(self.running_max, price, side='left'))
+
+    def first_at_or_below(self, price):
+        """First path point with value <= price (len(path) if never)"""
+        return int(np.searchsorted(-self.running_min, -price, side='left'))
+
+    def first_favorable(self, price):
+        return self.first_at_or_above(price) if self.side == 'LONG' else self.first_at_or_below(price)
+
+    def first_adverse(self, price):
+        return self.first_at_or_below(price) if self.side == 'LONG' else self.first_at_or_above(price)
+
+    @property
+    def mfe_pct(self):
+        """Max favorable excursion in % of entry"""
+        if not len(self.path):
+            return 0.0
+        best = self.running_max[-1] if self.side == 'LONG' else self.running_min[-1]
+        return abs(best - self.entry_price) / self.entry_price * 100
+
+    @property
+    def mae_pct(self):
+        """Max adverse excursion in % of entry"""
+        if not len(self.path):
+            return 0.0
+        worst = self.running_min[-1] if self.side == 'LONG' else self.running_max[-1]
+        return abs(worst - self.entry_price) / self.entry_price * 100
+
+
+def trade_excursion(pair, df_candle):
+    """TradeExcursion of a pair, or None when simulate_trade() would skip it"""
+    entryIdx = find_candle_idx(pair['entryDt'], df_candle)
+    exitIdx = find_candle_idx(pair['exitDt'], df_candle)
+    if entryIdx==-1 or exitIdx==-1 or exitIdx <= entryIdx:
+        return None
+    candles = df_candle.iloc[entryIdx:exitIdx+1]
+    try:
+        entryPrice = float(pair.get('entryPrice'))
+        if np.isnan(entryPrice):
+            raise ValueError
+    except Exception:
+        entryPrice = float(candles.iloc[0]['open'])
+    order = ['open', 'high', 'low', 'close'] if pair['side'] == 'LONG' else ['open', 'low', 'high', 'close']
+    path = candles[order].iloc[1:].to_numpy(dtype=float).ravel()
+    return TradeExcursion(entryIdx, exitIdx, entryPrice, pair['side'], path)
+
+
+def _trigger_price(entry_price, side, pct, favorable):
+    # Same float expressions as simulate_trade() so touches are decided identically
+    up = (side == 'LONG') == favorable
+    return entry_price*(1+pct/100) if up else entry_price*(1-pct/100)
+
+
+def equivalent_setting_key(excursion, sl, be, ts_trig, ts_step):
+    """
+    Key shared by every (sl, be, ts_trig, ts_step) giving the same simulate_trade() outcome
+    for this trade (apart from the echoed parameter fields):
+    - sl <= 0 disables every stop, so BE/TS can never exit the trade
+    - without TS (ts_trig or ts_step <= 0) BE never changes the active stop
+    - BE only matters through the point where it first fires (never = BE off)
+    - TS trigger only matters through the point where it first fires; ts_step is
+      irrelevant if it never does
+    - an SL the path never touches behaves like any other untouched SL
+    """
+    if not (sl is not None and sl > 0):
+        return ('no_sl',)
+    if not excursion.comparable:
+        return ('exact', sl, be, ts_trig, ts_step)
+    path_len = len(excursion.path)
+    sl_touch = excursion.first_adverse(_trigger_price(excursion.entry_price, excursion.side, sl, favorable=False))
+    sl_key = sl if sl_touch < path_len else 'wide'
+    use_TS = (ts_trig is not None and ts_trig > 0 and ts_step is not None and ts_step > 0)
+    if not use_TS:
+        return (sl_key, None, None)
+    be_key = 'off'
+    if be is not None and be > 0:
+        be_touch = excursion.first_favorable(_trigger_price(excursion.entry_price, excursion.side, be, favorable=True))
+        be_key = be_touch if be_touch < path_len else 'off'
+    ts_touch = excursion.first_favorable(_trigger_price(excursion.entry_price, excursion.side, ts_trig, favorable=True))
+    ts_key = (ts_touch, ts_step) if ts_touch < path_len else 'idle'
+    return (sl_key, be_key, ts_key)
+
+
+def fixed_stop_result(pair, df_candle, excursion, sl, be, ts_trig, ts_step):
+    """
+    simulate_trade() result for settings where the stop never moves (no SL, no TS, or
+    neither BE nor TS ever fires): exit at the first touch of the SL price, else at the
+    last close. Same fields and float expressions as simulate_trade().
+    """
+    side = excursion.side
+    entryPrice = excursion.entry_price
+    entryIdx = excursion.entry_idx
+    finalExitIdx = excursion.exit_idx
+    finalExitPrice = float(excursion.path[-1])
+    exitType = "EXIT"
+    if sl is not None and sl > 0:
+        slPrice = entryPrice*(1-sl/100) if side=='LONG' else entryPrice*(1+sl/100)
+        touch = excursion.first_adverse(slPrice)
+        if touch < len(excursion.path):
+            finalExitIdx = entryIdx + touch // 4 + 1
+            finalExitPrice = slPrice
+            exitType = 'SL'
+    return {
+        'num': pair['num'],
+        'side': side,
+        'entryIdx': entryIdx,
+        'exitIdx': finalExitIdx,
+        'entryDt': df_candle.iloc[entryIdx]['time'],
+        'exitDt': df_candle.iloc[finalExitIdx]['time'],
+        'entryPrice': entryPrice,
+        'exitPrice': finalExitPrice,
+        'exitType': exitType,
+        'pnlPctOrigin': (pair['exitPrice']-pair['entryPrice'])/pair['entryPrice']*100 if side=='LONG' else (pair['entryPrice']-pair['exitPrice'])/pair['entryPrice']*100,
+        'pnlPct': (finalExitPrice-entryPrice)/entryPrice*100 if side=='LONG' else (entryPrice-finalExitPrice)/entryPrice*100,
+        'sl': sl,
+        'be': be,
+        'tsTrig': ts_trig,
+        'tsStep': ts_step
+    }
+
+
+class DominanceSimulator:
+    """
+    simulate_trade() over many parameter cells of one tradelist, simulating each trade
+    only once per class of equivalent cells (see equivalent_setting_key) and reusing
+    that result for the rest of the class.
+    """
+    def __init__(self, trade_pairs, df_candle, excursions=None):
+        """excursions: precomputed trade_excursion() per pair (e.g. a cached ExcursionProfile)"""
+        self.trade_pairs = trade_pairs
+        self.df_candle = df_candle
+        self.excursions = excursions if excursions is not None else [trade_excursion(pair, df_candle) for pair in trade_pairs]
+        self._results = [{} for _ in trade_pairs]
+        self.simulated = 0
+        self.fast = 0
+        self.reused = 0
+
+    def simulate(self, index, sl, be, ts_trig, ts_step):
+        """simulate_trade() result of trade_pairs[index] (None when the trade is skipped)"""
+        excursion = self.excursions[index]
+        if excursion is None:
+            return None
+        key = equivalent_setting_key(excursion, sl, be, ts_trig, ts_step)
+        known = self._results[index].get(key)
+        if known is None:
+            if key == ('no_sl',) or key[1] is None or key[1:] == ('off', 'idle'):
+                # Only the initial SL can close the trade: its first touch decides the exit
+                result = fixed_stop_result(self.trade_pairs[index], self.df_candle, excursion, sl, be, ts_trig, ts_step)
+                self.fast += 1
+            else:
+                result, _ = simulate_trade(self.trade_pairs[index], self.df_candle, sl, be, ts_trig, ts_step)
+                self.simulated += 1
+            self._results[index][key] = result
+            return result
+        self.reused += 1
+        return dict(known, sl=sl, be=be, tsTrig=ts_trig, tsStep=ts_step)
+
+    def run_setting(self, sl, be, ts_trig, ts_step):
+        """Per-trade details of one cell, like the details list of run_one_setting()"""
+        details = []
+        for index in range(len(self.trade_pairs)):
+            res = self.simulate(index, sl, be, ts_trig, ts_step)
+            if res is not None:
+                details.append(res)
+        return details
+
+    def stats(self):
+        total = self.simulated + self.fast + self.reused
+        return {
+            'trade_simulations': self.simulated,
+            'first_touch_exits': self.fast,
+            'reused': self.reused,
+            'reused_pct': round(self.reused / total * 100, 2) if total else 0.0,
+        }
+
 # === TESTING FRAMEWORK ===
 def sanity_check_results(entry_price, exit_price, side, pnl_reported):
     if side == 'LONG':
@@ -363,6 +559,7 @@ def test_short_position():
 
 
 
+import time
 from multiprocessing import Pool, cpu_count
 
 def run_one_setting(args):
@@ -370,42 +567,105 @@ def run_one_setting(args):
     details = []
     skip = 0
     logs = []
-    win_count = 0
-    gain_sum = 0
-    loss_sum = 0
     for pair in trade_pairs:
         res, log = simulate_trade(pair, df_candle, sl, be, ts_trig, ts_step)
         if DEBUG:
             logs.extend(log)
         if res is not None:
             details.append(res)
-            if res['pnlPct'] > 0: 
-                win_count += 1
-                gain_sum += res['pnlPct']
-            else: 
-                loss_sum += abs(res['pnlPct'])  # FIX: loss luôn dương để tính PF
         else:
             skip += 1
+    return summarize_setting(sl, be, ts_trig, ts_step, details, skip, logs)
+
+def summarize_setting(sl, be, ts_trig, ts_step, details, skip=0, logs=None):
+    """Result dict of one setting from its simulated trades (also used on trade subsets)"""
+    win_count = 0
+    gain_sum = 0
+    loss_sum = 0
+    for res in details:
+        if res['pnlPct'] > 0: 
+            win_count += 1
+            gain_sum += res['pnlPct']
+        else: 
+            loss_sum += abs(res['pnlPct'])  # FIX: loss luôn dương để tính PF
     winrate = win_count / len(details) * 100 if len(details) > 0 else 0
     pf = gain_sum / loss_sum if loss_sum > 0 else 0
     pnl_total = sum([x['pnlPct'] for x in details if not np.isnan(x['pnlPct'])])
     return {
         'sl': sl, 'be': be, 'ts_trig': ts_trig, 'ts_step': ts_step,
         'pnl_total': pnl_total, 'winrate': winrate, 'pf': pf,
-        'details': details, 'skip': skip, 'log': logs
+        'details': details, 'skip': skip, 'log': logs or []
     }
 
-def grid_search_parallel(trade_pairs, df_candle, sl_list, be_list, ts_trig_list, ts_step_list, opt_type):
-    all_args = [
-        (sl, be, ts_trig, ts_step, trade_pairs, df_candle)
+def run_dominance_setting(dominance, setting):
+    """run_one_setting() through a DominanceSimulator"""
+    details = dominance.run_setting(*setting)
+    return summarize_setting(*setting, details, skip=len(dominance.trade_pairs) - len(details))
+
+def run_setting_group(args):
+    """Pool task: several settings of one tradelist sharing a DominanceSimulator"""
+    settings, trade_pairs, df_candle = args
+    dominance = DominanceSimulator(trade_pairs, df_candle)
+    return [run_dominance_setting(dominance, setting) for setting in settings]
+
+# Trade-window pool: the initializer gives each worker the trade pairs, candles and
+# excursions once; tasks only carry settings and trade indices
+_window_dominance = None
+
+def init_window_worker(trade_pairs, df_candle, excursions=None):
+    global _window_dominance
+    _window_dominance = DominanceSimulator(trade_pairs, df_candle, excursions)
+
+def simulate_window(args):
+    """Pool task: {trade_index: result or None} of each setting on one window of trades"""
+    settings, trade_indices = args
+    return [{i: _window_dominance.simulate(i, *setting) for i in trade_indices} for setting in settings]
+
+def grid_search_parallel(trade_pairs, df_candle, sl_list, be_list, ts_trig_list, ts_step_list, opt_type,
+                         processes=None, deadline=None, on_progress=None):
+    """
+    processes: pool size (default cpu_count()); 1 runs in-process, e.g. when the caller is
+               already one of several worker processes sharing a CPU budget
+    deadline:  time.time() value after which remaining combinations are skipped
+    on_progress(done, total): called after each finished combination
+
+    Equivalent BE/TS cells (see equivalent_setting_key) are simulated once per trade:
+    in-process through one DominanceSimulator, with a pool per task of settings that
+    share SL (SL + BE when there are fewer SL values than processes).
+    """
+    settings = [
+        (sl, be, ts_trig, ts_step)
         for sl in sl_list
         for be in be_list
         for ts_trig in ts_trig_list
         for ts_step in ts_step_list
     ]
-    # Chỉ hiển thị tiến trình tổng thể bằng tqdm, không print từng tổ hợp
-    with Pool(processes=cpu_count()) as pool:
-        results = list(tqdm(pool.imap_unordered(run_one_setting, all_args), total=len(all_args), desc="GridSearch"))
+    processes = processes or cpu_count()
+    pool = Pool(processes=processes) if processes > 1 else None
+    if pool:
+        group_size = 1 if len(sl_list) >= processes else 2
+        groups = {}
+        for setting in settings:
+            groups.setdefault(setting[:group_size], []).append(setting)
+        all_args = [(group, trade_pairs, df_candle) for group in groups.values()]
+        iterator = pool.imap_unordered(run_setting_group, all_args)
+    else:
+        dominance = DominanceSimulator(trade_pairs, df_candle)
+        iterator = ([run_dominance_setting(dominance, setting)] for setting in settings)
+    results = []
+    try:
+        # Chỉ hiển thị tiến trình tổng thể bằng tqdm, không print từng tổ hợp
+        for group_results in tqdm(iterator, total=len(all_args) if pool else len(settings), desc="GridSearch"):
+            results.extend(group_results)
+            if on_progress:
+                on_progress(len(results), len(settings))
+            if deadline is not None and time.time() > deadline:
+                print(f"⏱️ GridSearch deadline reached after {len(results)}/{len(settings)} combinations")
+                break
+    finally:
+        if pool:
+            pool.terminate()
+            pool.join()
     results.sort(key=lambda x: x[opt_type if opt_type != 'pnl' else 'pnl_total'], reverse=True)
     return results
 
@@ -1,15 +1,40 @@
 ﻿import sqlite3
+import threading
 from typing import List, Tuple, Optional
 import pandas as pd
 import os
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'candlestick_data.db')
 
+# Schema is created once per process, on first connection (not at import time)
+_db_initialized = False
+_init_lock = threading.Lock()
+
 def get_connection():
-    return sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH)
+    if not _db_initialized:
+        init_db(conn)
+    return conn
 
-def init_db():
-    with get_connection() as conn:
+def init_db(conn: Optional[sqlite3.Connection] = None, force: bool = False):
+    global _db_initialized
+    if _db_initialized and not force:
+        return
+    with _init_lock:
+        if _db_initialized and not force:
+            return
+        own = conn is None
+        if own:
+            conn = sqlite3.connect(DB_PATH)
+        try:
+            _create_schema(conn)
+        finally:
+            if own:
+                conn.close()
+        _db_initialized = True
+
+def _create_schema(conn: sqlite3.Connection):
+    with conn:
         c = conn.cursor()
         c.execute('''
             CREATE TABLE IF NOT EXISTS candlestick_data (
@@ -25,7 +50,6 @@ def init_db():
                 UNIQUE(symbol, timeframe, open_time)
             )
         ''')
-        conn.commit()
 
 def insert_candles(symbol: str, timeframe: str, data: List[Tuple]):
     with get_connection() as conn:
@@ -37,6 +61,21 @@ def insert_candles(symbol: str, timeframe: str, data: List[Tuple]):
         ''', [(symbol, timeframe, *row) for row in data])
         conn.commit()
 
+def insert_candle_rows(rows: List[Tuple], conn: Optional[sqlite3.Connection] = None):
+    """Bulk insert (symbol, timeframe, open_time, o, h, l, c, v) rows in one transaction."""
+    sql = '''
+        INSERT OR REPLACE INTO candlestick_data
+        (symbol, timeframe, open_time, open_price, high_price, low_price, close_price, volume)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    if conn is None:
+        with get_connection() as own:
+            own.executemany(sql, rows)
+            own.commit()
+        return
+    conn.executemany(sql, rows)
+    conn.commit()
+
 def get_candles(symbol: str, timeframe: str, start_time: Optional[int] = None, end_time: Optional[int] = None) -> pd.DataFrame:
     with get_connection() as conn:
         query = '''
@@ -85,5 +124,3 @@ def resample_candles(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
     resampled = df.resample(rule).agg(ohlc_dict).dropna().reset_index()
     resampled['open_time'] = resampled['open_time'].astype(int) // 10**9
     return resampled[['open_time','open','high','low','close','volume']]
-
-init_db()
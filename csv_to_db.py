@@ -9,8 +9,11 @@ import sys
 import pandas as pd
 import glob
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-from candlestick_db import init_db, insert_candles, get_candles
+from candlestick_db import DB_PATH, init_db, insert_candle_rows, get_candles, get_connection
+from file_fingerprint import FingerprintRegistry
 import sqlite3
 # Import normalize_symbol_format từ backend/utils/common.py để chuẩn hóa symbol đồng bộ toàn hệ thống
 from backend.utils.common import normalize_symbol_format
@@ -35,25 +38,79 @@ def parse_csv_filename(filename):
  
  # moved to backend/utils/common.py
 
-def read_candle_csv(file_path):
-    """Read CSV file and return standardized DataFrame"""
-    try:
-        # Try different encodings and separators
-        for encoding in ['utf-8', 'utf-8-sig', 'latin1', 'cp1252']:
+CSV_ENCODINGS = ['utf-8', 'utf-8-sig', 'latin1', 'cp1252']
+CSV_SEPARATORS = [',', ';', '\t']
+SNIFF_BYTES = 64 * 1024
+FINGERPRINT_NAMESPACE = 'csv_to_db'
+
+
+def sniff_csv_format(file_path, sample_bytes=SNIFF_BYTES):
+    """Detect (encoding, separator) from the first few KB of the file only.
+
+    Returns (None, None) if no candidate yields a header with >= 5 columns.
+    """
+    with open(file_path, 'rb') as f:
+        raw = f.read(sample_bytes)
+    for encoding in CSV_ENCODINGS:
+        try:
+            text = raw.decode(encoding)
+        except UnicodeDecodeError:
+            # the sample may cut a multi-byte char in half; retry without the tail
             try:
-                for sep in [',', ';', '\t']:
-                    try:
-                        df = pd.read_csv(file_path, encoding=encoding, sep=sep)
-                        if len(df.columns) >= 5:  # Need at least OHLC + time
-                            break
-                    except:
-                        continue
-                if len(df.columns) >= 5:
-                    break
-            except:
+                text = raw[:-4].decode(encoding)
+            except UnicodeDecodeError:
                 continue
-        
-        print(f"  📄 Read {len(df)} rows, columns: {list(df.columns)}")
+        if encoding == 'utf-8' and text.startswith('\ufeff'):
+            encoding = 'utf-8-sig'
+            text = text[1:]
+        # drop the (possibly truncated) last line of the sample
+        lines = [ln for ln in text.splitlines()[:20] if ln.strip()]
+        if len(lines) > 1:
+            lines = lines[:-1]
+        if not lines:
+            continue
+        # pick the separator that gives a consistent column count >= 5
+        best_sep, best_cols = None, 0
+        for sep in CSV_SEPARATORS:
+            cols = lines[0].count(sep) + 1
+            consistent = all(ln.count(sep) + 1 == cols for ln in lines)
+            if consistent and cols >= 5 and cols > best_cols:
+                best_sep, best_cols = sep, cols
+        if best_sep is not None:
+            return encoding, best_sep
+    return None, None
+
+
+def _read_raw_csv(file_path):
+    """Parse the file once using the sniffed format; fall back to brute force."""
+    encoding, sep = sniff_csv_format(file_path)
+    if encoding is not None:
+        try:
+            return pd.read_csv(file_path, encoding=encoding, sep=sep)
+        except Exception:
+            pass
+    df = None
+    for encoding in CSV_ENCODINGS:
+        for sep in CSV_SEPARATORS:
+            try:
+                df = pd.read_csv(file_path, encoding=encoding, sep=sep)
+                if len(df.columns) >= 5:  # Need at least OHLC + time
+                    return df
+            except Exception:
+                continue
+    return df
+
+
+def read_candle_csv(file_path, verbose=True):
+    """Read CSV file and return standardized DataFrame"""
+    log = print if verbose else (lambda *a, **k: None)
+    try:
+        df = _read_raw_csv(file_path)
+        if df is None:
+            log(f"  ❌ Could not parse {file_path}")
+            return None
+
+        log(f"  📄 Read {len(df)} rows, columns: {list(df.columns)}")
         
         # Detect column mapping
         col_mapping = {}
@@ -84,7 +141,7 @@ def read_candle_csv(file_path):
             df['volume'] = 0
             col_mapping['volume'] = 'volume'
         
-        print(f"  🔍 Column mapping: {col_mapping}")
+        log(f"  🔍 Column mapping: {col_mapping}")
         
         # Create standardized DataFrame
         try:
@@ -97,7 +154,7 @@ def read_candle_csv(file_path):
                 'volume': pd.to_numeric(df[col_mapping['volume']], errors='coerce')
             })
         except Exception as e:
-            print(f"  ❌ Error mapping columns: {e}")
+            log(f"  ❌ Error mapping columns: {e}")
             return None
         
         # Convert datetime to timestamp
@@ -105,86 +162,185 @@ def read_candle_csv(file_path):
             try:
                 result_df['open_time'] = result_df['open_time'].apply(convert_csv_to_timestamp)
             except Exception as e:
-                print(f"  ❌ Error converting timestamps: {e}")
+                log(f"  ❌ Error converting timestamps: {e}")
                 return None
         
         # Remove invalid rows
         result_df = result_df.dropna()
         
-        print(f"  ✅ Processed {len(result_df)} valid rows")
+        log(f"  ✅ Processed {len(result_df)} valid rows")
         return result_df
         
     except Exception as e:
-        print(f"  ❌ Error reading file: {e}")
+        log(f"  ❌ Error reading file: {e}")
         return None
 
-def migrate_csv_to_db(candles_only=False):
-    """Main migration function. If candles_only=True, only process candles/ folder."""
-    print("🚀 Starting CSV to Database Migration...")
-    # Initialize database
-    init_db()
+
+def _parse_candle_file(file_path):
+    """Worker: parse one candle CSV into insert-ready rows.
+
+    Runs in a child process, so it returns plain tuples and never touches the DB.
+    Returns (filename, symbol, timeframe, rows, error).
+    """
+    filename = os.path.basename(file_path)
+    symbol, timeframe = parse_csv_filename(filename)
+    if not symbol or not timeframe:
+        return filename, None, None, [], 'cannot parse filename'
+    # CHUẨN HÓA symbol: dùng hàm normalize_symbol_format cho đồng bộ toàn hệ thống
+    symbol = normalize_symbol_format(symbol, ensure_prefix=False)
+    df = read_candle_csv(file_path, verbose=False)
+    if df is None or df.empty:
+        return filename, symbol, timeframe, [], 'failed to read or empty file'
+    n = len(df)
+    rows = list(zip(
+        [symbol] * n,
+        [timeframe] * n,
+        df['open_time'].astype('int64').tolist(),
+        df['open'].astype(float).tolist(),
+        df['high'].astype(float).tolist(),
+        df['low'].astype(float).tolist(),
+        df['close'].astype(float).tolist(),
+        df['volume'].astype(float).tolist(),
+    ))
+    return filename, symbol, timeframe, rows, None
+
+
+def _collect_csv_files(candles_only):
+    candles_dir = 'candles'
     if candles_only:
-        candles_dir = 'candles'
         if not os.path.exists(candles_dir):
             print(f"❌ Directory {candles_dir} not found!")
-            return
+            return None
         csv_files = glob.glob(os.path.join(candles_dir, '*.csv'))
         print(f"📁 Found {len(csv_files)} CSV files in {candles_dir}/ (candles_only mode)")
     else:
         # Original logic: scan all relevant folders (extend as needed)
-        candles_dir = 'candles'
         csv_files = []
         if os.path.exists(candles_dir):
             csv_files += glob.glob(os.path.join(candles_dir, '*.csv'))
         # Add more folders if needed for full migration
         # e.g. csv_files += glob.glob(os.path.join('tradelists', '*.csv'))
         print(f"📁 Found {len(csv_files)} CSV files in {candles_dir}/ (full mode)")
+    return csv_files
+
+
+def migrate_csv_to_db(candles_only=False, workers=None, batch_size=50000, force=False):
+    """Main migration function. If candles_only=True, only process candles/ folder.
+
+    Files are parsed in a process pool (`workers`, default cpu_count); rows are funnelled
+    back to this process, which is the only DB writer and commits `batch_size` rows at a time.
+    Files whose fingerprint matches the last successful import are skipped unless `force`.
+    """
+    print("🚀 Starting CSV to Database Migration...")
+    # Initialize database
+    init_db()
+    csv_files = _collect_csv_files(candles_only)
+    if csv_files is None:
+        return
+    registry = FingerprintRegistry(DB_PATH)
+    fingerprints = {}
+    skipped_count = 0
+    for file_path in list(csv_files):
+        unchanged, fp = registry.check(FINGERPRINT_NAMESPACE, file_path)
+        if unchanged and not force:
+            skipped_count += 1
+            continue
+        fingerprints[file_path] = fp
+    if skipped_count:
+        print(f"⏭️ Skipping {skipped_count} unchanged files (use force=True to re-import)")
+    csv_files = list(fingerprints)
+    workers = workers or os.cpu_count() or 1
     success_count = 0
     error_count = 0
-    for file_path in csv_files:
-        filename = os.path.basename(file_path)
-        print(f"\n📊 Processing: {filename}")
-        # Parse symbol and timeframe
-        symbol, timeframe = parse_csv_filename(filename)
-        if not symbol or not timeframe:
-            print(f"  ⚠️ Cannot parse filename: {filename}")
-            error_count += 1
-            continue
-        # CHUẨN HÓA symbol: dùng hàm normalize_symbol_format cho đồng bộ toàn hệ thống
-        symbol = normalize_symbol_format(symbol, ensure_prefix=False)
-        print(f"  📈 Symbol: {symbol}, Timeframe: {timeframe}")
-        # Read CSV
-        df = read_candle_csv(file_path)
-        if df is None or df.empty:
-            print(f"  ❌ Failed to read or empty file")
-            error_count += 1
-            continue
-        # Convert to tuples for database insertion
+    total_rows = 0
+    batches = 0
+    pending = []
+    # files whose rows are all in `pending`/committed; fingerprinted after each flush
+    pending_files = []
+    started = time.perf_counter()
+
+    conn = get_connection()
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+
+    def flush():
+        # A failed batch only fails its own files; they keep their old fingerprint and are retried next run
+        nonlocal pending, batches, success_count, error_count, total_rows
+        rows, files = pending, list(pending_files)
+        pending = []
+        pending_files.clear()
+        if rows:
+            try:
+                insert_candle_rows(rows, conn=conn)
+                batches += 1
+            except Exception as e:
+                print(f"  ❌ Error inserting {len(files)} files to database: {e}")
+                conn.rollback()
+                success_count -= len(files)
+                error_count += len(files)
+                total_rows -= len(rows)
+                return
+        for path in files:
+            registry.record(FINGERPRINT_NAMESPACE, path, fingerprints[path])
+
+    def collect(future):
         try:
-            candles_data = []
-            for _, row in df.iterrows():
-                candles_data.append((
-                    int(row['open_time']),
-                    float(row['open']),
-                    float(row['high']),
-                    float(row['low']),
-                    float(row['close']),
-                    float(row['volume'])
-                ))
-            # Insert into database
-            insert_candles(symbol, timeframe, candles_data)
-            print(f"  ✅ Successfully inserted {len(candles_data)} candles")
-            success_count += 1
+            return futures[future], future.result()
         except Exception as e:
-            print(f"  ❌ Error inserting to database: {e}")
-            error_count += 1
-    
+            path = futures[future]
+            return path, (os.path.basename(path), None, None, [], f'worker failed: {e}')
+
+    executor = None
+    if workers <= 1 or len(csv_files) <= 1:
+        results = map(_parse_candle_file, csv_files)
+    else:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(csv_files)))
+        futures = {executor.submit(_parse_candle_file, p): p for p in csv_files}
+        results = (collect(f) for f in as_completed(futures))
+    if executor is None:
+        results = zip(csv_files, results)
+    try:
+        for done, (file_path, (filename, symbol, timeframe, rows, error)) in enumerate(results, 1):
+            if error:
+                print(f"  ⚠️ [{done}/{len(csv_files)}] {filename}: {error}")
+                error_count += 1
+                continue
+            pending.extend(rows)
+            pending_files.append(file_path)
+            total_rows += len(rows)
+            success_count += 1
+            print(f"  ✅ [{done}/{len(csv_files)}] {filename}: {symbol} {timeframe} {len(rows)} candles")
+            if len(pending) >= batch_size:
+                flush()
+        flush()
+    finally:
+        if executor is not None:
+            # shutdown(cancel_futures=True) needs Python 3.9
+            for future in futures:
+                future.cancel()
+            executor.shutdown()
+        conn.close()
+
+    elapsed = time.perf_counter() - started
     print(f"\n🎉 Migration completed!")
     print(f"✅ Success: {success_count} files")
+    print(f"⏭️ Unchanged: {skipped_count} files")
     print(f"❌ Errors: {error_count} files")
+    print(f"⏱️ {total_rows:,} candles in {batches} batches, {elapsed:.2f}s "
+          f"({total_rows / elapsed if elapsed else 0:,.0f} rows/s, {workers} workers)")
     
     # Show database status
     show_database_status()
+    return {
+        'files': len(csv_files) + skipped_count,
+        'success': success_count,
+        'skipped': skipped_count,
+        'errors': error_count,
+        'rows': total_rows,
+        'batches': batches,
+        'elapsed_seconds': elapsed,
+        'workers': workers,
+    }
 
 def show_database_status():
     """Show current database contents"""
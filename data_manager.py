@@ -9,10 +9,20 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import sqlite3
-from candlestick_db import get_connection, init_db, insert_candles, get_candles, resample_candles
-import glob
+from candlestick_db import DB_PATH, get_connection, init_db, insert_candles, get_candles, resample_candles
+from file_fingerprint import FingerprintRegistry
 import re
 
+# Fingerprints of CSVs already cached into the candle DB by DataManager
+FINGERPRINT_NAMESPACE = 'data_manager_cache'
+
+# BINANCE_BTCUSDT, 60.csv / BINANCE_BTCUSDT.P, 30.csv / BTCUSDT_30.csv
+_FILENAME_PATTERNS = [
+    re.compile(r"BINANCE_([A-Z]+USDT)\.?P?, (\d+)\.csv"),
+    re.compile(r"BINANCE_([A-Z]+USDT), (\d+)\.csv"),
+    re.compile(r"([A-Z]+USDT)\.?P?[-_](\d+)\.csv")
+]
+
 class DataManager:
     def auto_fill_all_missing_candles_from_tradelists(self, tradelist_dir='tradelist', candle_dir='candles', api_key=None, api_secret=None):
         """
@@ -103,67 +113,90 @@ class DataManager:
     - Provide unified API for backtest engine
     """
     
-    def __init__(self, data_directory: str = "."):
+    def __init__(self, data_directory: str = ".", verbose: bool = False):
         self.data_directory = data_directory
         self.supported_exchanges = ["BINANCE"]
         self.supported_timeframes = ["5", "30", "60", "240", "1d"]
+        self.verbose = verbose
         
-        # Initialize database
-        init_db()
-        
-        # Auto-discover available data files
-        self._discover_data_files()
+        # Discovery and DB setup are deferred to first use (see available_data)
+        self._available_data = None
+        self._discovery_signature = None
+        self._fingerprints = None
     
-    def _discover_data_files(self) -> Dict[str, Dict[str, str]]:
-        """Auto-discover candle CSV files in workspace"""
-        self.available_data = {}
-        
+    def _search_paths(self) -> List[str]:
         # Search in current directory and candles subfolder
-        search_paths = [
+        return [
             self.data_directory,
             os.path.join(self.data_directory, "candles"),
             os.path.join(self.data_directory, "data_organized", "candles")
         ]
+    
+    def _directory_signature(self) -> Tuple:
+        """Cheap change detector: a directory's mtime moves when files are added, removed or renamed"""
+        signature = []
+        for path in self._search_paths():
+            try:
+                signature.append((path, os.stat(path).st_mtime_ns))
+            except OSError:
+                signature.append((path, None))
+        return tuple(signature)
+    
+    @property
+    def available_data(self) -> Dict[str, Dict[str, str]]:
+        """Discovered candle files, re-scanned only when a search directory changed"""
+        signature = self._directory_signature()
+        if self._available_data is None or signature != self._discovery_signature:
+            self._discover_data_files()
+            self._discovery_signature = signature
+        return self._available_data
+    
+    @property
+    def fingerprints(self) -> FingerprintRegistry:
+        if self._fingerprints is None:
+            init_db()
+            self._fingerprints = FingerprintRegistry(DB_PATH)
+        return self._fingerprints
+    
+    def refresh(self) -> Dict[str, Dict[str, str]]:
+        """Force a re-scan of the data directories"""
+        self._available_data = None
+        return self.available_data
+    
+    def _discover_data_files(self) -> Dict[str, Dict[str, str]]:
+        """Auto-discover candle CSV files in workspace"""
+        available_data = {}
         
         # Pattern: BINANCE_SYMBOL, TIMEFRAME.csv or BINANCE_SYMBOL.P, TIMEFRAME.csv
-        patterns = [
-            "BINANCE_*.csv",
-            "*.csv"
-        ]
-        
-        for search_path in search_paths:
-            if os.path.exists(search_path):
-                for pattern in patterns:
-                    files = glob.glob(os.path.join(search_path, pattern))
-                    for file_path in files:
-                        filename = os.path.basename(file_path)
-                        symbol_info = self._parse_filename(filename)
-                        if symbol_info:
-                            symbol, timeframe, exchange = symbol_info
-                            key = f"{exchange}_{symbol}"
-                            if key not in self.available_data:
-                                self.available_data[key] = {}
-                            self.available_data[key][timeframe] = file_path
+        # One scandir per directory; every *.csv is matched against the filename patterns
+        for search_path in self._search_paths():
+            if not os.path.isdir(search_path):
+                continue
+            with os.scandir(search_path) as entries:
+                for entry in entries:
+                    filename = entry.name
+                    if not filename.endswith('.csv') or not entry.is_file():
+                        continue
+                    symbol_info = self._parse_filename(filename)
+                    if symbol_info:
+                        symbol, timeframe, exchange = symbol_info
+                        key = f"{exchange}_{symbol}"
+                        available_data.setdefault(key, {})[timeframe] = os.path.join(search_path, filename)
         
-        print(f"📊 Discovered {len(self.available_data)} symbols with data:")
-        for symbol, timeframes in self.available_data.items():
-            tf_list = list(timeframes.keys())
-            print(f"   {symbol}: {tf_list}")
+        self._available_data = available_data
+        print(f"📊 Discovered {len(available_data)} symbols with data")
+        if self.verbose:
+            for symbol, timeframes in available_data.items():
+                print(f"   {symbol}: {list(timeframes.keys())}")
         
-        return self.available_data
+        return available_data
     
     def _parse_filename(self, filename: str) -> Optional[Tuple[str, str, str]]:
         """Parse filename to extract symbol, timeframe, exchange"""
         # BINANCE_BTCUSDT, 60.csv
         # BINANCE_BTCUSDT.P, 30.csv  
-        patterns = [
-            r"BINANCE_([A-Z]+USDT)\.?P?, (\d+)\.csv",
-            r"BINANCE_([A-Z]+USDT), (\d+)\.csv",
-            r"([A-Z]+USDT)\.?P?[-_](\d+)\.csv"
-        ]
-        
-        for pattern in patterns:
-            match = re.match(pattern, filename)
+        for pattern in _FILENAME_PATTERNS:
+            match = pattern.match(filename)
             if match:
                 symbol = match.group(1)
                 timeframe = match.group(2)
@@ -199,12 +232,8 @@ class DataManager:
                 start_ts = int(start_time.timestamp()) if start_time else None
                 end_ts = int(end_time.timestamp()) if end_time else None
                 
-                df_cached = get_candles(symbol, timeframe, start_ts, end_ts)
+                df_cached = self._load_from_db(symbol, timeframe, start_ts, end_ts)
                 if len(df_cached) > 0:
-                    # Convert open_time back to datetime
-                    df_cached['time'] = pd.to_datetime(df_cached['open_time'], unit='s')
-                    df_cached = df_cached.drop('open_time', axis=1)
-                    df_cached = df_cached[['time', 'open', 'high', 'low', 'close', 'volume']]
                     print(f"📈 Loaded {len(df_cached)} candles from DB: {symbol} {timeframe}m")
                     return df_cached
             except Exception as e:
@@ -214,10 +243,19 @@ class DataManager:
         if symbol_key in self.available_data and timeframe in self.available_data[symbol_key]:
             file_path = self.available_data[symbol_key][timeframe]
             try:
+                # CSV already cached and unchanged since: serve the DB copy, skip parse + write
+                # (force_reload always re-parses the file)
+                unchanged, fingerprint = self.fingerprints.check(FINGERPRINT_NAMESPACE, file_path)
+                if unchanged and not force_reload:
+                    df_cached = self._load_from_db(symbol, timeframe)
+                    if len(df_cached) > 0:
+                        print(f"📈 CSV unchanged, loaded {len(df_cached)} candles from DB: {symbol} {timeframe}m")
+                        return df_cached
                 df = self._load_csv_file(file_path)
                 if len(df) > 0:
                     # Cache to database
-                    self._cache_to_database(symbol, timeframe, df)
+                    if self._cache_to_database(symbol, timeframe, df):
+                        self.fingerprints.record(FINGERPRINT_NAMESPACE, file_path, fingerprint)
                     print(f"📈 Loaded {len(df)} candles from CSV: {symbol} {timeframe}m")
                     return df
             except Exception as e:
@@ -226,6 +264,17 @@ class DataManager:
         print(f"⚠️ No data found for {symbol} {timeframe}m")
         return pd.DataFrame(columns=['time', 'open', 'high', 'low', 'close', 'volume'])
     
+    def _load_from_db(self, symbol: str, timeframe: str,
+                      start_ts: Optional[int] = None, end_ts: Optional[int] = None) -> pd.DataFrame:
+        """Load cached candles from DB in the same shape as _load_csv_file"""
+        df_cached = get_candles(symbol, timeframe, start_ts, end_ts)
+        if len(df_cached) > 0:
+            # Convert open_time back to datetime
+            df_cached['time'] = pd.to_datetime(df_cached['open_time'], unit='s')
+            df_cached = df_cached.drop('open_time', axis=1)
+            df_cached = df_cached[['time', 'open', 'high', 'low', 'close', 'volume']]
+        return df_cached
+    
     def _load_csv_file(self, file_path: str) -> pd.DataFrame:
         """Load and normalize CSV candle file"""
         try:
@@ -278,8 +327,8 @@ class DataManager:
         
         return df[required_cols]
     
-    def _cache_to_database(self, symbol: str, timeframe: str, df: pd.DataFrame):
-        """Cache candle data to SQLite database"""
+    def _cache_to_database(self, symbol: str, timeframe: str, df: pd.DataFrame) -> bool:
+        """Cache candle data to SQLite database. Returns True on success."""
         try:
             # Convert DataFrame to format expected by database
             candles_data = []
@@ -295,9 +344,11 @@ class DataManager:
             
             insert_candles(symbol, timeframe, candles_data)
             print(f"💾 Cached {len(candles_data)} candles to DB: {symbol} {timeframe}m")
+            return True
             
         except Exception as e:
             print(f"⚠️ Failed to cache to DB: {e}")
+            return False
     
     def get_symbol_summary(self) -> Dict:
         """Get summary of all available data"""
@@ -362,7 +413,7 @@ if __name__ == "__main__":
     parser.add_argument('--fill-missing', action='store_true', help='Auto-fill all missing candles from tradelists using Binance API')
     args = parser.parse_args()
 
-    dm = DataManager()
+    dm = DataManager(verbose=True)
     if args.fill_missing:
         dm.auto_fill_all_missing_candles_from_tradelists()
     else:
@@ -27,9 +27,15 @@ class DynamicStepCalculator:
     based on actual market data distribution and volatility patterns
     """
     
-    def __init__(self, tradelist_file):
-        """Initialize with tradelist data"""
+    def __init__(self, tradelist_file, excursions=None):
+        """Initialize with tradelist data
+
+        excursions: optional DataFrame with run_up_% / drawdown_% / net_pnl_% measured
+        on candles (ExcursionProfile.to_tradelist_frame), used when the tradelist has
+        no run-up / drawdown columns or tradelist_file is None
+        """
         self.tradelist_file = tradelist_file
+        self.excursions = excursions
         self.data = None
         self.statistics = {}
         self.step_analysis = {}
@@ -39,51 +45,26 @@ class DynamicStepCalculator:
         """Load and validate tradelist data"""
         print(f"📊 DYNAMIC STEP CALCULATOR")
         print(f"=" * 50)
-        print(f"Loading data from: {self.tradelist_file}")
+        print(f"Loading data from: {self.tradelist_file or 'candle excursion profile'}")
         
         try:
-            # Read CSV with flexible parsing
-            self.data = pd.read_csv(self.tradelist_file)
-            print(f"✅ Loaded {len(self.data)} trade records")
-            
-            # Validate required columns - support multiple formats
-            # Nhận diện cột linh hoạt như SmartRangeFinder
-            def match_col(col, keys):
-                c = col.lower().replace(' ', '').replace('_', '').replace('&', '').replace('-', '')
-                return any(k in c for k in keys) and '%' in c
-
             column_mapping = {}
-            # Run-up
-            for col in self.data.columns:
-                if match_col(col, ['runup', 'maxfavorable']):
-                    column_mapping['runup'] = col
-                    break
-            # Drawdown
-            for col in self.data.columns:
-                if match_col(col, ['drawdown', 'maxadverse']):
-                    column_mapping['drawdown'] = col
-                    break
-            # PnL: ưu tiên net, sau đó cumulative, sau đó các biến thể khác
-            for col in self.data.columns:
-                if match_col(col, ['net']):
-                    column_mapping['pnl'] = col
-                    break
-            if 'pnl' not in column_mapping:
-                for col in self.data.columns:
-                    if match_col(col, ['cumulative']):
-                        column_mapping['pnl'] = col
-                        break
-            if 'pnl' not in column_mapping:
-                for col in self.data.columns:
-                    if match_col(col, ['pnl', 'pl']):
-                        column_mapping['pnl'] = col
-                        break
+            if self.tradelist_file:
+                # Read CSV with flexible parsing
+                self.data = pd.read_csv(self.tradelist_file)
+                print(f"✅ Loaded {len(self.data)} trade records")
+                column_mapping = self._map_columns(self.data)
+            if self.excursions is not None and ('runup' not in column_mapping or 'drawdown' not in column_mapping):
+                # Không có cột run-up/drawdown: dùng MFE/MAE đo trên nến
+                self.data = self.excursions.copy()
+                column_mapping = self._map_columns(self.data)
+                print(f"📐 Using candle excursion profile ({len(self.data)} trades) for run-up/drawdown")
 
             # Báo lỗi rõ ràng nếu thiếu cột nào
             for param_type in ['runup', 'drawdown', 'pnl']:
                 if param_type not in column_mapping:
                     print(f"❌ Missing {param_type} column. Tried: linh hoạt theo keys")
-                    print(f"Available columns: {list(self.data.columns)}")
+                    print(f"Available columns: {list(self.data.columns) if self.data is not None else []}")
                     raise ValueError(f"Required {param_type} column not found")
 
             print(f"✅ Column mapping: {column_mapping}")
@@ -124,6 +105,43 @@ class DynamicStepCalculator:
             print(f"❌ Data loading failed: {str(e)}")
             raise
     
+    @staticmethod
+    def _map_columns(data):
+        """Map runup/drawdown/pnl to the tradelist's column names"""
+        # Validate required columns - support multiple formats
+        # Nhận diện cột linh hoạt như SmartRangeFinder
+        def match_col(col, keys):
+            c = col.lower().replace(' ', '').replace('_', '').replace('&', '').replace('-', '')
+            return any(k in c for k in keys) and '%' in c
+
+        column_mapping = {}
+        # Run-up
+        for col in data.columns:
+            if match_col(col, ['runup', 'maxfavorable']):
+                column_mapping['runup'] = col
+                break
+        # Drawdown
+        for col in data.columns:
+            if match_col(col, ['drawdown', 'maxadverse']):
+                column_mapping['drawdown'] = col
+                break
+        # PnL: ưu tiên net, sau đó cumulative, sau đó các biến thể khác
+        for col in data.columns:
+            if match_col(col, ['net']):
+                column_mapping['pnl'] = col
+                break
+        if 'pnl' not in column_mapping:
+            for col in data.columns:
+                if match_col(col, ['cumulative']):
+                    column_mapping['pnl'] = col
+                    break
+        if 'pnl' not in column_mapping:
+            for col in data.columns:
+                if match_col(col, ['pnl', 'pl']):
+                    column_mapping['pnl'] = col
+                    break
+        return column_mapping
+
     def calculate_statistical_foundations(self):
         """Calculate core statistical metrics for step determination"""
         print(f"\n📈 STATISTICAL FOUNDATION ANALYSIS")
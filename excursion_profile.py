@@ -0,0 +1,170 @@
+"""
+Per-trade Excursion Profile
+Hồ sơ MFE/MAE của từng lệnh, tính một lần từ nến và lưu lại.
+
+For every trade pair the price path simulate_trade() walks (candles after the entry
+candle, O-H-L-C for LONG / O-L-H-C for SHORT) with running max/min arrays, so:
+
+- max favorable / max adverse excursion (MFE/MAE) of each trade
+- the first candle touching any % threshold (binary search on the running arrays)
+
+are available without touching the candles again. The profile is stored next to the
+combo cache (same data_key: tradelist + candle span + engine version), so every
+optimization of the same dataset reuses it.
+
+Consumers:
+- DominanceSimulator (grid/adaptive/halving engines) takes the trade excursions
+  instead of rebuilding them, and settles fixed-stop cells from first touches.
+- SmartRangeFinder / DynamicStepCalculator take to_tradelist_frame() when the
+  uploaded tradelist has no run-up / drawdown columns.
+"""
+
+import io
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backtest_gridsearch_slbe_ts_Version3 import TradeExcursion, trade_excursion, _trigger_price
+from optimization_cache import data_key, get_optimization_cache
+
+# Bump when the stored arrays change shape or meaning
+PROFILE_FORMAT = 1
+
+
+def _times_ns(df_candle: pd.DataFrame) -> np.ndarray:
+    return pd.to_datetime(df_candle['time']).values.astype('datetime64[ns]').view('int64')
+
+
+class ExcursionProfile:
+    """TradeExcursion of every trade pair (None for pairs simulate_trade() skips)"""
+
+    def __init__(self, excursions: List[Optional[TradeExcursion]], entry_times=None, exit_times=None):
+        self.excursions = excursions
+        # Candle open times at entry_idx / exit_idx: a loaded profile is only valid for
+        # candles where these indices still point at the same candles
+        self.entry_times = entry_times
+        self.exit_times = exit_times
+
+    @classmethod
+    def build(cls, pairs: List[Dict], df_candle: pd.DataFrame) -> 'ExcursionProfile':
+        excursions = [trade_excursion(pair, df_candle) for pair in pairs]
+        times = _times_ns(df_candle)
+        entry_times = np.array([times[e.entry_idx] if e is not None else 0 for e in excursions], dtype='int64')
+        exit_times = np.array([times[e.exit_idx] if e is not None else 0 for e in excursions], dtype='int64')
+        return cls(excursions, entry_times, exit_times)
+
+    def __len__(self):
+        return len(self.excursions)
+
+    def matches(self, df_candle: pd.DataFrame) -> bool:
+        """True when the stored candle indices still address the same candles"""
+        times = _times_ns(df_candle)
+        for excursion, entry_time, exit_time in zip(self.excursions, self.entry_times, self.exit_times):
+            if excursion is None:
+                continue
+            if excursion.exit_idx >= len(times) or times[excursion.entry_idx] != entry_time or times[excursion.exit_idx] != exit_time:
+                return False
+        return True
+
+    # ---- queries ---------------------------------------------------------
+
+    def mfe_pct(self) -> np.ndarray:
+        return np.array([e.mfe_pct if e is not None else np.nan for e in self.excursions])
+
+    def mae_pct(self) -> np.ndarray:
+        return np.array([e.mae_pct if e is not None else np.nan for e in self.excursions])
+
+    def first_touch_candle(self, index: int, pct: float, favorable: bool = True) -> Optional[int]:
+        """Candle index where trade `index` first moves pct% in its favor (or against it), None if never"""
+        excursion = self.excursions[index]
+        if excursion is None:
+            return None
+        price = _trigger_price(excursion.entry_price, excursion.side, pct, favorable)
+        touch = excursion.first_favorable(price) if favorable else excursion.first_adverse(price)
+        if touch >= len(excursion.path):
+            return None
+        return excursion.entry_idx + touch // 4 + 1
+
+    def to_tradelist_frame(self, pairs: List[Dict]) -> pd.DataFrame:
+        """
+        Entry rows with the columns the range suggesters read from a TradingView tradelist:
+        type, run_up_% (MFE), drawdown_% (-MAE), net_pnl_% (original exit)
+        """
+        rows = []
+        for pair, excursion in zip(pairs, self.excursions):
+            if excursion is None:
+                continue
+            entry, exit_ = float(pair['entryPrice']), float(pair['exitPrice'])
+            pnl = (exit_ - entry) / entry * 100 if pair['side'] == 'LONG' else (entry - exit_) / entry * 100
+            rows.append({
+                'trade_#': pair['num'],
+                'type': 'Entry long' if pair['side'] == 'LONG' else 'Entry short',
+                'run_up_%': excursion.mfe_pct,
+                'drawdown_%': -excursion.mae_pct,
+                'net_pnl_%': pnl,
+            })
+        return pd.DataFrame(rows, columns=['trade_#', 'type', 'run_up_%', 'drawdown_%', 'net_pnl_%'])
+
+    # ---- storage ---------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        valid = [e for e in self.excursions if e is not None]
+        offsets = np.cumsum([0] + [len(e.path) for e in valid])
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            format=np.array([PROFILE_FORMAT]),
+            present=np.array([e is not None for e in self.excursions], dtype=bool),
+            entry_idx=np.array([e.entry_idx for e in valid], dtype='int64'),
+            exit_idx=np.array([e.exit_idx for e in valid], dtype='int64'),
+            entry_price=np.array([e.entry_price for e in valid], dtype=float),
+            long=np.array([e.side == 'LONG' for e in valid], dtype=bool),
+            offsets=offsets.astype('int64'),
+            path=np.concatenate([e.path for e in valid]) if valid else np.empty(0),
+            entry_times=np.asarray(self.entry_times, dtype='int64'),
+            exit_times=np.asarray(self.exit_times, dtype='int64'),
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> Optional['ExcursionProfile']:
+        """Profile stored by to_bytes(), None if it was written in another format"""
+        data = np.load(io.BytesIO(blob))
+        if int(data['format'][0]) != PROFILE_FORMAT:
+            return None
+        valid = iter(range(int(data['present'].sum())))
+        excursions = []
+        for present in data['present']:
+            if not present:
+                excursions.append(None)
+                continue
+            i = next(valid)
+            start, end = data['offsets'][i], data['offsets'][i + 1]
+            excursions.append(TradeExcursion(
+                int(data['entry_idx'][i]), int(data['exit_idx'][i]), float(data['entry_price'][i]),
+                'LONG' if data['long'][i] else 'SHORT', data['path'][start:end].copy()
+            ))
+        return cls(excursions, data['entry_times'], data['exit_times'])
+
+
+def get_excursion_profile(pairs: List[Dict], df_candle: pd.DataFrame, use_cache: bool = True) -> ExcursionProfile:
+    """Excursion profile of (pairs, candles): loaded from the optimization cache, else built and stored"""
+    if not use_cache:
+        return ExcursionProfile.build(pairs, df_candle)
+    cache = get_optimization_cache()
+    key = data_key(pairs, df_candle)
+    try:
+        blob = cache.get_profile(key)
+        profile = ExcursionProfile.from_bytes(blob) if blob is not None else None
+        if profile is not None and len(profile) == len(pairs) and profile.matches(df_candle):
+            return profile
+    except Exception as e:
+        print(f"⚠️ Stored excursion profile unusable, rebuilding: {e}")
+    profile = ExcursionProfile.build(pairs, df_candle)
+    try:
+        cache.put_profile(key, profile.to_bytes())
+        print(f"📐 Excursion profile stored for {len(pairs)} trades")
+    except Exception as e:
+        print(f"⚠️ Could not store excursion profile: {e}")
+    return profile
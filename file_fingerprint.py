@@ -0,0 +1,125 @@
+"""
+File Fingerprint Registry
+Ghi nhớ (size, mtime, sha256) của các file đã import để bỏ qua file không thay đổi.
+
+The registry table lives in the same SQLite DB as the data it guards, so deleting
+that DB also forgets the fingerprints and forces a full re-import.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+HASH_CHUNK = 1024 * 1024
+
+
+@dataclass
+class Fingerprint:
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FingerprintRegistry:
+    """
+    Registry of imported files keyed by (namespace, path).
+
+    `check` only hashes a file when its size or mtime changed since it was recorded,
+    so the common "nothing changed" case costs one stat() per file.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._init_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def _init_table(self):
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS file_fingerprints (
+                    namespace TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    extra_json TEXT DEFAULT '{}',
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (namespace, path)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_fingerprints_hash ON file_fingerprints(namespace, sha256)")
+            conn.commit()
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.abspath(path)
+
+    def get(self, namespace: str, path: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT size, mtime_ns, sha256, extra_json FROM file_fingerprints WHERE namespace = ? AND path = ?",
+                (namespace, self._key(path))
+            ).fetchone()
+        if not row:
+            return None
+        return {'size': row[0], 'mtime_ns': row[1], 'sha256': row[2], 'extra': json.loads(row[3] or '{}')}
+
+    def check(self, namespace: str, path: str):
+        """
+        Returns (unchanged, fingerprint). `fingerprint` is the current one and should be
+        passed to `record` once the file has been imported successfully.
+        """
+        st = os.stat(path)
+        stored = self.get(namespace, path)
+        if stored and stored['size'] == st.st_size and stored['mtime_ns'] == st.st_mtime_ns:
+            return True, Fingerprint(st.st_size, st.st_mtime_ns, stored['sha256'])
+        fp = Fingerprint(st.st_size, st.st_mtime_ns, hash_file(path))
+        if stored and stored['sha256'] == fp.sha256:
+            # touched but identical content: refresh mtime so the next check is stat-only
+            self.record(namespace, path, fp, stored['extra'])
+            return True, fp
+        return False, fp
+
+    def record(self, namespace: str, path: str, fp: Fingerprint, extra: Optional[Dict] = None):
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO file_fingerprints
+                (namespace, path, size, mtime_ns, sha256, extra_json, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, (namespace, self._key(path), fp.size, fp.mtime_ns, fp.sha256, json.dumps(extra or {})))
+            conn.commit()
+
+    def find_by_hash(self, namespace: str, sha256: str) -> Optional[Dict]:
+        """Look up a previously recorded file with identical content (e.g. a re-uploaded tradelist)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT path, extra_json FROM file_fingerprints WHERE namespace = ? AND sha256 = ? "
+                "ORDER BY updated_at DESC LIMIT 1",
+                (namespace, sha256)
+            ).fetchone()
+        if not row:
+            return None
+        return {'path': row[0], 'extra': json.loads(row[1] or '{}')}
+
+    def forget(self, namespace: str, path: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM file_fingerprints WHERE namespace = ? AND path = ?",
+                         (namespace, self._key(path)))
+            conn.commit()
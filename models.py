@@ -4,11 +4,22 @@ Level B Implementation: Complete database-driven result storage system
 """
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text, and_, or_
 from datetime import datetime
+import base64
+import io
 import json
+import os
+import zlib
+import numpy as np
 
 db = SQLAlchemy()
 
+# How save_optimization_result stores the equity curve:
+#   'rows' - one pnl_curves row per trade (queryable, default)
+#   'blob' - one zlib-compressed array on optimization_results.equity_curve_blob
+PNL_CURVE_STORAGE = os.environ.get('PNL_CURVE_STORAGE', 'rows')
+
 def safe_json_convert(obj):
     """Safely convert objects to JSON-serializable format"""
     if isinstance(obj, bytes):
@@ -31,9 +42,14 @@ class OptimizationResult(db.Model):
     Main table storing optimization run results and parameters
     """
     __tablename__ = 'optimization_results'
+    __table_args__ = (
+        # Dashboard filters + newest-first listing (keyset on timestamp, id)
+        db.Index('ix_optimization_results_listing', 'symbol', 'timeframe', 'engine', 'timestamp'),
+        db.Index('ix_optimization_results_engine_timestamp', 'engine', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     
     # Strategy and market info
     symbol = db.Column(db.String(20), nullable=False, index=True)
@@ -57,6 +73,10 @@ class OptimizationResult(db.Model):
     # Advanced metrics as JSON
     advanced_metrics = db.Column(db.Text)  # JSON: sharpe, max_dd, profit_factor, etc.
     
+    # Extracted from advanced_metrics so listings don't parse it per row
+    profit_factor = db.Column(db.Float)
+    max_drawdown = db.Column(db.Float)
+    
     # Runtime info
     execution_time = db.Column(db.Float)  # seconds
     iterations = db.Column(db.Integer)  # number of parameter combinations tested
@@ -65,6 +85,9 @@ class OptimizationResult(db.Model):
     candle_source = db.Column(db.String(100))
     trade_pairs_count = db.Column(db.Integer)
     
+    # Equity curve as one compressed array (PNL_CURVE_STORAGE='blob'), see PnLCurve.encode_blob
+    equity_curve_blob = db.deferred(db.Column(db.LargeBinary))
+    
     # Relationships
     trade_logs = db.relationship('TradeLog', backref='optimization', lazy='dynamic', cascade='all, delete-orphan')
     pnl_curves = db.relationship('PnLCurve', backref='optimization', lazy='dynamic', cascade='all, delete-orphan')
@@ -74,20 +97,12 @@ class OptimizationResult(db.Model):
     
     def to_dict(self):
         """Convert to dictionary for JSON response"""
-        try:
-            parameters = json.loads(self.parameters) if self.parameters else {}
-        except (json.JSONDecodeError, TypeError):
-            parameters = {}
+        parameters = _load_parameters(self.parameters)
             
         try:
             advanced_metrics = json.loads(self.advanced_metrics) if self.advanced_metrics else {}
         except (json.JSONDecodeError, TypeError):
             advanced_metrics = {}
-        
-        # Add field mapping for template compatibility
-        # Map ts_activation to ts_trig for frontend compatibility
-        if 'ts_activation' in parameters and 'ts_trig' not in parameters:
-            parameters['ts_trig'] = parameters['ts_activation']
             
         data = {
             'id': self.id,
@@ -127,6 +142,7 @@ class OptimizationResult(db.Model):
     @classmethod
     def create_from_result(cls, result_data):
         """Create optimization result from dictionary"""
+        advanced_metrics = result_data.get('advanced_metrics', {}) or {}
         return cls(
             symbol=result_data.get('symbol', ''),
             timeframe=result_data.get('timeframe', ''),
@@ -139,7 +155,9 @@ class OptimizationResult(db.Model):
             total_trades=result_data.get('total_trades', 0),
             win_count=result_data.get('win_count', 0),
             loss_count=result_data.get('loss_count', 0),
-            advanced_metrics=json.dumps(result_data.get('advanced_metrics', {})),
+            advanced_metrics=json.dumps(advanced_metrics),
+            profit_factor=_finite_or_none(advanced_metrics.get('pf')),
+            max_drawdown=_finite_or_none(advanced_metrics.get('max_drawdown')),
             execution_time=result_data.get('execution_time', 0.0),
             iterations=result_data.get('iterations', 0),
             candle_source=result_data.get('candle_source', ''),
@@ -194,6 +212,22 @@ class TradeLog(db.Model):
         
         return safe_json_convert(data)
     
+    @staticmethod
+    def bulk_rows(optimization_id, trades):
+        """Row dicts for a Core executemany insert (same field mapping as create_from_trade)"""
+        return [
+            {
+                'optimization_id': optimization_id,
+                'trade_num': trade.get('num', 0),
+                'side': trade.get('side', ''),
+                'entry_price': float(trade.get('entry_price', 0)),
+                'exit_price': float(trade.get('exit_price', 0)),
+                'exit_type': trade.get('exit_type', ''),
+                'pnl_pct': float(trade.get('pnl_pct', 0)),
+            }
+            for trade in trades
+        ]
+    
     @classmethod
     def create_from_trade(cls, optimization_id, trade_data):
         """Create trade log from trade dictionary"""
@@ -251,6 +285,70 @@ class PnLCurve(db.Model):
         
         return safe_json_convert(data)
     
+    # Column order of the arrays in a curve blob
+    BLOB_FIELDS = ('trade_pnl', 'cumulative_pnl', 'running_winrate', 'drawdown')
+    
+    @staticmethod
+    def compute_arrays(trades):
+        """Vectorized equivalent of generate_from_trades: dict of per-trade numpy arrays"""
+        trade_pnl = np.array([float(t.get('pnl_pct', 0)) for t in trades], dtype=np.float64)
+        cumulative = np.cumsum(trade_pnl)
+        n = np.arange(1, len(trade_pnl) + 1)
+        running_winrate = np.cumsum(trade_pnl > 0) / np.maximum(n, 1) * 100
+        # peak starts at 0.0, as in generate_from_trades
+        peak = np.maximum.accumulate(np.maximum(cumulative, 0.0)) if len(cumulative) else cumulative
+        return {
+            'trade_number': n,
+            'trade_pnl': trade_pnl,
+            'cumulative_pnl': cumulative,
+            'running_winrate': running_winrate,
+            'drawdown': peak - cumulative,
+        }
+    
+    @classmethod
+    def bulk_rows(cls, optimization_id, trades):
+        """Row dicts for a Core executemany insert into pnl_curves"""
+        arrays = cls.compute_arrays(trades)
+        return [
+            {
+                'optimization_id': optimization_id,
+                'trade_number': int(i),
+                'cumulative_pnl': float(c),
+                'trade_pnl': float(p),
+                'running_winrate': float(w),
+                'drawdown': float(d),
+            }
+            for i, p, c, w, d in zip(arrays['trade_number'], arrays['trade_pnl'], arrays['cumulative_pnl'],
+                                     arrays['running_winrate'], arrays['drawdown'])
+        ]
+    
+    @classmethod
+    def encode_blob(cls, trades):
+        """Equity curve as a zlib-compressed .npy array of shape (len(BLOB_FIELDS), n_trades)"""
+        arrays = cls.compute_arrays(trades)
+        buffer = io.BytesIO()
+        np.save(buffer, np.vstack([arrays[f] for f in cls.BLOB_FIELDS]), allow_pickle=False)
+        return zlib.compress(buffer.getvalue(), 6)
+    
+    @classmethod
+    def decode_blob(cls, optimization_id, blob):
+        """Curve points (same shape as to_dict) from an encoded blob"""
+        matrix = np.load(io.BytesIO(zlib.decompress(blob)), allow_pickle=False)
+        columns = dict(zip(cls.BLOB_FIELDS, matrix))
+        return [
+            {
+                'id': None,
+                'optimization_id': optimization_id,
+                'trade_number': i + 1,
+                'cumulative_pnl': float(columns['cumulative_pnl'][i]),
+                'trade_pnl': float(columns['trade_pnl'][i]),
+                'running_winrate': float(columns['running_winrate'][i]),
+                'drawdown': float(columns['drawdown'][i]),
+                'timestamp': None,
+            }
+            for i in range(matrix.shape[1] if matrix.ndim == 2 else 0)
+        ]
+    
     @classmethod
     def generate_from_trades(cls, optimization_id, trades):
         """Generate PnL curve data points from trade list"""
@@ -284,13 +382,43 @@ class PnLCurve(db.Model):
         return curve_points
 
 
-def init_db(app):
-    """Initialize database with Flask app"""
+def _load_parameters(raw):
+    """Parse the parameters JSON, mapping ts_activation to ts_trig for the frontend"""
+    try:
+        parameters = json.loads(raw) if raw else {}
+    except (json.JSONDecodeError, TypeError):
+        parameters = {}
+    if 'ts_activation' in parameters and 'ts_trig' not in parameters:
+        parameters['ts_trig'] = parameters['ts_activation']
+    return parameters
+
+
+def _finite_or_none(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if np.isfinite(value) else None
+
+
+def init_db(app, create_tables=True):
+    """Initialize database with Flask app
+
+    With create_tables=False only the extension is bound; call create_tables_for(app)
+    later (e.g. on the first request) to keep app startup free of DB I/O.
+    """
     db.init_app(app)
-    
+    if create_tables:
+        create_tables_for(app)
+
+
+def create_tables_for(app):
+    """Create all tables for the bound app (idempotent)"""
     with app.app_context():
         # Create all tables
         db.create_all()
+        _add_missing_columns()
+        _add_missing_indexes()
         print("✅ Database tables created successfully")
         
         # Print table info
@@ -300,32 +428,68 @@ def init_db(app):
         print(f"   - pnl_curves")
 
 
-def save_optimization_result(result_data, trades_data):
+def _add_missing_columns():
+    """create_all() never alters existing tables; add columns introduced after a DB was created"""
+    columns = {c['name'] for c in inspect(db.engine).get_columns('optimization_results')}
+    if 'equity_curve_blob' not in columns:
+        with db.engine.begin() as conn:
+            conn.execute(text("ALTER TABLE optimization_results ADD COLUMN equity_curve_blob BLOB"))
+    if 'profit_factor' not in columns:
+        with db.engine.begin() as conn:
+            conn.execute(text("ALTER TABLE optimization_results ADD COLUMN profit_factor FLOAT"))
+            conn.execute(text("ALTER TABLE optimization_results ADD COLUMN max_drawdown FLOAT"))
+            # Backfill the extracted metrics once for rows saved before the columns existed
+            rows = conn.execute(text("SELECT id, advanced_metrics FROM optimization_results")).fetchall()
+            updates = []
+            for row_id, raw in rows:
+                try:
+                    metrics = json.loads(raw) if raw else {}
+                except (json.JSONDecodeError, TypeError):
+                    metrics = {}
+                updates.append({'id': row_id,
+                                'pf': _finite_or_none(metrics.get('pf')),
+                                'dd': _finite_or_none(metrics.get('max_drawdown'))})
+            if updates:
+                conn.execute(text("UPDATE optimization_results SET profit_factor = :pf, max_drawdown = :dd WHERE id = :id"), updates)
+
+
+def _add_missing_indexes():
+    """create_all() only indexes tables it creates; add listing indexes to existing DBs"""
+    for index in OptimizationResult.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+
+
+def save_optimization_result(result_data, trades_data, curve_storage=None):
     """
     Save complete optimization result with trades and PnL curve
     
+    Trades and curve points go in with one executemany each instead of one ORM
+    object per row (see scripts/save_result_benchmark.py).
+    
     Args:
         result_data (dict): Optimization summary data
         trades_data (list): List of trade dictionaries
+        curve_storage (str): 'rows' or 'blob'; defaults to PNL_CURVE_STORAGE
         
     Returns:
         OptimizationResult: Saved optimization result object
     """
+    curve_storage = curve_storage or PNL_CURVE_STORAGE
     try:
         # Create optimization result
         opt_result = OptimizationResult.create_from_result(result_data)
+        if curve_storage == 'blob' and trades_data:
+            opt_result.equity_curve_blob = PnLCurve.encode_blob(trades_data)
         db.session.add(opt_result)
         db.session.flush()  # Get the ID
         
-        # Create trade logs
-        for trade in trades_data:
-            trade_log = TradeLog.create_from_trade(opt_result.id, trade)
-            db.session.add(trade_log)
+        # Bulk insert trade logs
+        if trades_data:
+            db.session.execute(TradeLog.__table__.insert(), TradeLog.bulk_rows(opt_result.id, trades_data))
         
-        # Generate and save PnL curve
-        curve_points = PnLCurve.generate_from_trades(opt_result.id, trades_data)
-        for point in curve_points:
-            db.session.add(point)
+        # Bulk insert PnL curve points
+        if trades_data and curve_storage != 'blob':
+            db.session.execute(PnLCurve.__table__.insert(), PnLCurve.bulk_rows(opt_result.id, trades_data))
         
         # Commit all changes
         db.session.commit()
@@ -339,37 +503,104 @@ def save_optimization_result(result_data, trades_data):
         raise
 
 
-def get_optimization_results(filters=None, limit=50, offset=0):
+# Columns read by list views; parameters is the only JSON parsed per row and
+# advanced_metrics / equity_curve_blob stay in the database until a result is opened
+LISTING_COLUMNS = (
+    'id', 'timestamp', 'symbol', 'timeframe', 'strategy', 'engine', 'criteria', 'parameters',
+    'total_pnl', 'winrate', 'total_trades', 'win_count', 'loss_count', 'profit_factor',
+    'max_drawdown', 'execution_time', 'iterations', 'candle_source', 'trade_pairs_count'
+)
+
+
+def encode_results_cursor(row):
+    """Opaque keyset cursor pointing just past a listing row"""
+    raw = f"{row['timestamp']}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_results_cursor(cursor):
+    """Inverse of encode_results_cursor -> (timestamp, id); raises ValueError if malformed"""
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _filtered_query(query, filters):
+    """Apply the dashboard filters shared by listing, count and export queries"""
+    if filters:
+        if 'symbol' in filters:
+            query = query.filter(OptimizationResult.symbol == filters['symbol'])
+        if 'timeframe' in filters:
+            query = query.filter(OptimizationResult.timeframe == filters['timeframe'])
+        if 'engine' in filters:
+            query = query.filter(OptimizationResult.engine == filters['engine'])
+        if 'min_pnl' in filters:
+            query = query.filter(OptimizationResult.total_pnl >= filters['min_pnl'])
+        if 'max_pnl' in filters:
+            query = query.filter(OptimizationResult.total_pnl <= filters['max_pnl'])
+    return query
+
+
+def _listing_row(row):
+    """Listing dict with the same keys the dashboard reads from to_dict()"""
+    data = dict(row._mapping)
+    parameters = _load_parameters(data['parameters'])
+    data['parameters'] = parameters
+    data['timestamp'] = data['timestamp'].isoformat() if data['timestamp'] else None
+    data['pf'] = data.pop('profit_factor') or 0.0
+    data['max_drawdown'] = data['max_drawdown'] or 0.0
+    if 'ts_activation' in parameters:
+        data['ts_activation'] = parameters['ts_activation']
+        data['ts_trig'] = parameters['ts_activation']
+    if 'ts_step' in parameters:
+        data['ts_step'] = parameters['ts_step']
+    return data
+
+
+def get_optimization_results(filters=None, limit=50, offset=0, cursor=None, full=False):
     """
     Retrieve optimization results with optional filtering
     
     Args:
-        filters (dict): Optional filters (symbol, engine, etc.)
+        filters (dict): Optional filters (symbol, timeframe, engine, min_pnl, max_pnl)
         limit (int): Maximum results to return
-        offset (int): Results to skip for pagination
+        offset (int): Results to skip for pagination (ignored when cursor is given)
+        cursor (str): Keyset cursor from encode_results_cursor(last row of previous page)
+        full (bool): Return to_dict() rows (with advanced_metrics) instead of the listing projection
         
     Returns:
         list: List of optimization result dictionaries
     """
-    query = OptimizationResult.query
+    if full:
+        query = OptimizationResult.query
+    else:
+        query = db.session.query(*(getattr(OptimizationResult, name) for name in LISTING_COLUMNS))
+    query = _filtered_query(query, filters)
     
-    if filters:
-        if 'symbol' in filters:
-            query = query.filter(OptimizationResult.symbol == filters['symbol'])
-        if 'engine' in filters:
-            query = query.filter(OptimizationResult.engine == filters['engine'])
-        if 'min_pnl' in filters:
-            query = query.filter(OptimizationResult.total_pnl >= filters['min_pnl'])
-        if 'max_pnl' in filters:
-            query = query.filter(OptimizationResult.total_pnl <= filters['max_pnl'])
+    if cursor:
+        timestamp, row_id = decode_results_cursor(cursor)
+        query = query.filter(or_(
+            OptimizationResult.timestamp < timestamp,
+            and_(OptimizationResult.timestamp == timestamp, OptimizationResult.id < row_id)
+        ))
+        offset = 0
     
-    # Order by timestamp descending (latest first)
-    query = query.order_by(OptimizationResult.timestamp.desc())
+    # Order by timestamp descending (latest first); id breaks ties for stable keyset pages
+    query = query.order_by(OptimizationResult.timestamp.desc(), OptimizationResult.id.desc())
     
     # Apply pagination
     results = query.limit(limit).offset(offset).all()
     
-    return [result.to_dict() for result in results]
+    if full:
+        return [result.to_dict() for result in results]
+    return [_listing_row(row) for row in results]
+
+
+def count_optimization_results(filters=None):
+    """Number of results matching filters (same filters as get_optimization_results)"""
+    return _filtered_query(db.session.query(db.func.count(OptimizationResult.id)), filters).scalar()
 
 
 def get_optimization_details(optimization_id):
@@ -387,6 +618,8 @@ def get_optimization_details(optimization_id):
     # Get associated trades and PnL curve
     trades = [trade.to_dict() for trade in opt_result.trade_logs.all()]
     pnl_curve = [point.to_dict() for point in opt_result.pnl_curves.order_by(PnLCurve.trade_number).all()]
+    if not pnl_curve and opt_result.equity_curve_blob:
+        pnl_curve = PnLCurve.decode_blob(opt_result.id, opt_result.equity_curve_blob)
     
     return {
         'optimization': opt_result.to_dict(),
@@ -395,6 +628,112 @@ def get_optimization_details(optimization_id):
     }
 
 
+# Export columns in order; JSON-valued fields are written as JSON strings in CSV/Parquet
+EXPORT_FIELDS = (
+    'id', 'timestamp', 'symbol', 'timeframe', 'strategy', 'engine', 'criteria', 'parameters',
+    'total_pnl', 'winrate', 'total_trades', 'win_count', 'loss_count', 'pf', 'max_drawdown',
+    'advanced_metrics', 'execution_time', 'iterations', 'candle_source', 'trade_pairs_count'
+)
+EXPORT_CHUNK_SIZE = 500
+
+
+def iter_optimization_results(filters=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield every matching result as to_dict() rows, one keyset page at a time"""
+    cursor = None
+    while True:
+        rows = get_optimization_results(filters, limit=chunk_size, cursor=cursor, full=True)
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        cursor = encode_results_cursor(rows[-1])
+
+
+def _flat_export_row(result):
+    row = {field: result.get(field) for field in EXPORT_FIELDS}
+    for field in ('parameters', 'advanced_metrics'):
+        if isinstance(row[field], dict):
+            row[field] = json.dumps(row[field])
+    return row
+
+
+def iter_export_optimization_results(format='json', filters=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Export optimization results as a stream of text chunks
+    
+    Rows are read chunk_size at a time, so memory stays bounded however many
+    results match; suitable for a streamed HTTP response or writing to a file.
+    
+    Args:
+        format (str): 'json' or 'csv'
+        filters (dict): Optional filters (see get_optimization_results)
+        
+    Yields:
+        str: Pieces of the exported document
+    """
+    format = format.lower()
+    if format == 'json':
+        parts = ['[']
+        for i, result in enumerate(iter_optimization_results(filters, chunk_size)):
+            parts.append((',\n' if i else '\n') + json.dumps(result, indent=2))
+            if len(parts) >= chunk_size:
+                yield ''.join(parts)
+                parts = []
+        parts.append('\n]')
+        yield ''.join(parts)
+    elif format == 'csv':
+        import csv
+        
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for i, result in enumerate(iter_optimization_results(filters, chunk_size), 1):
+            writer.writerow(_flat_export_row(result))
+            if i % chunk_size == 0:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+        yield output.getvalue()
+    else:
+        raise ValueError(f"Unsupported export format: {format}")
+
+
+def write_parquet_optimization_results(file, filters=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Write matching results to a Parquet file, one row group per chunk
+    
+    Requires pyarrow (ImportError otherwise).
+    
+    Args:
+        file: Path or binary file object
+        filters (dict): Optional filters (see get_optimization_results)
+        
+    Returns:
+        int: Number of rows written
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    types = {'id': pa.int64(), 'total_trades': pa.int64(), 'win_count': pa.int64(),
+             'loss_count': pa.int64(), 'iterations': pa.int64(), 'trade_pairs_count': pa.int64(),
+             'total_pnl': pa.float64(), 'winrate': pa.float64(), 'pf': pa.float64(),
+             'max_drawdown': pa.float64(), 'execution_time': pa.float64()}
+    schema = pa.schema([(field, types.get(field, pa.string())) for field in EXPORT_FIELDS])
+    
+    written = 0
+    chunk = []
+    with pq.ParquetWriter(file, schema) as writer:
+        for result in iter_optimization_results(filters, chunk_size):
+            chunk.append(_flat_export_row(result))
+            if len(chunk) == chunk_size:
+                writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+                written += len(chunk)
+                chunk = []
+        if chunk or not written:
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+            written += len(chunk)
+    return written
+
+
 def export_optimization_results(format='json', filters=None):
     """
     Export optimization results to file format
@@ -404,30 +743,6 @@ def export_optimization_results(format='json', filters=None):
         filters (dict): Optional filters
         
     Returns:
-        str: Exported data as string
+        str: Exported data as string (use iter_export_optimization_results to stream)
     """
-    results = get_optimization_results(filters, limit=1000)  # Get up to 1000 results
-    
-    if format.lower() == 'json':
-        return json.dumps(results, indent=2)
-    elif format.lower() == 'csv':
-        import csv
-        import io
-        
-        output = io.StringIO()
-        if results:
-            fieldnames = results[0].keys()
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            writer.writeheader()
-            for result in results:
-                # Flatten JSON fields for CSV
-                flat_result = result.copy()
-                if 'parameters' in flat_result and isinstance(flat_result['parameters'], dict):
-                    flat_result['parameters'] = json.dumps(flat_result['parameters'])
-                if 'advanced_metrics' in flat_result and isinstance(flat_result['advanced_metrics'], dict):
-                    flat_result['advanced_metrics'] = json.dumps(flat_result['advanced_metrics'])
-                writer.writerow(flat_result)
-        
-        return output.getvalue()
-    else:
-        raise ValueError(f"Unsupported export format: {format}")
\ No newline at end of file
+    return ''.join(iter_export_optimization_results(format, filters))
@@ -1,6 +1,6 @@
 """
 Multi-Symbol Batch Processor - Production-Ready Engine
-Tích hợp data_manager, tradelist_manager, results_manager
+Tích hợp data_manager, strategy_manager, results_manager
 Advanced batch optimization với parallel processing
 """
 
@@ -8,7 +8,9 @@ import os
 import sys
 import threading
 import multiprocessing
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from multiprocessing.connection import wait as wait_connections
 import time
 import json
 import traceback
@@ -23,12 +25,15 @@ from pathlib import Path
 # Import our managers
 from data_manager import DataManager, get_data_manager
 from results_manager import ResultsManager, get_results_manager
-from src.tradelist_manager import TradelistManager
+from strategy_manager import get_strategy_manager
+from successive_halving import successive_halving, planned_evaluations, HALVING_ETA
+from walk_forward import run_walk_forward, WF_FOLDS, WF_IN_SAMPLE_PERIODS
 
 # Import backtest engine
 try:
     from backtest_gridsearch_slbe_ts_Version3 import (
-        simulate_trade, grid_search_parallel
+        grid_search_parallel, run_one_setting, simulate_trade, summarize_setting, DominanceSimulator,
+        load_trade_csv, get_trade_pairs
     )
     ADVANCED_MODE = True
 except ImportError:
@@ -52,6 +57,25 @@ class BatchConfig:
     generate_reports: bool = True
     user_id: str = "batch_user"
     project_name: str = "multi_symbol_batch"
+    strategy_name: Optional[str] = None  # None = latest uploaded strategy for the symbol
+    opt_type: str = "pnl"  # pnl, winrate or pf
+    pairs: Optional[List[Tuple[str, str]]] = None  # explicit (symbol, timeframe) list instead of symbols x timeframes
+    execution_mode: str = "process"  # "process" (CPU-bound, default) or "thread"
+    cpu_budget: Optional[int] = None  # total cores for symbol workers x grid pool; None = os.cpu_count()
+    grid_halving: bool = False  # grid: successive halving over trade subsets instead of the full grid
+    halving_eta: int = HALVING_ETA  # keep the best 1/eta per rung
+    halving_mode: str = "chronological"  # "chronological" or "stratified" trade subsets
+    walk_forward: bool = False  # also report walk-forward IS/OOS folds over the grid ranges
+    wf_folds: int = WF_FOLDS
+    wf_in_sample_periods: int = WF_IN_SAMPLE_PERIODS  # periods of one out-of-sample window per in-sample window
+    wf_anchored: bool = False  # in-sample windows start at the first trade instead of rolling
+    persist_studies: bool = True  # optuna: persisted study per symbol/timeframe/strategy, warm-started on new trades
+
+    def tasks(self) -> List[Tuple[str, str]]:
+        """(symbol, timeframe) combinations to optimize"""
+        if self.pairs:
+            return [tuple(p) for p in self.pairs]
+        return [(symbol, timeframe) for symbol in self.symbols for timeframe in self.timeframes]
 
 @dataclass
 class SymbolProgress:
@@ -66,6 +90,34 @@ class SymbolProgress:
     error_message: Optional[str] = None
     trials_completed: int = 0
     total_trials: int = 0
+    trade_count: int = 0
+    result_id: Optional[str] = None
+
+    @property
+    def elapsed_seconds(self) -> float:
+        if not self.start_time:
+            return 0.0
+        return ((self.end_time or datetime.now()) - self.start_time).total_seconds()
+
+    @property
+    def trials_per_second(self) -> float:
+        elapsed = self.elapsed_seconds
+        return self.trials_completed / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'symbol': self.symbol,
+            'timeframe': self.timeframe,
+            'status': self.status,
+            'progress': round(self.progress, 2),
+            'trials_completed': self.trials_completed,
+            'total_trials': self.total_trials,
+            'trade_count': self.trade_count,
+            'elapsed_seconds': round(self.elapsed_seconds, 2),
+            'trials_per_second': round(self.trials_per_second, 3),
+            'result_id': self.result_id,
+            'error_message': self.error_message,
+        }
 
 @dataclass
 class BatchResult:
@@ -81,6 +133,382 @@ class BatchResult:
     best_overall: Optional[Dict] = None
     summary_stats: Optional[Dict] = None
 
+# Extra time a worker process gets past timeout_per_symbol before the parent kills it.
+# Optuna and grid runs stop themselves at the deadline; this only catches a stuck simulation.
+HARD_TIMEOUT_GRACE = 30
+# Inputs kept warm per process (candles + prepared trade pairs), LRU-evicted
+INPUT_CACHE_SIZE = 8
+
+_candle_cache: "OrderedDict[Tuple[str, str], pd.DataFrame]" = OrderedDict()
+_trade_cache: "OrderedDict[Tuple[str, int], List[Dict]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_get(cache: OrderedDict, key):
+    with _cache_lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    return None
+
+
+def _cache_put(cache: OrderedDict, key, value):
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > INPUT_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def clear_input_cache():
+    """Drop warm candles/trade pairs (called at batch start so new data is picked up)"""
+    with _cache_lock:
+        _candle_cache.clear()
+        _trade_cache.clear()
+
+
+def plan_cpu_budget(config: BatchConfig, n_tasks: int) -> Tuple[int, int]:
+    """
+    Split one CPU budget between symbol-level workers and each symbol's grid pool,
+    so N symbols x cpu_count() grid processes can't oversubscribe the machine.
+    Returns (symbol_workers, processes_per_symbol).
+    """
+    budget = max(1, config.cpu_budget or os.cpu_count() or 1)
+    workers = max(1, min(config.parallel_symbols, budget, n_tasks or 1))
+    return workers, max(1, budget // workers)
+
+
+def _load_candles(symbol: str, timeframe: str) -> pd.DataFrame:
+    """Load candles, trying the timeframe spellings used by the DB ('30m') and CSV names ('30')"""
+    cached = _cache_get(_candle_cache, (symbol, str(timeframe)))
+    if cached is not None:
+        return cached
+    data_manager = get_data_manager()
+    tf = str(timeframe)
+    variants = [tf, tf.lower()]
+    if tf.isdigit():
+        variants.append(f"{tf}m")
+    elif tf[:-1].isdigit() and tf[-1] in 'mM':
+        variants.append(tf[:-1])
+    for variant in dict.fromkeys(variants):
+        candles = data_manager.load_candle_data(symbol, variant)
+        if candles is not None and not candles.empty:
+            _cache_put(_candle_cache, (symbol, tf), candles)
+            return candles
+    return pd.DataFrame()
+
+
+def _find_strategy(symbol: str, timeframe: str, strategy_name: Optional[str] = None):
+    """Latest uploaded tradelist for symbol on this timeframe (None if there is none: another
+    timeframe's trades can't be simulated on these candles)"""
+    tf = str(timeframe).lower().rstrip('m')
+    strategies = [strategy for strategy in get_strategy_manager().list_strategies(symbol=symbol, strategy_name=strategy_name)
+                  if str(strategy.timeframe).lower().rstrip('m') == tf]
+    if not strategies:
+        return None
+    return max(strategies, key=lambda strategy: strategy.upload_date)
+
+
+def _load_trade_pairs(file_path: str) -> List[Dict]:
+    key = (file_path, os.stat(file_path).st_mtime_ns)
+    cached = _cache_get(_trade_cache, key)
+    if cached is not None:
+        return cached
+    trade_data = load_trade_csv(file_path)
+    if trade_data is None or trade_data.empty:
+        return []
+    trade_pairs, _ = get_trade_pairs(trade_data)
+    _cache_put(_trade_cache, key, trade_pairs)
+    return trade_pairs
+
+
+def _score(result: Dict, opt_type: str) -> float:
+    key = {'pnl': 'pnl_total', 'winrate': 'winrate', 'pf': 'pf'}.get(opt_type, 'pnl_total')
+    value = result.get(key, -10000)
+    return -10000 if value is None or np.isnan(value) else float(value)
+
+
+def _to_best_result(result: Dict) -> Dict:
+    """Shape a run_one_setting result like the rest of the batch/report code expects"""
+    return {
+        'params': {k: float(result[k]) for k in ('sl', 'be', 'ts_trig', 'ts_step')},
+        'pnl': float(result['pnl_total']),
+        'pnl_total': float(result['pnl_total']),
+        'winrate': float(result['winrate']),
+        'pf': float(result['pf']),
+        'num': len(result.get('details', [])),
+        'total_trades': len(result.get('details', [])),
+        'skip': result.get('skip', 0),
+        'details': result.get('details', []),
+    }
+
+
+def _run_optuna_optimization(progress, trade_pairs: List, candle_data: pd.DataFrame,
+                             config: BatchConfig, deadline: float, study_key: Optional[Tuple] = None) -> Optional[Dict]:
+    """Run Optuna optimization with progress tracking, stopping at the deadline
+    study_key: (symbol, timeframe, strategy) of a persisted study (see optuna_studies.py)"""
+    
+    def objective(trial):
+        # Sample parameters
+        sl = trial.suggest_float('sl', config.sl_range[0], config.sl_range[1])
+        be = trial.suggest_float('be', config.be_range[0], config.be_range[1])
+        ts_trig = trial.suggest_float('ts_trig', config.ts_trig_range[0], config.ts_trig_range[1])
+        ts_step = trial.suggest_float('ts_step', config.ts_step_range[0], config.ts_step_range[1])
+        
+        # Run simulation over all trades
+        result = run_one_setting((sl, be, ts_trig, ts_step, trade_pairs, candle_data))
+        if not result['details']:
+            return -10000  # Heavy penalty for failed simulation
+        return _score(result, config.opt_type)
+    
+    ranges = {'sl': config.sl_range[:2], 'be': config.be_range[:2],
+              'ts_trig': config.ts_trig_range[:2], 'ts_step': config.ts_step_range[:2]}
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    study, study_info = None, None
+    if study_key is not None:
+        try:
+            from optuna_studies import open_study
+            from pareto import PARETO_OBJECTIVES
+            seed_metric = PARETO_OBJECTIVES.get(config.opt_type, ('pnl_total', True))[0]
+            study, study_info = open_study('batch', *study_key, config.opt_type, trade_pairs, candle_data, ranges,
+                                           seed_metric=seed_metric)
+        except Exception as e:
+            print(f"⚠️ Persistent Optuna study unavailable, using in-memory study: {e}")
+    if study is None:
+        study = optuna.create_study(direction='maximize')
+    session_trials = [0]
+    
+    def report_progress(study, trial):
+        session_trials[0] += 1
+        progress.trials_completed = session_trials[0]
+        progress.progress = min(100.0, session_trials[0] / config.n_trials * 100)
+        if time.time() > deadline:
+            study.stop()
+    
+    try:
+        study.optimize(
+            objective,
+            n_trials=config.n_trials,
+            timeout=max(1.0, deadline - time.time()),
+            callbacks=[report_progress]
+        )
+    except Exception as e:
+        print(f"⚠️ Optuna optimization interrupted: {e}")
+    
+    if study_info is not None:
+        # A resumed study may hold trials of other ranges: only this search space counts
+        from optuna_studies import best_in_ranges
+        best = best_in_ranges(study, ranges)
+    else:
+        completed = [t for t in study.trials if t.value is not None]
+        best = (study.best_trial.params, study.best_value) if completed else None
+    if best is None:
+        return None
+    best_params, best_value = best
+    
+    # Run final simulation with best parameters
+    final = run_one_setting((best_params['sl'], best_params['be'],
+                             best_params['ts_trig'], best_params['ts_step'],
+                             trade_pairs, candle_data))
+    if not final['details']:
+        return None
+    
+    best_result = _to_best_result(final)
+    best_result['optuna_trials'] = session_trials[0]
+    best_result['best_value'] = best_value
+    if study_info is not None:
+        best_result['optuna_study'] = study_info
+    return best_result
+
+
+def _grid_lists(config: BatchConfig) -> Tuple[List, List, List, List]:
+    """SL, BE, TS trigger and TS step values of the configured (min, max, step) ranges"""
+    # stop + step/2, as in the web engines: float drift of stop + step can add a cell past stop
+    return tuple(
+        list(np.arange(start, stop + step / 2, step))
+        for start, stop, step in (config.sl_range, config.be_range, config.ts_trig_range, config.ts_step_range)
+    )
+
+
+def _run_grid_optimization(progress, trade_pairs: List, candle_data: pd.DataFrame,
+                           config: BatchConfig, processes: int, deadline: float) -> Optional[Dict]:
+    """Run grid search optimization with progress tracking, stopping at the deadline"""
+    
+    # Generate parameter lists
+    sl_list, be_list, ts_trig_list, ts_step_list = _grid_lists(config)
+    
+    total_combinations = len(sl_list) * len(be_list) * len(ts_trig_list) * len(ts_step_list)
+    progress.total_trials = total_combinations
+    
+    print(f"🔢 Grid search: {total_combinations} combinations on {processes} process(es)")
+    
+    def report_progress(done, total):
+        progress.trials_completed = done
+        progress.progress = done / total * 100
+    
+    halving_stats = None
+    if config.grid_halving:
+        combos = [(sl, be, ts_trig, ts_step) for sl in sl_list for be in be_list
+                  for ts_trig in ts_trig_list for ts_step in ts_step_list]
+        # Halving reports progress over the evaluations of every rung, not over the grid
+        progress.total_trials = planned_evaluations(len(set(combos)), len(trade_pairs), config.halving_eta)
+        results, halving_stats = _run_halving_grid(
+            combos, trade_pairs, candle_data, config, processes, deadline, report_progress
+        )
+    else:
+        results = grid_search_parallel(
+            trade_pairs, candle_data, sl_list, be_list, ts_trig_list, ts_step_list, config.opt_type,
+            processes=processes, deadline=deadline, on_progress=report_progress
+        )
+    
+    results = [r for r in results if r.get('details')]
+    if not results:
+        return None
+    
+    # Find best result
+    best_result = _to_best_result(max(results, key=lambda r: _score(r, config.opt_type)))
+    best_result['grid_combinations'] = total_combinations
+    best_result['grid_evaluated'] = progress.trials_completed
+    if halving_stats:
+        best_result['successive_halving'] = halving_stats
+    
+    return best_result
+
+
+def _simulate_indexed_trades(args) -> Dict[int, Optional[Dict]]:
+    """Pool task: one (sl, be, ts_trig, ts_step) combination on [(trade_index, pair), ...]"""
+    (sl, be, ts_trig, ts_step), indexed_pairs, df_candle = args
+    return {index: simulate_trade(pair, df_candle, sl, be, ts_trig, ts_step)[0] for index, pair in indexed_pairs}
+
+
+def _run_halving_grid(combos: List[Tuple], trade_pairs: List, candle_data: pd.DataFrame, config: BatchConfig,
+                      processes: int, deadline: float, report_progress) -> Tuple[List[Dict], Dict]:
+    """Successive halving over trade subsets; survivors end up simulated on every trade"""
+    pool = multiprocessing.Pool(processes=processes) if processes > 1 else None
+    # In-process: equivalent BE/TS cells share one simulation per trade, excursions
+    # come from the stored per-trade profile of this dataset
+    dominance = None
+    if not pool:
+        from excursion_profile import get_excursion_profile
+        dominance = DominanceSimulator(trade_pairs, candle_data, get_excursion_profile(trade_pairs, candle_data).excursions)
+    
+    def evaluate(alive, trade_indices):
+        if dominance:
+            return [{i: dominance.simulate(i, *combo) for i in trade_indices} for combo in alive]
+        indexed_pairs = [(i, trade_pairs[i]) for i in trade_indices]
+        tasks = [(combo, indexed_pairs, candle_data) for combo in alive]
+        return pool.map(_simulate_indexed_trades, tasks) if pool else [_simulate_indexed_trades(t) for t in tasks]
+    
+    try:
+        return successive_halving(
+            combos, len(trade_pairs), evaluate,
+            summarize=lambda combo, details: summarize_setting(*combo, details),
+            score=lambda r: _score(r, config.opt_type),
+            eta=config.halving_eta, mode=config.halving_mode,
+            deadline=deadline, on_progress=report_progress
+        )
+    finally:
+        if pool:
+            pool.terminate()
+            pool.join()
+
+
+def _run_walk_forward(trade_pairs: List, candle_data: pd.DataFrame, config: BatchConfig,
+                      processes: int, deadline: float) -> Dict:
+    """Walk-forward folds over the grid ranges, trade chunks simulated on the symbol's process budget"""
+    sl_list, be_list, ts_trig_list, ts_step_list = _grid_lists(config)
+    combos = [(sl, be, ts_trig, ts_step) for sl in sl_list for be in be_list
+              for ts_trig in ts_trig_list for ts_step in ts_step_list]
+    report = run_walk_forward(
+        trade_pairs, candle_data, combos, config.opt_type,
+        folds=config.wf_folds, in_sample_periods=config.wf_in_sample_periods, anchored=config.wf_anchored,
+        processes=processes, deadline=deadline
+    )
+    if report['folds']:
+        print(f"🚶 Walk-forward: {len(report['folds'])} folds, OOS PnL {report['out_of_sample']['pnl_total']:.2f}%")
+    return report
+
+
+def _optimize_symbol(symbol: str, timeframe: str, config: BatchConfig, progress, processes: int) -> Dict:
+    """Load inputs and optimize one symbol/timeframe; shared by thread and process modes"""
+    if not ADVANCED_MODE:
+        raise ValueError("Advanced optimization not available")
+    
+    deadline = time.time() + config.timeout_per_symbol
+    
+    # Load candle data
+    candle_data = _load_candles(symbol, timeframe)
+    if candle_data is None or candle_data.empty:
+        raise ValueError(f"No candle data for {symbol} {timeframe}m")
+    
+    # Load tradelist data from Strategy Management
+    strategy = _find_strategy(symbol, timeframe, config.strategy_name)
+    if strategy is None:
+        raise ValueError(f"No tradelist uploaded for {symbol} {timeframe}m")
+    
+    trade_pairs = _load_trade_pairs(strategy.file_path)
+    if not trade_pairs:
+        raise ValueError(f"No valid trade pairs for {symbol}")
+    progress.trade_count = len(trade_pairs)
+    
+    print(f"🔄 Optimizing {symbol} {timeframe}m: {len(trade_pairs)} trades, {len(candle_data)} candles")
+    
+    if config.optimization_method == "optuna":
+        # Strategy key in the web optimizer's format, so sensitivity surfaces of the strategy seed batch studies
+        study_key = (strategy.symbol, strategy.timeframe,
+                     f"{strategy.symbol}_{strategy.timeframe}_{strategy.strategy_name}_{strategy.version}")
+        best_result = _run_optuna_optimization(progress, trade_pairs, candle_data, config, deadline,
+                                               study_key if config.persist_studies else None)
+    else:
+        best_result = _run_grid_optimization(progress, trade_pairs, candle_data, config, processes, deadline)
+    
+    if not best_result:
+        raise ValueError("Optimization returned no results")
+    best_result['timed_out'] = time.time() > deadline
+    if config.walk_forward and not best_result['timed_out']:
+        best_result['walk_forward'] = _run_walk_forward(trade_pairs, candle_data, config, processes, deadline)
+    
+    return {
+        'best_result': best_result,
+        'source_strategy': f"{strategy.strategy_name} {strategy.version}",
+        'trials_completed': progress.trials_completed,
+    }
+
+
+class _SharedProgress:
+    """Attribute-style progress writes into a Manager dict, read back by the parent process"""
+    
+    def __init__(self, shared):
+        object.__setattr__(self, '_shared', shared)
+    
+    def __setattr__(self, name, value):
+        self._shared[name] = value
+    
+    def __getattr__(self, name):
+        return self._shared.get(name, 0)
+
+
+def _optimize_symbol_in_process(symbol: str, timeframe: str, config: BatchConfig, shared, processes: int) -> Dict:
+    """Worker-process entry point"""
+    shared['started_at'] = time.time()
+    return _optimize_symbol(symbol, timeframe, config, _SharedProgress(shared), processes)
+
+
+def _symbol_worker(conn):
+    """Symbol worker process: optimizes the symbols sent over conn, one at a time, until None"""
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        try:
+            conn.send((True, _optimize_symbol_in_process(*task)))
+        except Exception as e:
+            conn.send((False, str(e)))
+
+
 class MultiSymbolProcessor:
     """
     Production-ready multi-symbol batch processor
@@ -95,7 +523,7 @@ class MultiSymbolProcessor:
     def __init__(self):
         self.data_manager = get_data_manager()
         self.results_manager = get_results_manager()
-        self.tradelist_manager = TradelistManager()
+        self.strategy_manager = get_strategy_manager()
         
         # Active batch tracking
         self.active_batches: Dict[str, BatchResult] = {}
@@ -119,23 +547,23 @@ class MultiSymbolProcessor:
         batch_id = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{len(self.active_batches)}"
         
         # Create batch result tracker
+        tasks = config.tasks()
         batch_result = BatchResult(
             batch_id=batch_id,
             config=config,
             symbol_results=[],
             start_time=datetime.now(),
-            total_symbols=len(config.symbols) * len(config.timeframes)
+            total_symbols=len(tasks)
         )
         
         # Initialize symbol progress tracking
-        for symbol in config.symbols:
-            for timeframe in config.timeframes:
-                progress = SymbolProgress(
-                    symbol=symbol,
-                    timeframe=timeframe,
-                    total_trials=config.n_trials if config.optimization_method == "optuna" else self._calculate_grid_size(config)
-                )
-                batch_result.symbol_results.append(progress)
+        for symbol, timeframe in tasks:
+            progress = SymbolProgress(
+                symbol=symbol,
+                timeframe=timeframe,
+                total_trials=config.n_trials if config.optimization_method == "optuna" else self._calculate_grid_size(config)
+            )
+            batch_result.symbol_results.append(progress)
         
         # Store batch
         with self.batch_lock:
@@ -174,36 +602,22 @@ class MultiSymbolProcessor:
             batch = self.active_batches[batch_id]
             config = batch.config
             
-            print(f"📊 Processing batch {batch_id} with {config.parallel_symbols} parallel workers")
-            
             # Group symbol-timeframe combinations
-            symbol_tasks = []
-            for symbol in config.symbols:
-                for timeframe in config.timeframes:
-                    symbol_tasks.append((symbol, timeframe))
+            symbol_tasks = config.tasks()
+            workers, processes = plan_cpu_budget(config, len(symbol_tasks))
+            clear_input_cache()
             
-            # Process with ThreadPoolExecutor for I/O bound tasks
-            with ThreadPoolExecutor(max_workers=config.parallel_symbols) as executor:
-                # Submit all tasks
-                future_to_task = {}
-                for symbol, timeframe in symbol_tasks:
-                    future = executor.submit(self._process_symbol, batch_id, symbol, timeframe)
-                    future_to_task[future] = (symbol, timeframe)
-                
-                # Collect results as they complete
-                for future in as_completed(future_to_task):
-                    symbol, timeframe = future_to_task[future]
-                    try:
-                        result = future.result(timeout=config.timeout_per_symbol)
-                        print(f"✅ Completed {symbol} {timeframe}m: {result.get('pnl', 0):.2f} PnL")
-                        batch.completed_symbols += 1
-                    except Exception as e:
-                        print(f"❌ Failed {symbol} {timeframe}m: {e}")
-                        batch.failed_symbols += 1
-                        self._mark_symbol_error(batch_id, symbol, timeframe, str(e))
+            print(f"📊 Processing batch {batch_id}: {workers} {config.execution_mode} worker(s) x {processes} grid process(es)")
+            
+            if config.execution_mode == "thread":
+                self._run_in_threads(batch_id, symbol_tasks, workers, processes)
+            else:
+                self._run_in_processes(batch_id, symbol_tasks, workers, processes)
             
             # Finalize batch
-            batch.end_time = datetime.now()
+            batch.completed_symbols = sum(1 for p in batch.symbol_results if p.status == "completed")
+            batch.failed_symbols = sum(1 for p in batch.symbol_results if p.status == "error")
+            batch.end_time = batch.end_time or datetime.now()
             batch.summary_stats = self._generate_batch_summary(batch_id)
             
             # Generate reports if requested
@@ -224,186 +638,180 @@ class MultiSymbolProcessor:
                 if batch_id in self.active_batches:
                     self.active_batches[batch_id].end_time = datetime.now()
     
-    def _process_symbol(self, batch_id: str, symbol: str, timeframe: str) -> Dict:
-        """Process single symbol-timeframe combination"""
+    def _run_in_threads(self, batch_id: str, symbol_tasks: List[Tuple[str, str]], workers: int, processes: int):
+        """Thread mode: symbols share this process; each grid run gets its own slice of the CPU budget"""
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            future_to_task = {
+                executor.submit(self._process_symbol, batch_id, symbol, timeframe, processes): (symbol, timeframe)
+                for symbol, timeframe in symbol_tasks
+            }
+            for future in as_completed(future_to_task):
+                symbol, timeframe = future_to_task[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"❌ Failed {symbol} {timeframe}m: {e}")
+    
+    def _run_in_processes(self, batch_id: str, symbol_tasks: List[Tuple[str, str]], workers: int, processes: int):
+        """
+        Process mode: one long-lived worker process per parallel symbol, reused across
+        symbols so its candle/trade-pair cache stays warm. A worker that overruns
+        timeout_per_symbol by HARD_TIMEOUT_GRACE is killed and replaced on its own; the
+        symbols running in the other workers are not affected.
+        """
+        batch = self.active_batches[batch_id]
+        config = batch.config
+        ctx = multiprocessing.get_context('spawn')
+        manager = ctx.Manager()
+        pending = list(symbol_tasks)
+        slots = []  # {'process', 'conn', 'task': (progress, shared) or None}
+        
+        def start_worker():
+            parent_conn, child_conn = ctx.Pipe()
+            # not daemonic: grid runs open their own process pool inside the worker
+            process = ctx.Process(target=_symbol_worker, args=(child_conn,), daemon=False)
+            process.start()
+            child_conn.close()
+            return {'process': process, 'conn': parent_conn, 'task': None}
+        
+        def kill_worker(slot):
+            slot['process'].terminate()
+            slot['process'].join(timeout=5)
+            slot['conn'].close()
+        
+        try:
+            slots = [start_worker() for _ in range(max(1, min(workers, len(pending))))]
+            while True:
+                if batch.end_time is not None:  # cancel_batch()
+                    break
+                for slot in slots:
+                    while slot['task'] is None and pending:
+                        symbol, timeframe = pending.pop(0)
+                        progress = self._get_symbol_progress(batch_id, symbol, timeframe)
+                        if progress is None or progress.status == "cancelled":
+                            continue
+                        shared = manager.dict()
+                        slot['conn'].send((symbol, timeframe, config, shared, processes))
+                        slot['task'] = (progress, shared)
+                busy = [slot for slot in slots if slot['task'] is not None]
+                if not busy:
+                    break
+                
+                ready = wait_connections([slot['conn'] for slot in busy], timeout=1.0)
+                for index, slot in enumerate(slots):
+                    if slot['task'] is None:
+                        continue
+                    progress, shared = slot['task']
+                    self._sync_progress(progress, shared)
+                    if slot['conn'] in ready:
+                        slot['task'] = None
+                        try:
+                            ok, outcome = slot['conn'].recv()
+                        except (EOFError, OSError):
+                            ok, outcome = False, "Worker process exited unexpectedly"
+                            kill_worker(slot)
+                            slots[index] = start_worker()
+                        if ok:
+                            try:
+                                self._finish_symbol(batch_id, progress, outcome)
+                            except Exception as e:
+                                ok, outcome = False, str(e)
+                        if not ok:
+                            print(f"❌ Failed {progress.symbol} {progress.timeframe}m: {outcome}")
+                            self._mark_symbol_error(batch_id, progress.symbol, progress.timeframe, outcome)
+                        continue
+                    started = shared.get('started_at')
+                    if started and time.time() - started > config.timeout_per_symbol + HARD_TIMEOUT_GRACE:
+                        kill_worker(slot)
+                        slots[index] = start_worker()
+                        self._mark_symbol_error(batch_id, progress.symbol, progress.timeframe,
+                                                f"Timed out after {config.timeout_per_symbol}s")
+        finally:
+            for slot in slots:
+                if slot['task'] is not None or not slot['process'].is_alive():
+                    kill_worker(slot)
+                    continue
+                try:
+                    slot['conn'].send(None)
+                except OSError:
+                    pass
+                slot['process'].join(timeout=5)
+                if slot['process'].is_alive():
+                    slot['process'].terminate()
+                slot['conn'].close()
+            manager.shutdown()
+    
+    @staticmethod
+    def _sync_progress(progress: SymbolProgress, shared):
+        """Copy a worker's shared progress into the parent's SymbolProgress"""
+        try:
+            snapshot = dict(shared)
+        except Exception:
+            return
+        for key in ('trials_completed', 'total_trials', 'progress', 'trade_count'):
+            if key in snapshot:
+                setattr(progress, key, snapshot[key])
+        if snapshot.get('started_at') and progress.status == "pending":
+            progress.status = "running"
+            progress.start_time = datetime.fromtimestamp(snapshot['started_at'])
+    
+    def _process_symbol(self, batch_id: str, symbol: str, timeframe: str, processes: int = 1) -> Optional[Dict]:
+        """Process single symbol-timeframe combination in this process"""
         
         progress = self._get_symbol_progress(batch_id, symbol, timeframe)
         if not progress:
             raise ValueError(f"Progress tracker not found for {symbol} {timeframe}")
+        if progress.status == "cancelled":
+            return None
         
         try:
             # Mark as running
             progress.status = "running"
             progress.start_time = datetime.now()
-            
-            # Load candle data
-            candle_data = self.data_manager.load_candle_data(symbol, timeframe)
-            if candle_data is None or candle_data.empty:
-                raise ValueError(f"No candle data for {symbol} {timeframe}m")
-            
-            # Load tradelist data
-            tradelist_files = self.data_manager._discover_tradelist_files(symbol)
-            if not tradelist_files:
-                raise ValueError(f"No tradelist files for {symbol}")
-            
-            trade_data = self.tradelist_manager.load_tradelist(tradelist_files[0])
-            if trade_data is None or trade_data.empty:
-                raise ValueError(f"No trade data for {symbol}")
-            
-            # Get trade pairs
-            trade_pairs, trade_log = self.tradelist_manager.get_trade_pairs(trade_data)
-            if not trade_pairs:
-                raise ValueError(f"No valid trade pairs for {symbol}")
-            
-            print(f"🔄 Optimizing {symbol} {timeframe}m: {len(trade_pairs)} trades, {len(candle_data)} candles")
-            
-            # Run optimization
-            batch = self.active_batches[batch_id]
-            config = batch.config
-            
-            if config.optimization_method == "optuna":
-                best_result = self._run_optuna_optimization(
-                    progress, trade_pairs, candle_data, config
-                )
-            else:
-                best_result = self._run_grid_optimization(
-                    progress, trade_pairs, candle_data, config
-                )
-            
-            if not best_result:
-                raise ValueError("Optimization returned no results")
-            
-            # Store results
-            if config.save_results:
-                result_id = self.results_manager.store_result(
-                    symbol=symbol,
-                    timeframe=str(timeframe),
-                    strategy="SL_BE_TS_V3_BATCH",
-                    parameters=best_result.get('params', {}),
-                    metrics=best_result,
-                    metadata={
-                        'batch_id': batch_id,
-                        'optimization_method': config.optimization_method,
-                        'trials': progress.trials_completed,
-                        'processing_time': (datetime.now() - progress.start_time).total_seconds()
-                    },
-                    user_id=config.user_id,
-                    project_name=config.project_name
-                )
-                best_result['result_id'] = result_id
-            
-            # Update progress
-            progress.status = "completed"
-            progress.end_time = datetime.now()
-            progress.best_result = best_result
-            progress.progress = 100.0
-            
-            return best_result
-            
+            outcome = _optimize_symbol(symbol, timeframe, self.active_batches[batch_id].config, progress, processes)
+            return self._finish_symbol(batch_id, progress, outcome)
         except Exception as e:
-            progress.status = "error"
-            progress.end_time = datetime.now()
-            progress.error_message = str(e)
-            progress.progress = 0.0
+            self._mark_symbol_error(batch_id, symbol, timeframe, str(e))
             raise e
     
-    def _run_optuna_optimization(self, progress: SymbolProgress, trade_pairs: List, 
-                                candle_data: pd.DataFrame, config: BatchConfig) -> Dict:
-        """Run Optuna optimization with progress tracking"""
-        
-        if not ADVANCED_MODE:
-            raise ValueError("Advanced optimization not available")
-        
-        def objective(trial):
-            # Update progress
-            progress.trials_completed = len(trial.study.trials)
-            progress.progress = (progress.trials_completed / config.n_trials) * 100
-            
-            # Sample parameters
-            sl = trial.suggest_float('sl', config.sl_range[0], config.sl_range[1])
-            be = trial.suggest_float('be', config.be_range[0], config.be_range[1])
-            ts_trig = trial.suggest_float('ts_trig', config.ts_trig_range[0], config.ts_trig_range[1])
-            ts_step = trial.suggest_float('ts_step', config.ts_step_range[0], config.ts_step_range[1])
-            
-            # Run simulation
-            performance, log = simulate_trade(
-                trade_pairs, candle_data, sl, be, ts_trig, ts_step, "pnl"
-            )
-            
-            if performance is None:
-                return -10000  # Heavy penalty for failed simulation
-            
-            return performance.get('pnl', -10000)
-        
-        # Create study with progress callback
-        study = optuna.create_study(direction='maximize')
+    def _finish_symbol(self, batch_id: str, progress: SymbolProgress, outcome: Dict) -> Dict:
+        """Store a symbol's best result (parent process) and mark it completed"""
+        config = self.active_batches[batch_id].config
+        best_result = outcome['best_result']
+        progress.trials_completed = outcome.get('trials_completed', progress.trials_completed)
         
-        # Optimize with timeout
-        try:
-            study.optimize(
-                objective, 
-                n_trials=config.n_trials,
-                timeout=config.timeout_per_symbol - 30  # Leave 30s buffer
+        # Store results (trade details go to result_details, not the metrics blob)
+        details = best_result.pop('details', [])
+        if config.save_results:
+            result_id = self.results_manager.store_result(
+                symbol=progress.symbol,
+                timeframe=str(progress.timeframe),
+                strategy="SL_BE_TS_V3_BATCH",
+                parameters=best_result.get('params', {}),
+                metrics=best_result,
+                details=details,
+                metadata={
+                    'batch_id': batch_id,
+                    'source_strategy': outcome.get('source_strategy'),
+                    'optimization_method': config.optimization_method,
+                    'execution_mode': config.execution_mode,
+                    'opt_type': config.opt_type,
+                    'trials': progress.trials_completed,
+                    'processing_time': progress.elapsed_seconds
+                },
+                user_id=config.user_id,
+                project_name=config.project_name
             )
-        except Exception as e:
-            print(f"⚠️ Optuna optimization interrupted: {e}")
-        
-        # Get best result
-        if not study.trials:
-            return None
-        
-        best_trial = study.best_trial
-        best_params = best_trial.params
-        
-        # Run final simulation with best parameters
-        final_performance, final_log = simulate_trade(
-            trade_pairs, candle_data,
-            best_params['sl'], best_params['be'],
-            best_params['ts_trig'], best_params['ts_step'],
-            "pnl"
-        )
-        
-        if final_performance:
-            final_performance['params'] = best_params
-            final_performance['optuna_trials'] = len(study.trials)
-            final_performance['best_value'] = best_trial.value
-            return final_performance
-        
-        return None
-    
-    def _run_grid_optimization(self, progress: SymbolProgress, trade_pairs: List,
-                              candle_data: pd.DataFrame, config: BatchConfig) -> Dict:
-        """Run grid search optimization with progress tracking"""
-        
-        if not ADVANCED_MODE:
-            raise ValueError("Advanced optimization not available")
-        
-        # Generate parameter lists
-        sl_list = list(np.arange(config.sl_range[0], config.sl_range[1] + config.sl_range[2], config.sl_range[2]))
-        be_list = list(np.arange(config.be_range[0], config.be_range[1] + config.be_range[2], config.be_range[2]))
-        ts_trig_list = list(np.arange(config.ts_trig_range[0], config.ts_trig_range[1] + config.ts_trig_range[2], config.ts_trig_range[2]))
-        ts_step_list = list(np.arange(config.ts_step_range[0], config.ts_step_range[1] + config.ts_step_range[2], config.ts_step_range[2]))
-        
-        total_combinations = len(sl_list) * len(be_list) * len(ts_trig_list) * len(ts_step_list)
-        progress.total_trials = total_combinations
-        
-        print(f"🔢 Grid search: {total_combinations} combinations")
-        
-        # Run grid search
-        results = grid_search_parallel(
-            trade_pairs, candle_data, sl_list, be_list, ts_trig_list, ts_step_list, "pnl"
-        )
+            best_result['result_id'] = result_id
+            progress.result_id = result_id
         
         # Update progress
-        progress.trials_completed = total_combinations
+        progress.status = "completed"
+        progress.end_time = datetime.now()
+        progress.best_result = best_result
         progress.progress = 100.0
-        
-        if not results:
-            return None
-        
-        # Find best result
-        best_result = max(results, key=lambda x: x.get('pnl', -10000))
-        best_result['grid_combinations'] = total_combinations
+        print(f"✅ Completed {progress.symbol} {progress.timeframe}m: {best_result.get('pnl', 0):.2f} PnL"
+              + (" (timed out, best so far)" if best_result.get('timed_out') else ""))
         
         return best_result
     
@@ -544,6 +952,30 @@ class MultiSymbolProcessor:
         except Exception as e:
             print(f"⚠️ Failed to generate batch report: {e}")
     
+    def get_batch_results(self, batch_id: str, include_details: bool = False) -> Optional[List[Dict]]:
+        """Per symbol/timeframe results of a batch, read back from ResultsManager"""
+        batch = self.get_batch_status(batch_id)
+        if not batch:
+            return None
+        
+        stored = {r.id: r for r in self.results_manager.get_results(
+            [p.result_id for p in batch.symbol_results if p.result_id], include_details=include_details)}
+        rows = []
+        for progress in batch.symbol_results:
+            row = progress.to_dict()
+            result = stored.get(progress.result_id)
+            if result is not None:
+                row['best_params'] = result.parameters
+                row['performance'] = {k: v for k, v in result.metrics.items() if k != 'params'}
+                row['created_at'] = result.created_at.isoformat()
+                if include_details:
+                    row['details'] = result.details
+            elif progress.best_result:
+                row['best_params'] = progress.best_result.get('params', {})
+                row['performance'] = {k: v for k, v in progress.best_result.items() if k != 'params'}
+            rows.append(row)
+        return rows
+    
     def get_all_batches(self) -> List[BatchResult]:
         """Get list of all batches"""
         with self.batch_lock:
@@ -592,7 +1024,9 @@ def start_batch_optimization(symbols: List[str], timeframes: List[str],
                            ts_step_range: Tuple[float, float, float] = (0.1, 1.0, 0.1),
                            optimization_method: str = "optuna",
                            n_trials: int = 500,
-                           parallel_symbols: int = 2) -> str:
+                           parallel_symbols: int = 2,
+                           execution_mode: str = "process",
+                           cpu_budget: Optional[int] = None) -> str:
     """
     Start batch optimization with simplified interface
     
@@ -609,7 +1043,9 @@ def start_batch_optimization(symbols: List[str], timeframes: List[str],
         ts_step_range=ts_step_range,
         optimization_method=optimization_method,
         n_trials=n_trials,
-        parallel_symbols=parallel_symbols
+        parallel_symbols=parallel_symbols,
+        execution_mode=execution_mode,
+        cpu_budget=cpu_budget
     )
     
     processor = get_multi_symbol_processor()
@@ -632,6 +1068,16 @@ def get_batch_progress(batch_id: str) -> Optional[Dict]:
     for progress in batch.symbol_results:
         status_counts[progress.status] = status_counts.get(progress.status, 0) + 1
     
+    # Throughput and ETA from the symbols processed so far
+    elapsed = ((batch.end_time or datetime.now()) - batch.start_time).total_seconds()
+    trials_done = sum(p.trials_completed for p in batch.symbol_results)
+    trials_total = sum(p.total_trials for p in batch.symbol_results)
+    finished = [p for p in batch.symbol_results if p.status in ('completed', 'error', 'cancelled')]
+    eta_seconds = None
+    if batch.end_time is None and 0 < avg_progress < 100:
+        eta_seconds = elapsed / (avg_progress / 100) - elapsed
+    current = [f"{p.symbol}_{p.timeframe}" for p in batch.symbol_results if p.status == 'running']
+    
     return {
         'batch_id': batch_id,
         'overall_progress': avg_progress,
@@ -640,7 +1086,16 @@ def get_batch_progress(batch_id: str) -> Optional[Dict]:
         'running': status_counts.get('running', 0),
         'pending': status_counts.get('pending', 0),
         'errors': status_counts.get('error', 0),
+        'cancelled': status_counts.get('cancelled', 0),
         'status_counts': status_counts,
+        'current_symbols': current,
+        'elapsed_seconds': round(elapsed, 2),
+        'estimated_remaining': round(eta_seconds, 1) if eta_seconds is not None else None,
+        'trials_completed': trials_done,
+        'total_trials': trials_total,
+        'trials_per_second': round(trials_done / elapsed, 3) if elapsed > 0 else 0.0,
+        'symbols_per_hour': round(len(finished) / elapsed * 3600, 2) if elapsed > 0 else 0.0,
+        'symbols': [p.to_dict() for p in batch.symbol_results],
         'start_time': batch.start_time.isoformat(),
         'end_time': batch.end_time.isoformat() if batch.end_time else None,
         'is_completed': batch.end_time is not None,
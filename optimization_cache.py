@@ -0,0 +1,344 @@
+"""
+Optimization Result Cache
+Ghi nhớ kết quả tối ưu để không phải chạy lại những gì đã tính.
+
+Two levels, both in one SQLite file (OPTIMIZATION_CACHE_DB, default optimization_cache.db):
+
+- run cache:   the finished /optimize_ranges response, keyed by a hash of everything
+               that determines it (tradelist, candle range, engine, criteria, parameter
+               lists/ranges, engine version). A repeated request returns it instantly.
+- combo cache: per-trade simulation results of one (sl, be, ts_trig, ts_step) cell for
+               one (tradelist, candle range) pair. Overlapping grids, e.g. extending SL
+               max from 3% to 4%, only simulate the new cells.
+- profiles:    the per-trade excursion profile (excursion_profile.py) of one
+               (tradelist, candle range) pair, built once from the candles.
+- surfaces:    the parameter sensitivity surface (sensitivity.py) of one grid run,
+               keyed like the run cache, for the heatmap API.
+
+Keys include engine_version(), which changes whenever the simulator source changes,
+so stale results are never served after the trading logic is edited.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from results_manager import encode_details, decode_details
+
+CACHE_DB_PATH = os.environ.get('OPTIMIZATION_CACHE_DB', 'optimization_cache.db')
+# Bump when result semantics change outside the simulator module (e.g. metric formulas)
+ENGINE_VERSION = 'slbe-ts-v3.1'
+SIMULATOR_MODULE = 'backtest_gridsearch_slbe_ts_Version3.py'
+# Digits kept when a float parameter becomes part of a key (0.1 * 3 -> 0.3)
+KEY_DIGITS = 6
+# Combo rows written per transaction
+WRITE_BATCH = 200
+
+_engine_version = None
+
+
+def engine_version() -> str:
+    """ENGINE_VERSION plus a short hash of the simulator source"""
+    global _engine_version
+    if _engine_version is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), SIMULATOR_MODULE)
+        try:
+            with open(path, 'rb') as f:
+                source_hash = hashlib.sha256(f.read()).hexdigest()[:12]
+        except OSError:
+            source_hash = 'unknown'
+        _engine_version = f"{ENGINE_VERSION}+{source_hash}"
+    return _engine_version
+
+
+def _json_default(obj):
+    if hasattr(obj, 'item'):
+        return obj.item()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    return str(obj)
+
+
+def _digest(payload: Any) -> str:
+    raw = json.dumps(payload, sort_keys=True, default=_json_default, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def trade_pairs_hash(pairs: List[Dict]) -> str:
+    """Content hash of the trade pairs as the simulator sees them"""
+    return _digest(pairs)
+
+
+def candles_hash(df_candle: pd.DataFrame, pairs: Optional[List[Dict]] = None) -> str:
+    """Content hash of the candles, limited to the span the trades cover when pairs are given
+
+    Appending newer candles to the DB therefore doesn't invalidate results for a
+    tradelist that ends earlier.
+    """
+    df = df_candle
+    if pairs and 'time' in df.columns:
+        try:
+            entries = pd.to_datetime([p.get('entryDt') for p in pairs], errors='coerce')
+            exits = pd.to_datetime([p.get('exitDt') for p in pairs], errors='coerce')
+            if entries.notna().any() and exits.notna().any():
+                times = pd.to_datetime(df['time'], errors='coerce')
+                df = df[(times >= entries.min()) & (times <= exits.max())]
+        except (TypeError, ValueError):
+            df = df_candle  # e.g. tz-aware vs naive times: hash everything
+    columns = [c for c in ('time', 'open', 'high', 'low', 'close') if c in df.columns]
+    hashed = pd.util.hash_pandas_object(df[columns], index=False).values
+    return hashlib.sha256(hashed.tobytes()).hexdigest()
+
+
+def data_key(pairs: List[Dict], df_candle: pd.DataFrame) -> str:
+    """Key of the simulation inputs shared by every combination of one run"""
+    return _digest({
+        'trades': trade_pairs_hash(pairs),
+        'candles': candles_hash(df_candle, pairs),
+        'engine_version': engine_version(),
+    })
+
+
+def run_key(pairs: List[Dict], df_candle: pd.DataFrame, **config) -> str:
+    """Key of a whole optimization run: data_key plus engine/criteria/ranges in config"""
+    return _digest({'data': data_key(pairs, df_candle), 'config': config})
+
+
+def combo_key(sl, be, ts_trig, ts_step) -> Tuple[float, float, float, float]:
+    return tuple(round(float(v), KEY_DIGITS) for v in (sl, be, ts_trig, ts_step))
+
+
+def _restore_timestamps(details: List[Dict]) -> List[Dict]:
+    """encode_details stores timestamps as ISO strings; give the *Dt fields back as Timestamps"""
+    for trade in details:
+        for name, value in trade.items():
+            if name.endswith('Dt') and isinstance(value, str):
+                trade[name] = pd.Timestamp(value)
+    return details
+
+
+class OptimizationCache:
+    """SQLite-backed run + per-combination result cache (safe across processes)"""
+
+    def __init__(self, db_path: str = CACHE_DB_PATH):
+        self.db_path = db_path
+        self._init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _init_database(self):
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS run_cache (
+                    key TEXT PRIMARY KEY,
+                    created_at TIMESTAMP NOT NULL,
+                    last_hit_at TIMESTAMP,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    meta_json TEXT,
+                    response BLOB NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS combo_cache (
+                    data_key TEXT NOT NULL,
+                    sl REAL NOT NULL,
+                    be REAL NOT NULL,
+                    ts_trig REAL NOT NULL,
+                    ts_step REAL NOT NULL,
+                    created_at TIMESTAMP NOT NULL,
+                    details BLOB NOT NULL,
+                    PRIMARY KEY (data_key, sl, be, ts_trig, ts_step)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS excursion_profiles (
+                    data_key TEXT PRIMARY KEY,
+                    created_at TIMESTAMP NOT NULL,
+                    data BLOB NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS grid_surfaces (
+                    key TEXT PRIMARY KEY,
+                    created_at TIMESTAMP NOT NULL,
+                    meta_json TEXT,
+                    data BLOB NOT NULL
+                )
+            """)
+
+    # ---- whole-run cache -------------------------------------------------
+
+    def get_run(self, key: str) -> Optional[Dict]:
+        """Cached response for key (with a 'cache' info block) or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT response, created_at, hits FROM run_cache WHERE key = ?", [key]).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE run_cache SET hits = hits + 1, last_hit_at = ? WHERE key = ?", [datetime.now(), key])
+        response = json.loads(zlib.decompress(row[0]))
+        response['cache'] = {'hit': True, 'key': key, 'cached_at': str(row[1]), 'hits': row[2] + 1}
+        return response
+
+    def put_run(self, key: str, response: Dict, meta: Optional[Dict] = None):
+        blob = zlib.compress(json.dumps(response, default=_json_default).encode('utf-8'))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO run_cache (key, created_at, hits, meta_json, response) VALUES (?, ?, 0, ?, ?)",
+                [key, datetime.now(), json.dumps(meta or {}, default=_json_default), blob]
+            )
+
+    # ---- per-combination cache -------------------------------------------
+
+    def get_combos(self, data_key: str, combos: Iterable[Tuple]) -> Dict[Tuple, List[Dict]]:
+        """{combo_key: details} for the requested combos that are cached"""
+        wanted = {combo_key(*c) for c in combos}
+        if not wanted:
+            return {}
+        found = {}
+        with self._connect() as conn:
+            # Primary-key lookups: adaptive engines ask for a few cells of a large cached grid
+            for key in wanted:
+                row = conn.execute(
+                    "SELECT details FROM combo_cache WHERE data_key = ? AND sl = ? AND be = ? AND ts_trig = ? AND ts_step = ?",
+                    [data_key, *key]
+                ).fetchone()
+                if row is not None:
+                    found[key] = _restore_timestamps(decode_details(row[0]))
+        return found
+
+    def put_combos(self, data_key: str, combos: Dict[Tuple, List[Dict]]):
+        """Store {(sl, be, ts_trig, ts_step): details}, WRITE_BATCH rows per transaction"""
+        now = datetime.now()
+        rows = [(data_key, *combo_key(*c), now, encode_details(details)) for c, details in combos.items()]
+        with self._connect() as conn:
+            for start in range(0, len(rows), WRITE_BATCH):
+                conn.executemany(
+                    "INSERT OR REPLACE INTO combo_cache (data_key, sl, be, ts_trig, ts_step, created_at, details) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows[start:start + WRITE_BATCH]
+                )
+                conn.commit()
+
+    # ---- per-trade excursion profiles ----------------------------------
+
+    def get_profile(self, data_key: str) -> Optional[bytes]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM excursion_profiles WHERE data_key = ?", [data_key]).fetchone()
+        return row[0] if row else None
+
+    def put_profile(self, data_key: str, blob: bytes):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO excursion_profiles (data_key, created_at, data) VALUES (?, ?, ?)",
+                [data_key, datetime.now(), blob]
+            )
+
+    # ---- parameter sensitivity surfaces ---------------------------------
+
+    def get_surface(self, key: str) -> Optional[bytes]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM grid_surfaces WHERE key = ?", [key]).fetchone()
+        return row[0] if row else None
+
+    def put_surface(self, key: str, blob: bytes, meta: Optional[Dict] = None):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO grid_surfaces (key, created_at, meta_json, data) VALUES (?, ?, ?, ?)",
+                [key, datetime.now(), json.dumps(meta or {}, default=_json_default), blob]
+            )
+
+    def list_surfaces(self, limit: int = 50) -> List[Dict]:
+        """Most recent surfaces: key, created_at, size and the meta stored with them"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT key, created_at, meta_json, LENGTH(data) FROM grid_surfaces ORDER BY created_at DESC LIMIT ?",
+                [int(limit)]
+            ).fetchall()
+        return [{'key': key, 'created_at': str(created), 'size_bytes': size, 'meta': json.loads(meta or '{}')}
+                for key, created, meta, size in rows]
+
+    # ---- maintenance -----------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            runs, run_hits = conn.execute("SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM run_cache").fetchone()
+            combos, datasets = conn.execute("SELECT COUNT(*), COUNT(DISTINCT data_key) FROM combo_cache").fetchone()
+            profiles = conn.execute("SELECT COUNT(*) FROM excursion_profiles").fetchone()[0]
+            surfaces = conn.execute("SELECT COUNT(*) FROM grid_surfaces").fetchone()[0]
+        return {
+            'db_path': self.db_path,
+            'engine_version': engine_version(),
+            'runs': runs,
+            'run_hits': run_hits,
+            'combos': combos,
+            'datasets': datasets,
+            'profiles': profiles,
+            'surfaces': surfaces,
+            'size_bytes': os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0,
+        }
+
+    def clear(self, older_than_days: Optional[float] = None) -> Dict[str, int]:
+        """Delete cached entries (all, or those created more than older_than_days ago)"""
+        where, params = "", []
+        if older_than_days is not None:
+            where = "WHERE created_at < datetime('now', 'localtime', ?)"
+            params = [f"-{float(older_than_days)} days"]
+        with self._connect() as conn:
+            runs = conn.execute(f"DELETE FROM run_cache {where}", params).rowcount
+            combos = conn.execute(f"DELETE FROM combo_cache {where}", params).rowcount
+            profiles = conn.execute(f"DELETE FROM excursion_profiles {where}", params).rowcount
+            surfaces = conn.execute(f"DELETE FROM grid_surfaces {where}", params).rowcount
+        return {'runs': runs, 'combos': combos, 'profiles': profiles, 'surfaces': surfaces}
+
+
+class ComboCacheSession:
+    """Combo cache view for one run: look cells up, collect new ones, write them once at the end"""
+
+    def __init__(self, pairs: List[Dict], df_candle: pd.DataFrame, cache: Optional[OptimizationCache] = None):
+        self.cache = cache or get_optimization_cache()
+        self.data_key = data_key(pairs, df_candle)
+        self.found: Dict[Tuple, List[Dict]] = {}
+        self.new: Dict[Tuple, List[Dict]] = {}
+
+    def preload(self, combos: Iterable[Tuple]) -> int:
+        """Fetch the cached cells among combos, return how many were found"""
+        hits = self.cache.get_combos(self.data_key, combos)
+        self.found.update(hits)
+        return len(hits)
+
+    def get(self, sl, be, ts_trig, ts_step) -> Optional[List[Dict]]:
+        return self.found.get(combo_key(sl, be, ts_trig, ts_step))
+
+    def add(self, sl, be, ts_trig, ts_step, details: List[Dict]):
+        self.new[(sl, be, ts_trig, ts_step)] = details
+
+    def flush(self):
+        if self.new:
+            self.cache.put_combos(self.data_key, self.new)
+            self.new = {}
+
+
+# Global instance, created on first use
+_optimization_cache = None
+_optimization_cache_lock = threading.Lock()
+
+
+def get_optimization_cache() -> OptimizationCache:
+    """Get global optimization cache instance"""
+    global _optimization_cache
+    if _optimization_cache is None:
+        with _optimization_cache_lock:
+            if _optimization_cache is None:
+                _optimization_cache = OptimizationCache()
+    return _optimization_cache
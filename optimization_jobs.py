@@ -0,0 +1,376 @@
+"""
+Optimization Job Queue
+Chạy /optimize và /optimize_ranges ở chế độ nền: submit trả về job_id ngay,
+công việc chạy trong process pool giới hạn, mỗi job có progress/ETA riêng.
+
+The worker replays the original request against the same Flask view inside a
+child process, so the sync and async code paths produce identical results.
+Progress is written into a per-job dict shared through a multiprocessing
+Manager, which replaces web_app.optimization_status inside the worker.
+
+Limits are configurable via env vars or get_job_queue() kwargs:
+    OPTIMIZATION_MAX_WORKERS  concurrent optimization processes (default cpu_count // 2)
+    OPTIMIZATION_MAX_QUEUE    jobs allowed to wait behind the running ones (default 16)
+"""
+
+import io
+import json
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_MAX_WORKERS = int(os.environ.get('OPTIMIZATION_MAX_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+DEFAULT_MAX_QUEUE = int(os.environ.get('OPTIMIZATION_MAX_QUEUE', 16))
+# Finished jobs kept in memory for result retrieval
+MAX_FINISHED_JOBS = int(os.environ.get('OPTIMIZATION_MAX_FINISHED_JOBS', 200))
+
+# Request flag that asks a route to enqueue instead of running inline
+ASYNC_FLAG = 'async'
+
+# SSE: seconds between pushes (server-side throttle) and between keep-alive comments
+SSE_MIN_INTERVAL = 0.5
+SSE_HEARTBEAT = 15.0
+# Fields that change on every tick; ignored (at any nesting level, e.g. per-symbol batch
+# entries) when deciding whether anything new happened
+_VOLATILE_KEYS = ('elapsed_seconds', 'eta_seconds', 'estimated_completion', 'estimated_remaining',
+                  'combos_per_sec', 'trades_per_sec', 'trials_per_second', 'symbols_per_hour')
+
+
+class QueueFullError(RuntimeError):
+    """Raised when running + waiting jobs already reach the configured limits"""
+
+
+def _is_truthy(value) -> bool:
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def wants_async(req) -> bool:
+    """True when the caller asked for a background job (?async=1, form field or JSON key)"""
+    if _is_truthy(req.args.get(ASYNC_FLAG, '')) or _is_truthy(req.form.get(ASYNC_FLAG, '')):
+        return True
+    if req.is_json:
+        data = req.get_json(silent=True)
+        return isinstance(data, dict) and _is_truthy(data.get(ASYNC_FLAG, ''))
+    return False
+
+
+@dataclass
+class RequestSnapshot:
+    """Picklable copy of a Flask request (minus the async flag) for replay in a worker"""
+    path: str
+    form: Dict[str, str] = field(default_factory=dict)
+    files: Dict[str, Tuple[str, bytes]] = field(default_factory=dict)
+    json: Any = None
+
+    @classmethod
+    def from_request(cls, req) -> 'RequestSnapshot':
+        form = {k: v for k, v in req.form.items() if k != ASYNC_FLAG}
+        files = {k: (f.filename, f.read()) for k, f in req.files.items()}
+        data = req.get_json(silent=True) if req.is_json else None
+        if isinstance(data, dict):
+            data = {k: v for k, v in data.items() if k != ASYNC_FLAG}
+        return cls(path=req.path, form=form, files=files, json=data)
+
+    def request_kwargs(self) -> Dict[str, Any]:
+        if self.json is not None:
+            return {'json': self.json}
+        data = dict(self.form)
+        for key, (filename, content) in self.files.items():
+            data[key] = (io.BytesIO(content), filename)
+        kwargs = {'data': data}
+        if self.files:
+            kwargs['content_type'] = 'multipart/form-data'
+        return kwargs
+
+
+def new_progress_record() -> Dict[str, Any]:
+    """Same keys as web_app.optimization_status so the grid/optuna code can write into it"""
+    return {
+        'running': False,
+        'start_time': None,
+        'total_combinations': 0,
+        'current_progress': 0,
+        'estimated_completion': None,
+        'status_message': 'Queued',
+        'trades_per_combination': 0,
+        'best_so_far': None,
+    }
+
+
+def compute_eta(progress: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Progress percent, elapsed and ETA derived from a progress record"""
+    now = now or datetime.now()
+    start = progress.get('start_time')
+    elapsed = (now - start).total_seconds() if start else 0.0
+    current = progress.get('current_progress') or 0
+    total = progress.get('total_combinations') or 0
+    percent = round(current / total * 100, 2) if total > 0 else 0
+    eta_seconds = None
+    eta = None
+    if current > 0 and total > 0 and elapsed > 0:
+        eta_seconds = max(0.0, elapsed / (current / total) - elapsed)
+        eta = datetime.fromtimestamp(now.timestamp() + eta_seconds).strftime('%H:%M:%S')
+    combos_per_sec = current / elapsed if elapsed > 0 else 0.0
+    return {
+        'progress_percent': percent,
+        'current_combination': current,
+        'total_combinations': total,
+        'elapsed_seconds': round(elapsed, 2),
+        'eta_seconds': round(eta_seconds, 2) if eta_seconds is not None else None,
+        'estimated_completion': eta,
+        'combos_per_sec': round(combos_per_sec, 3),
+        'trades_per_sec': round(combos_per_sec * (progress.get('trades_per_combination') or 0), 1),
+    }
+
+
+def sse_event(data, event: Optional[str] = None) -> str:
+    """Format one Server-Sent Events frame"""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data, default=str)}\n\n"
+
+
+def _without_volatile(value):
+    """value with the _VOLATILE_KEYS of every nested dict removed"""
+    if isinstance(value, dict):
+        return {k: _without_volatile(v) for k, v in value.items() if k not in _VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_without_volatile(v) for v in value]
+    return value
+
+
+def progress_stream(snapshot_fn, min_interval: float = SSE_MIN_INTERVAL, heartbeat: float = SSE_HEARTBEAT):
+    """
+    Generator of SSE frames for a progress source.
+
+    snapshot_fn() returns the current payload (None = unknown job); a truthy 'done' key ends
+    the stream with a final 'done' event. The source is sampled once per min_interval and an
+    event is only sent when something other than the clock-derived fields changed, so a slow
+    run costs one keep-alive comment per `heartbeat` seconds.
+    """
+    last_signature = None
+    last_sent = time.monotonic()
+    while True:
+        snapshot = snapshot_fn()
+        if snapshot is None:
+            yield sse_event({'error': 'not found'}, 'error')
+            return
+        done = bool(snapshot.get('done'))
+        signature = json.dumps(_without_volatile(snapshot), sort_keys=True, default=str)
+        now = time.monotonic()
+        if signature != last_signature or done:
+            yield sse_event(snapshot, 'done' if done else 'progress')
+            last_signature, last_sent = signature, now
+        elif now - last_sent >= heartbeat:
+            yield ": keep-alive\n\n"
+            last_sent = now
+        if done:
+            return
+        time.sleep(min_interval)
+
+
+def _run_request_job(endpoint: str, snapshot: RequestSnapshot, progress) -> Tuple[int, Any]:
+    """Worker entry point: replay the request against web_app's view in this process"""
+    import web_app
+
+    progress.update({'running': True, 'start_time': datetime.now(), 'status_message': 'Running'})
+    # grid/optuna helpers write to the module-global status dict; point it at this job's record
+    web_app.optimization_status = progress
+    app = web_app.app
+    try:
+        with app.test_request_context(snapshot.path, method='POST', **snapshot.request_kwargs()):
+            app.preprocess_request()
+            response = app.make_response(app.view_functions[endpoint]())
+        body = response.get_json(silent=True)
+        if body is None:
+            body = response.get_data(as_text=True)
+        return response.status_code, body
+    finally:
+        progress['running'] = False
+
+
+@dataclass
+class OptimizationJob:
+    job_id: str
+    kind: str
+    submitted_at: datetime
+    progress: Any
+    future: Any = None
+    status: str = 'queued'
+    finished_at: Optional[datetime] = None
+    http_status: Optional[int] = None
+    result: Any = None
+    error: Optional[str] = None
+
+    def refresh_status(self):
+        if self.status == 'queued' and self.progress.get('start_time'):
+            self.status = 'running'
+
+    def to_dict(self) -> Dict[str, Any]:
+        self.refresh_status()
+        progress = dict(self.progress)
+        info = {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'status': self.status,
+            'submitted_at': self.submitted_at.isoformat(),
+            'started_at': progress['start_time'].isoformat() if progress.get('start_time') else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'status_message': progress.get('status_message'),
+            'best_so_far': progress.get('best_so_far'),
+            'error': self.error,
+        }
+        info.update(compute_eta(progress, self.finished_at))
+        return info
+
+
+class OptimizationJobQueue:
+    """
+    Bounded process-pool job runner for optimization requests.
+
+    At most `max_workers` jobs run at once and at most `max_queue` more may wait;
+    submit() raises QueueFullError beyond that.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, max_queue: int = DEFAULT_MAX_QUEUE):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self._jobs: Dict[str, OptimizationJob] = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._manager = None
+
+    def _ensure_pool(self):
+        # spawn: the server process is multi-threaded, forking it is unsafe
+        if self._executor is None:
+            ctx = multiprocessing.get_context('spawn')
+            self._manager = ctx.Manager()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx)
+
+    def _drop_pool(self, executor):
+        # A worker died (OOM, segfault): the pool is broken for good, the next submit starts a new one
+        if self._executor is executor:
+            self._executor = None
+
+    def active_count(self) -> int:
+        return sum(1 for j in self._jobs.values() if j.status in ('queued', 'running'))
+
+    def submit(self, kind: str, endpoint: str, snapshot: RequestSnapshot) -> str:
+        with self._lock:
+            if self.active_count() >= self.max_workers + self.max_queue:
+                raise QueueFullError(
+                    f"Optimization queue is full ({self.max_workers} running, {self.max_queue} waiting)"
+                )
+            self._ensure_pool()
+            job_id = uuid.uuid4().hex[:12]
+            progress = self._manager.dict(new_progress_record())
+            job = OptimizationJob(job_id=job_id, kind=kind, submitted_at=datetime.now(), progress=progress)
+            try:
+                future = self._executor.submit(_run_request_job, endpoint, snapshot, progress)
+            except BrokenProcessPool:
+                self._drop_pool(self._executor)
+                self._ensure_pool()
+                future = self._executor.submit(_run_request_job, endpoint, snapshot, progress)
+            # registered only once the pool accepted it, so a failed submit never occupies a slot
+            job.future = future
+            self._jobs[job_id] = job
+            executor = self._executor
+            future.add_done_callback(lambda f, job=job: self._on_done(job, f, executor))
+            self._prune()
+            return job_id
+
+    def _on_done(self, job: OptimizationJob, future, executor=None):
+        job.finished_at = datetime.now()
+        try:
+            if future.cancelled():
+                job.status = 'cancelled'
+            else:
+                job.http_status, job.result = future.result()
+                failed = isinstance(job.result, dict) and (job.result.get('success') is False or bool(job.result.get('error')))
+                job.status = 'failed' if failed or job.http_status >= 400 else 'completed'
+                if failed:
+                    job.error = job.result.get('error')
+        except BrokenProcessPool as e:
+            job.status = 'failed'
+            job.error = f"Optimization worker process died: {e}"
+            self._drop_pool(executor)
+        except Exception as e:
+            job.status = 'failed'
+            job.error = f"{e}\n{traceback.format_exc()}"
+        # detach from the Manager so the shared dict can be released
+        try:
+            snapshot = dict(job.progress)
+        except Exception:
+            snapshot = new_progress_record()
+        snapshot['running'] = False
+        snapshot['status_message'] = {'completed': 'Completed', 'cancelled': 'Cancelled'}.get(job.status, 'Failed')
+        job.progress = snapshot
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j.status not in ('queued', 'running')]
+        excess = len(finished) - MAX_FINISHED_JOBS
+        if excess > 0:
+            for job in sorted(finished, key=lambda j: j.finished_at or j.submitted_at)[:excess]:
+                self._jobs.pop(job.job_id, None)
+
+    def get(self, job_id: str) -> Optional[OptimizationJob]:
+        return self._jobs.get(job_id)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.get(job_id)
+        return job.to_dict() if job else None
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        jobs = sorted(self._jobs.values(), key=lambda j: j.submitted_at, reverse=True)
+        return [j.to_dict() for j in jobs]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet; running jobs cannot be interrupted"""
+        job = self.get(job_id)
+        if job is None or job.future is None:
+            return False
+        return job.future.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        statuses = [j.status for j in self._jobs.values()]
+        return {
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'running': statuses.count('running'),
+            'queued': statuses.count('queued'),
+            'completed': statuses.count('completed'),
+            'failed': statuses.count('failed'),
+        }
+
+    def shutdown(self, wait: bool = False):
+        if self._executor is not None:
+            # shutdown(cancel_futures=True) needs Python 3.9
+            for job in list(self._jobs.values()):
+                if job.future is not None:
+                    job.future.cancel()
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue(**kwargs) -> OptimizationJobQueue:
+    """Get global optimization job queue (created on first use)"""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = OptimizationJobQueue(**kwargs)
+    return _job_queue
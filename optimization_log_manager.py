@@ -1,21 +1,86 @@
 import os
-import pandas as pd
+import sqlite3
+import threading
 from datetime import datetime
 
+LOG_COLUMNS = [
+    'timestamp', 'user', 'project', 'symbol', 'timeframe',
+    'sl_min', 'sl_max', 'be_min', 'be_max', 'ts_trig_min', 'ts_trig_max', 'ts_step_min', 'ts_step_max',
+    'best_params', 'best_pnl', 'best_winrate', 'best_pf', 'notes'
+]
+_REAL_COLUMNS = {
+    'sl_min', 'sl_max', 'be_min', 'be_max', 'ts_trig_min', 'ts_trig_max', 'ts_step_min', 'ts_step_max',
+    'best_pnl', 'best_winrate', 'best_pf'
+}
+
+
 class OptimizationLogManager:
     """
     Module quản lý log kết quả tối ưu hóa, lưu trữ theo mã, khung thời gian, tên user/project, timestamp.
     Không ảnh hưởng tới các module tool hiện tại.
+
+    Log được ghi append-only vào bảng SQLite (mỗi lần tối ưu = 1 INSERT, WAL + busy timeout),
+    nên nhiều batch/process ghi song song không ghi đè nhau và chi phí ghi không tăng theo lịch sử.
+    get_logs lọc bằng index theo symbol/timeframe/user/project.
+    Log CSV cũ (optimization_logs.csv) được import một lần khi mở.
     """
-    def __init__(self, log_path='optimization_logs.csv'):
+    def __init__(self, log_path='optimization_logs.db', legacy_csv_path='optimization_logs.csv'):
+        if log_path.lower().endswith('.csv'):
+            # Old callers passed the CSV path: keep the DB next to it and import it
+            legacy_csv_path = log_path
+            log_path = os.path.splitext(log_path)[0] + '.db'
         self.log_path = log_path
-        if not os.path.exists(self.log_path):
-            # Tạo file log nếu chưa có
-            pd.DataFrame(columns=[
-                'timestamp', 'user', 'project', 'symbol', 'timeframe',
-                'sl_min', 'sl_max', 'be_min', 'be_max', 'ts_trig_min', 'ts_trig_max', 'ts_step_min', 'ts_step_max',
-                'best_params', 'best_pnl', 'best_winrate', 'best_pf', 'notes'
-            ]).to_csv(self.log_path, index=False)
+        self.legacy_csv_path = legacy_csv_path
+        self._lock = threading.Lock()
+        self._init_database()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.log_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _init_database(self):
+        columns_sql = ',\n'.join(
+            f'"{c}" {"REAL" if c in _REAL_COLUMNS else "TEXT"}' for c in LOG_COLUMNS
+        )
+        with self._connect() as conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS optimization_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    {columns_sql}
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_symbol_timeframe ON optimization_logs(symbol, timeframe)")
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_logs_user_project ON optimization_logs("user", project)')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_project ON optimization_logs(project)")
+            conn.execute("CREATE TABLE IF NOT EXISTS log_meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._import_legacy_csv(conn)
+
+    def _import_legacy_csv(self, conn):
+        """Copy rows of the old read-modify-write CSV log into the table, once"""
+        if not self.legacy_csv_path or not os.path.exists(self.legacy_csv_path):
+            return
+        marker = f"imported:{os.path.abspath(self.legacy_csv_path)}"
+        if conn.execute("SELECT 1 FROM log_meta WHERE key = ?", [marker]).fetchone():
+            return
+        import pandas as pd
+        try:
+            df = pd.read_csv(self.legacy_csv_path)
+        except Exception as e:
+            print(f"⚠️ Could not import legacy optimization log {self.legacy_csv_path}: {e}")
+            return
+        df = df.reindex(columns=LOG_COLUMNS).astype(object).where(df.notna(), None)
+        rows = [tuple(row) for row in df.itertuples(index=False, name=None)]
+        self._insert(conn, rows)
+        conn.execute("INSERT INTO log_meta (key, value) VALUES (?, ?)", [marker, datetime.now().isoformat()])
+        if rows:
+            print(f"📥 Imported {len(rows)} optimization log rows from {self.legacy_csv_path}")
+
+    @staticmethod
+    def _insert(conn, rows):
+        names = ', '.join(f'"{c}"' for c in LOG_COLUMNS)
+        placeholders = ', '.join('?' * len(LOG_COLUMNS))
+        conn.executemany(f"INSERT INTO optimization_logs ({names}) VALUES ({placeholders})", rows)
 
     def log_optimization(self, user, project, symbol, timeframe, param_ranges, best_result, notes=None):
         # Ghi log 1 lần tối ưu
@@ -39,34 +104,41 @@ class OptimizationLogManager:
             'best_pf': best_result.get('pf'),
             'notes': notes or ''
         }
-        df = pd.read_csv(self.log_path)
-        df = pd.concat([df, pd.DataFrame([entry])], ignore_index=True)
-        df.to_csv(self.log_path, index=False)
+        row = tuple(
+            float(entry[c]) if c in _REAL_COLUMNS and entry[c] is not None
+            else (None if entry[c] is None else str(entry[c]))
+            for c in LOG_COLUMNS
+        )
+        with self._lock, self._connect() as conn:
+            self._insert(conn, [row])
 
     def get_logs(self, symbol=None, timeframe=None, user=None, project=None):
-        # Truy vấn log theo các tiêu chí
-        df = pd.read_csv(self.log_path)
-        if symbol:
-            df = df[df['symbol'] == symbol]
-        if timeframe:
-            df = df[df['timeframe'] == timeframe]
-        if user:
-            df = df[df['user'] == user]
-        if project:
-            df = df[df['project'] == project]
-        return df
+        # Truy vấn log theo các tiêu chí (dùng index, không đọc toàn bộ log)
+        import pandas as pd
+        conditions, params = [], []
+        for column, value in (('symbol', symbol), ('timeframe', timeframe), ('user', user), ('project', project)):
+            if value:
+                conditions.append(f'"{column}" = ?')
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        names = ', '.join(f'"{c}"' for c in LOG_COLUMNS)
+        with self._connect() as conn:
+            return pd.read_sql_query(f"SELECT {names} FROM optimization_logs {where} ORDER BY id", conn, params=params)
+
+    def _distinct(self, column):
+        with self._connect() as conn:
+            # first-seen order, like pandas unique()
+            rows = conn.execute(f'SELECT "{column}" FROM optimization_logs GROUP BY "{column}" ORDER BY MIN(id)').fetchall()
+        return [row[0] for row in rows]
 
     def get_projects(self):
-        df = pd.read_csv(self.log_path)
-        return df['project'].unique().tolist()
+        return self._distinct('project')
 
     def get_symbols(self):
-        df = pd.read_csv(self.log_path)
-        return df['symbol'].unique().tolist()
+        return self._distinct('symbol')
 
     def get_timeframes(self):
-        df = pd.read_csv(self.log_path)
-        return df['timeframe'].unique().tolist()
+        return self._distinct('timeframe')
 
 # Checklist:
 # - Không ảnh hưởng tới tool đang dùng
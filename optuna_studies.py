@@ -0,0 +1,158 @@
+"""
+Persistent Optuna Studies
+Lưu study Optuna theo (symbol, timeframe, strategy) để tối ưu lại không phải bắt đầu từ đầu.
+
+Studies live in one SQLite file (OPTUNA_STUDY_DB, default optuna_studies.db) through
+Optuna's RDB storage. A study is named by its family and its dataset:
+
+    <source>|<symbol>|<timeframe>|<strategy>|<criteria>|<data key>
+
+source is the caller ('web' optimize_ranges, 'batch' multi-symbol runs): their
+objectives score the same criteria differently (drawdown, failed simulations, pf
+without losses), so their trial values must never share a study.
+
+- same family, same data (tradelist + candles + engine version): the stored study is
+  loaded and new trials continue it; TPE already knows every earlier trial.
+- same family, new data (e.g. new trades arrived): earlier objective values are stale,
+  so a new study starts, with its first trials enqueued from the best trials of the
+  family's most recent study and the top cells of the latest grid sensitivity surface
+  (sensitivity.py) for the same symbol/timeframe/strategy. They are re-evaluated on the
+  new data, so the search starts around the previous optimum.
+
+Objectives that keep a parameter fixed (min == max, not suggested) record it in the
+trial's 'fixed' user attribute; only trials whose parameters, suggested or fixed, all
+lie inside the current ranges can be reported as the best result.
+"""
+
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+STUDY_DB_PATH = os.environ.get('OPTUNA_STUDY_DB', 'optuna_studies.db')
+# Best trials of the previous study enqueued into a new one
+WARM_START_TRIALS = 10
+# Top grid cells of the latest sensitivity surface enqueued into a new study
+WARM_START_COMBOS = 5
+
+# Global storage, created on first use
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_study_storage():
+    """Optuna RDB storage over STUDY_DB_PATH"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                import optuna  # deferred: optuna is only needed once an Optuna run starts
+                _storage = optuna.storages.RDBStorage(
+                    f"sqlite:///{STUDY_DB_PATH}", engine_kwargs={'connect_args': {'timeout': 30}}
+                )
+    return _storage
+
+
+STUDY_SOURCES = ('web', 'batch')
+
+
+def study_family(source: str, symbol: str, timeframe: str, strategy: str, opt_type: str) -> str:
+    if source not in STUDY_SOURCES:
+        raise ValueError(f"Unknown study source '{source}', expected one of {STUDY_SOURCES}")
+    return '|'.join(str(part) for part in (source, symbol, timeframe, strategy, opt_type))
+
+
+def study_name(family: str, pairs: List[Dict], df_candle) -> str:
+    from optimization_cache import data_key
+    return f"{family}|{data_key(pairs, df_candle)[:16]}"
+
+
+def previous_best_trials(storage, family: str, exclude: str, limit: int = WARM_START_TRIALS) -> List[Dict]:
+    """Parameters (suggested and fixed) of the best completed trials of the family's most recent other study"""
+    import optuna
+    summaries = [s for s in optuna.get_all_study_summaries(storage, include_best_trial=False)
+                 if s.study_name.startswith(family + '|') and s.study_name != exclude]
+    if not summaries:
+        return []
+    latest = max(summaries, key=lambda s: s.datetime_start or datetime.min)
+    study = optuna.load_study(study_name=latest.study_name, storage=storage)
+    completed = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE and t.value is not None]
+    completed.sort(key=lambda t: t.value, reverse=True)
+    return [trial_values(t) for t in completed[:limit]]
+
+
+def surface_top_combos(symbol: str, timeframe: str, strategy: str, metric: str,
+                       limit: int = WARM_START_COMBOS) -> List[Dict]:
+    """Best cells of the latest stored sensitivity surface of symbol/timeframe/strategy"""
+    from optimization_cache import get_optimization_cache
+    from sensitivity import GridSurface
+    cache = get_optimization_cache()
+    for entry in cache.list_surfaces():
+        meta = entry['meta']
+        if (meta.get('symbol'), meta.get('timeframe'), meta.get('strategy')) != (symbol, timeframe, strategy):
+            continue
+        blob = cache.get_surface(entry['key'])
+        surface = GridSurface.from_bytes(blob) if blob is not None else None
+        if surface is not None and metric in surface.values:
+            return surface.top_cells(metric, limit)
+    return []
+
+
+def trial_values(trial) -> Dict[str, float]:
+    """Suggested and fixed parameters of a trial"""
+    return {**trial.user_attrs.get('fixed', {}), **trial.params}
+
+
+def fits_ranges(values: Dict, ranges: Dict[str, Tuple[float, float]]) -> bool:
+    """True when every parameter of ranges has a value inside its range"""
+    return all(name in values and low <= values[name] <= high for name, (low, high) in ranges.items())
+
+
+def open_study(source: str, symbol: str, timeframe: str, strategy: str, opt_type: str, pairs: List[Dict], df_candle,
+               ranges: Dict[str, Tuple[float, float]], warm_start: bool = True, seed_metric: Optional[str] = None):
+    """
+    Load or create the persisted study of (source, symbol, timeframe, strategy, opt_type)
+    on this dataset, enqueueing warm-start seeds into a new one.
+    source: objective that produces the trial values, one of STUDY_SOURCES
+    ranges: {param: (low, high)} of the objective (low == high: fixed, not suggested)
+    seed_metric: result key to rank surface cells by (default: no surface seeds)
+    Returns (study, info).
+    """
+    import optuna
+    storage = get_study_storage()
+    family = study_family(source, symbol, timeframe, strategy, opt_type)
+    name = study_name(family, pairs, df_candle)
+    study = optuna.create_study(study_name=name, storage=storage, direction='maximize', load_if_exists=True)
+    previous = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE]
+    info = {'study_name': name, 'resumed_trials': len(previous), 'seeds': 0}
+    if not warm_start or previous:
+        return study, info
+
+    candidates = previous_best_trials(storage, family, name)
+    if seed_metric:
+        try:
+            candidates += surface_top_combos(symbol, timeframe, strategy, seed_metric)
+        except Exception as e:
+            print(f"⚠️ Sensitivity surface seeds unavailable: {e}")
+    seeds = []
+    for params in candidates:
+        # Clip into the current ranges; parameters fixed in this run are not suggested
+        seed = {name: min(max(float(params[name]), low), high)
+                for name, (low, high) in ranges.items() if low != high and name in params}
+        if seed and seed not in seeds:
+            seeds.append(seed)
+    for seed in seeds:
+        study.enqueue_trial(seed, skip_if_exists=True)
+    info['seeds'] = len(seeds)
+    return study, info
+
+
+def best_in_ranges(study, ranges: Dict[str, Tuple[float, float]]) -> Optional[Tuple[Dict[str, float], float]]:
+    """(parameters incl. fixed ones, value) of the best completed trial inside the current ranges"""
+    import optuna
+    fitting = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE and t.value is not None
+               and fits_ranges(trial_values(t), ranges)]
+    if not fitting:
+        return None
+    best = max(fitting, key=lambda t: t.value)
+    return trial_values(best), best.value
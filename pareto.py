@@ -0,0 +1,89 @@
+"""
+Pareto Front
+Lọc các tổ hợp không bị trội (non-dominated) theo nhiều mục tiêu cùng lúc.
+
+A combination dominates another when it is at least as good on every objective and
+strictly better on one. The front is what is left after removing every dominated
+combination: the risk/return trade-offs worth choosing from (e.g. more PnL for more
+drawdown), without re-running the optimizer once per criterion.
+
+Objectives use the opt_type vocabulary of the grid engines:
+    pnl, winrate, pf, sharpe, recovery (higher is better), drawdown (lower is better)
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# opt_type -> (result key, higher is better)
+PARETO_OBJECTIVES = {
+    'pnl': ('pnl_total', True),
+    'winrate': ('winrate', True),
+    'pf': ('pf', True),
+    'sharpe': ('sharpe_ratio', True),
+    'recovery': ('recovery_factor', True),
+    'drawdown': ('max_drawdown', False),
+}
+DEFAULT_PARETO_OBJECTIVES = ('pnl', 'drawdown', 'winrate')
+
+
+def parse_objectives(value) -> List[str]:
+    """Objective names from a list or comma separated string (unknown names dropped)"""
+    if isinstance(value, str):
+        value = value.split(',')
+    names = [str(v).strip().lower() for v in (value or [])]
+    names = [n for n in dict.fromkeys(names) if n in PARETO_OBJECTIVES]
+    return names if len(names) >= 2 else list(DEFAULT_PARETO_OBJECTIVES)
+
+
+def objective_matrix(results: Sequence[Dict], objectives: Sequence[str]) -> np.ndarray:
+    """(results x objectives) matrix oriented so that higher is always better"""
+    columns = []
+    for name in objectives:
+        key, higher = PARETO_OBJECTIVES[name]
+        values = np.array([float(r.get(key, np.nan)) for r in results], dtype=float)
+        columns.append(values if higher else -values)
+    matrix = np.column_stack(columns) if columns else np.empty((len(results), 0))
+    # NaN never wins a comparison: treat it as the worst possible value
+    return np.where(np.isnan(matrix), -np.inf, matrix)
+
+
+def non_dominated_mask(values: np.ndarray) -> np.ndarray:
+    """
+    True for rows of a (points x objectives) maximize-matrix that no other row dominates.
+
+    Points are visited best-sum first; each surviving point removes every remaining
+    point it dominates in one vectorized comparison, so the loop runs roughly once per
+    front point instead of once per pair of points.
+    """
+    n = len(values)
+    mask = np.zeros(n, dtype=bool)
+    if n == 0:
+        return mask
+    # Visiting order only affects speed: any point can still remove earlier survivors
+    order = np.argsort(-np.nan_to_num(values, posinf=0.0, neginf=0.0).sum(axis=1), kind='stable')
+    remaining = order
+    points = values[order]
+    position = 0
+    while position < len(points):
+        current = points[position]
+        dominated = (points <= current).all(axis=1) & (points < current).any(axis=1)
+        keep = ~dominated
+        remaining = remaining[keep]
+        points = points[keep]
+        position = int(keep[:position].sum()) + 1
+    mask[remaining] = True
+    return mask
+
+
+def pareto_front(results: Sequence[Dict], objectives: Sequence[str]) -> Tuple[List[Dict], np.ndarray]:
+    """
+    Non-dominated results, sorted by the first objective (best first), and the mask
+    over the input results.
+    """
+    if not results:
+        return [], np.zeros(0, dtype=bool)
+    values = objective_matrix(results, objectives)
+    mask = non_dominated_mask(values)
+    order = [i for i in np.argsort(-values[:, 0], kind='stable') if mask[i]]
+    return [results[i] for i in order], mask
@@ -5,15 +5,98 @@ Tích hợp với optimization_log_manager và SQLite database
 """
 
 import sqlite3
-import pandas as pd
+import threading
+import csv
+import numpy as np
+import io
 import json
 import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union
 import hashlib
+import base64
 from dataclasses import dataclass
 from optimization_log_manager import OptimizationLogManager
 
+def _json_default(obj):
+    """json.dumps fallback for numpy scalars and timestamps found in trade details"""
+    if hasattr(obj, 'item'):
+        return obj.item()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    return str(obj)
+
+def _plain_value(value):
+    """Python scalar for a trade detail value (numpy scalars unwrapped, timestamps as ISO strings)"""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    return value
+
+def _column_array(values: List[Any]):
+    """(array, none_mask or None, int_mask or None) for one details column, typed where the values allow it
+
+    int_mask marks the ints of a column mixing ints and floats, stored as float64.
+    """
+    mask = np.array([v is None for v in values], dtype=bool)
+    present = [v for v in values if v is not None]
+    int_mask = None
+    if present and all(isinstance(v, bool) for v in present):
+        array = np.array([bool(v) for v in values], dtype=bool)
+    elif present and all(isinstance(v, int) and not isinstance(v, bool) for v in present) \
+            and all(-2**63 <= v < 2**63 for v in present):
+        array = np.array([v or 0 for v in values], dtype=np.int64)
+    elif all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present) \
+            and all(float(v) == v for v in present if isinstance(v, int)):
+        array = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        ints = np.array([isinstance(v, int) for v in values], dtype=bool)
+        int_mask = ints if ints.any() else None
+    else:
+        array = np.array(['' if v is None else str(v) for v in values], dtype=str)
+    return array, (mask if mask.any() else None), int_mask
+
+def encode_details(details: List[Dict]) -> bytes:
+    """Per-trade details as a compressed column-per-field .npz (no pickle)
+    
+    A few thousand trades become a handful of typed arrays instead of a JSON
+    object per trade; decode_details restores the list of dicts. Fields missing
+    from some trades stay missing (absent mask a<i>, separate from the None mask m<i>).
+    """
+    columns = list(dict.fromkeys(key for trade in details for key in trade))
+    arrays = {'__columns__': np.array(columns, dtype=str)}
+    for i, name in enumerate(columns):
+        array, mask, int_mask = _column_array([_plain_value(trade.get(name)) for trade in details])
+        arrays[f'c{i}'] = array
+        if mask is not None:
+            arrays[f'm{i}'] = mask
+        if int_mask is not None:
+            arrays[f'i{i}'] = int_mask
+        absent = np.array([name not in trade for trade in details], dtype=bool)
+        if absent.any():
+            arrays[f'a{i}'] = absent
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+_ABSENT = object()
+
+def decode_details(blob: bytes) -> List[Dict]:
+    """Inverse of encode_details"""
+    with np.load(io.BytesIO(blob), allow_pickle=False) as data:
+        columns = data['__columns__'].tolist()
+        values = []
+        for i in range(len(columns)):
+            column = data[f'c{i}'].tolist()
+            if f'i{i}' in data.files:
+                column = [int(v) if is_int else v for v, is_int in zip(column, data[f'i{i}'].tolist())]
+            if f'm{i}' in data.files:
+                column = [None if missing else v for v, missing in zip(column, data[f'm{i}'].tolist())]
+            if f'a{i}' in data.files:
+                column = [_ABSENT if absent else v for v, absent in zip(column, data[f'a{i}'].tolist())]
+            values.append(column)
+    return [{name: v for name, v in zip(columns, row) if v is not _ABSENT} for row in zip(*values)]
+
 @dataclass
 class BacktestResult:
     """Standard backtest result structure"""
@@ -27,6 +110,21 @@ class BacktestResult:
     metadata: Dict[str, Any]
     created_at: datetime
 
+# Every column except details_json; list/query views read these and leave the
+# per-trade details in the database until a single result is opened
+SUMMARY_COLUMNS = (
+    "id", "symbol", "timeframe", "strategy", "parameters_json", "metrics_json",
+    "metadata_json", "created_at", "user_id", "project_name", "total_pnl", "winrate",
+    "profit_factor", "max_drawdown", "sharpe_ratio", "total_trades",
+    "sl_value", "be_value", "ts_trig_value", "ts_step_value"
+)
+
+# Columns query_results may sort by (interpolated into SQL, so whitelisted)
+SORTABLE_COLUMNS = {
+    "total_pnl", "winrate", "profit_factor", "max_drawdown", "sharpe_ratio",
+    "total_trades", "created_at", "symbol", "timeframe", "strategy"
+}
+
 class ResultsManager:
     """
     Centralized results management with fast indexing and query
@@ -88,12 +186,25 @@ class ResultsManager:
                 "CREATE INDEX IF NOT EXISTS idx_winrate ON backtest_results(winrate)",
                 "CREATE INDEX IF NOT EXISTS idx_profit_factor ON backtest_results(profit_factor)",
                 "CREATE INDEX IF NOT EXISTS idx_symbol_timeframe ON backtest_results(symbol, timeframe)",
-                "CREATE INDEX IF NOT EXISTS idx_symbol_strategy ON backtest_results(symbol, strategy)"
+                "CREATE INDEX IF NOT EXISTS idx_symbol_strategy ON backtest_results(symbol, strategy)",
+                # Dashboard filters + newest-first listing
+                "CREATE INDEX IF NOT EXISTS idx_symbol_timeframe_strategy_created ON backtest_results(symbol, timeframe, strategy, created_at)",
+                "CREATE INDEX IF NOT EXISTS idx_strategy_created ON backtest_results(strategy, created_at)"
             ]
             
             for idx_sql in indexes:
                 conn.execute(idx_sql)
             
+            # Per-trade details live beside the summary row, one encode_details() blob per result
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS result_details (
+                    result_id TEXT PRIMARY KEY,
+                    trade_count INTEGER NOT NULL,
+                    data BLOB NOT NULL
+                )
+            """)
+            self._migrate_details_json(conn)
+            
             # Create summary view for quick statistics
             conn.execute("""
                 CREATE VIEW IF NOT EXISTS results_summary AS
@@ -115,6 +226,38 @@ class ResultsManager:
             
             conn.commit()
     
+    @staticmethod
+    def _migrate_details_json(conn, chunk_size: int = 200):
+        """Move details still stored as JSON in backtest_results.details_json into result_details"""
+        moved = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, details_json FROM backtest_results WHERE details_json IS NOT NULL LIMIT ?",
+                [chunk_size]
+            ).fetchall()
+            if not rows:
+                break
+            for result_id, details_json in rows:
+                try:
+                    details = json.loads(details_json)
+                except (json.JSONDecodeError, TypeError):
+                    details = []
+                if details:
+                    conn.execute("INSERT OR REPLACE INTO result_details (result_id, trade_count, data) VALUES (?, ?, ?)",
+                                 (result_id, len(details), encode_details(details)))
+                conn.execute("UPDATE backtest_results SET details_json = NULL WHERE id = ?", [result_id])
+            conn.commit()
+            moved += len(rows)
+        if moved:
+            print(f"📦 Moved details of {moved} results to result_details (run VACUUM to reclaim space)")
+    
+    def _store_details(self, conn, result_id: str, details: List[Dict]):
+        if details:
+            conn.execute("INSERT OR REPLACE INTO result_details (result_id, trade_count, data) VALUES (?, ?, ?)",
+                         (result_id, len(details), encode_details(details)))
+        else:
+            conn.execute("DELETE FROM result_details WHERE result_id = ?", [result_id])
+    
     def store_result(self, 
                     symbol: str,
                     timeframe: str, 
@@ -161,10 +304,10 @@ class ResultsManager:
                 result.symbol,
                 result.timeframe, 
                 result.strategy,
-                json.dumps(result.parameters),
-                json.dumps(result.metrics),
-                json.dumps(result.details),
-                json.dumps(result.metadata),
+                json.dumps(result.parameters, default=_json_default),
+                json.dumps(result.metrics, default=_json_default),
+                None,  # details go to result_details
+                json.dumps(result.metadata, default=_json_default),
                 result.created_at,
                 user_id,
                 project_name,
@@ -179,6 +322,7 @@ class ResultsManager:
                 extracted_params.get('ts_trig'),
                 extracted_params.get('ts_step')
             ))
+            self._store_details(conn, result.id, result.details)
             
             conn.commit()
         
@@ -259,8 +403,73 @@ class ResultsManager:
                      min_winrate: Optional[float] = None,
                      limit: int = 100,
                      order_by: str = "total_pnl",
-                     ascending: bool = False) -> List[BacktestResult]:
-        """Query results with flexible filtering and sorting"""
+                     ascending: bool = False,
+                     include_details: bool = False,
+                     after: Optional[tuple] = None) -> List[BacktestResult]:
+        """Query results with flexible filtering and sorting
+        
+        details_json is only read with include_details=True; otherwise results come
+        back with details=[] (use get_results for the one being opened).
+        after=(order_by value, id) of the last result of a page returns the next page.
+        """
+        rows = self._query_rows(symbol=symbol, timeframe=timeframe, strategy=strategy,
+                                date_from=date_from, date_to=date_to, min_pnl=min_pnl,
+                                min_winrate=min_winrate, limit=limit, order_by=order_by,
+                                ascending=ascending, include_details=include_details, after=after)
+        
+        # Convert to BacktestResult objects
+        return [self._row_to_result(row) for row in rows]
+    
+    def query_page(self,
+                   cursor: Optional[str] = None,
+                   limit: int = 50,
+                   order_by: str = "created_at",
+                   ascending: bool = False,
+                   include_details: bool = False,
+                   **filters) -> Dict[str, Any]:
+        """One keyset page of query_results: {'results': [...], 'next_cursor': str | None}
+        
+        Pass next_cursor back to get the following page; unlike OFFSET the cost of a
+        page does not grow with its position. filters are query_results' filters.
+        """
+        after = self._decode_cursor(cursor) if cursor else None
+        rows = self._query_rows(limit=limit + 1, order_by=order_by, ascending=ascending,
+                                include_details=include_details, after=after, **filters)
+        next_cursor = self._encode_cursor(rows[limit - 1], order_by) if len(rows) > limit else None
+        return {
+            'results': [self._row_to_result(row) for row in rows[:limit]],
+            'next_cursor': next_cursor
+        }
+    
+    @staticmethod
+    def _encode_cursor(row, order_by: str) -> str:
+        raw = json.dumps([row[order_by], row['id']])
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple:
+        try:
+            value, result_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            return value, result_id
+        except Exception as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+    
+    def _query_rows(self,
+                    symbol: Optional[str] = None,
+                    timeframe: Optional[str] = None,
+                    strategy: Optional[str] = None,
+                    date_from: Optional[datetime] = None,
+                    date_to: Optional[datetime] = None,
+                    min_pnl: Optional[float] = None,
+                    min_winrate: Optional[float] = None,
+                    limit: int = 100,
+                    order_by: str = "total_pnl",
+                    ascending: bool = False,
+                    include_details: bool = False,
+                    after: Optional[tuple] = None) -> List[sqlite3.Row]:
+        """SELECT for query_results/query_page; after=(order_by value, id) continues a keyset page"""
+        if order_by not in SORTABLE_COLUMNS:
+            raise ValueError(f"Cannot order by {order_by!r}")
         
         # Build SQL query
         where_conditions = []
@@ -294,13 +503,26 @@ class ResultsManager:
             where_conditions.append("winrate >= ?")
             params.append(min_winrate)
         
-        where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
         order_direction = "ASC" if ascending else "DESC"
+        if after is not None:
+            # SQLite sorts NULLs first ascending / last descending; keep keyset pages consistent with that
+            value, after_id = after
+            comparison = ">" if ascending else "<"
+            if value is None:
+                tail = f"{order_by} IS NOT NULL OR " if ascending else ""
+                where_conditions.append(f"({tail}({order_by} IS NULL AND id {comparison} ?))")
+                params.append(after_id)
+            else:
+                tail = "" if ascending else f" OR {order_by} IS NULL"
+                where_conditions.append(f"({order_by} {comparison} ? OR ({order_by} = ? AND id {comparison} ?){tail})")
+                params.extend([value, value, after_id])
+        
+        where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
         
         sql = f"""
-            SELECT * FROM backtest_results 
+            SELECT {self._select_list(include_details)} FROM backtest_results {self._details_join(include_details)}
             {where_clause}
-            ORDER BY {order_by} {order_direction}
+            ORDER BY {order_by} {order_direction}, id {order_direction}
             LIMIT ?
         """
         params.append(limit)
@@ -309,25 +531,72 @@ class ResultsManager:
         with sqlite3.connect(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(sql, params)
-            rows = cursor.fetchall()
-        
-        # Convert to BacktestResult objects
-        results = []
-        for row in rows:
-            result = BacktestResult(
-                id=row['id'],
-                symbol=row['symbol'],
-                timeframe=row['timeframe'],
-                strategy=row['strategy'],
-                parameters=json.loads(row['parameters_json']),
-                metrics=json.loads(row['metrics_json']),
-                details=json.loads(row['details_json']) if row['details_json'] else [],
-                metadata=json.loads(row['metadata_json']) if row['metadata_json'] else {},
-                created_at=datetime.fromisoformat(row['created_at'])
-            )
-            results.append(result)
-        
-        return results
+            return cursor.fetchall()
+    
+    @staticmethod
+    def _select_list(include_details: bool) -> str:
+        if include_details:
+            return "backtest_results.*, result_details.data AS details_blob"
+        return ", ".join(SUMMARY_COLUMNS)
+    
+    @staticmethod
+    def _details_join(include_details: bool) -> str:
+        return "LEFT JOIN result_details ON result_details.result_id = backtest_results.id" if include_details else ""
+    
+    @staticmethod
+    def _row_details(row) -> List[Dict]:
+        keys = row.keys()
+        if 'details_blob' in keys and row['details_blob'] is not None:
+            return decode_details(row['details_blob'])
+        if 'details_json' in keys and row['details_json']:
+            return json.loads(row['details_json'])
+        return []
+    
+    @staticmethod
+    def _row_to_result(row) -> BacktestResult:
+        return BacktestResult(
+            id=row['id'],
+            symbol=row['symbol'],
+            timeframe=row['timeframe'],
+            strategy=row['strategy'],
+            parameters=json.loads(row['parameters_json']),
+            metrics=json.loads(row['metrics_json']),
+            details=ResultsManager._row_details(row),
+            metadata=json.loads(row['metadata_json']) if row['metadata_json'] else {},
+            created_at=datetime.fromisoformat(str(row['created_at']))
+        )
+    
+    def get_results(self, result_ids: List[str], include_details: bool = True) -> List[BacktestResult]:
+        """Fetch results by id (one query), in the order given"""
+        if not result_ids:
+            return []
+        placeholders = ",".join("?" * len(result_ids))
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                f"SELECT {self._select_list(include_details)} FROM backtest_results {self._details_join(include_details)} "
+                f"WHERE id IN ({placeholders})", list(result_ids)
+            ).fetchall()
+        by_id = {row['id']: self._row_to_result(row) for row in rows}
+        return [by_id[rid] for rid in result_ids if rid in by_id]
+    
+    def get_details(self, result_id: str) -> List[Dict]:
+        """Per-trade details of one result"""
+        for _, details in self.iter_details([result_id]):
+            return details
+        return []
+    
+    def iter_details(self, result_ids: List[str]):
+        """Yield (result_id, details) one result at a time, decoding each blob only when reached"""
+        with sqlite3.connect(self.db_path) as conn:
+            for result_id in result_ids:
+                row = conn.execute("SELECT data FROM result_details WHERE result_id = ?", [result_id]).fetchone()
+                if row is not None:
+                    yield result_id, decode_details(row[0])
+                    continue
+                # Rows written before result_details existed and not yet migrated
+                row = conn.execute("SELECT details_json FROM backtest_results WHERE id = ?", [result_id]).fetchone()
+                yield result_id, json.loads(row[0]) if row and row[0] else []
     
     def get_best_results(self, 
                         symbol: str,
@@ -418,66 +687,133 @@ class ResultsManager:
             cursor = conn.execute("SELECT DISTINCT strategy FROM backtest_results ORDER BY strategy")
             return [row[0] for row in cursor.fetchall()]
     
+    def iter_results(self,
+                     chunk_size: int = 500,
+                     include_details: bool = False,
+                     **filters):
+        """Yield every matching result, newest first, reading one keyset page at a time"""
+        cursor = None
+        while True:
+            page = self.query_page(cursor=cursor, limit=chunk_size, include_details=include_details, **filters)
+            yield from page['results']
+            cursor = page['next_cursor']
+            if not cursor:
+                return
+    
     def export_results(self, 
                       file_path: str,
                       symbol: Optional[str] = None,
                       timeframe: Optional[str] = None,
-                      format: str = "csv") -> str:
-        """Export results to CSV/JSON file"""
-        
-        results = self.query_results(symbol=symbol, timeframe=timeframe, limit=10000)
-        
-        if format.lower() == "csv":
-            # Flatten results for CSV export
-            rows = []
-            for result in results:
-                row = {
-                    'id': result.id,
-                    'symbol': result.symbol,
-                    'timeframe': result.timeframe,
-                    'strategy': result.strategy,
-                    'created_at': result.created_at.isoformat(),
-                    **{f"param_{k}": v for k, v in result.parameters.items()},
-                    **{f"metric_{k}": v for k, v in result.metrics.items()}
-                }
-                rows.append(row)
-            
-            df = pd.DataFrame(rows)
-            df.to_csv(file_path, index=False)
+                      format: str = "csv",
+                      chunk_size: int = 500) -> str:
+        """Export results to CSV/JSON/Parquet file
         
-        elif format.lower() == "json":
-            # Export as JSON
-            data = []
-            for result in results:
-                data.append({
-                    'id': result.id,
-                    'symbol': result.symbol,
-                    'timeframe': result.timeframe,
-                    'strategy': result.strategy,
-                    'parameters': result.parameters,
-                    'metrics': result.metrics,
-                    'details': result.details,
-                    'metadata': result.metadata,
-                    'created_at': result.created_at.isoformat()
-                })
+        Results are streamed to the file chunk_size at a time (per-trade details for
+        JSON are decoded one result at a time), so memory stays bounded.
+        """
+        format = format.lower()
+        filters = {'symbol': symbol, 'timeframe': timeframe}
+        
+        if format == "csv":
+            # Parameter/metric keys vary between strategies: collect the header in a first pass
+            param_keys, metric_keys = {}, {}
+            for result in self.iter_results(chunk_size=chunk_size, **filters):
+                param_keys.update(dict.fromkeys(result.parameters))
+                metric_keys.update(dict.fromkeys(result.metrics))
+            fieldnames = ['id', 'symbol', 'timeframe', 'strategy', 'created_at'] + \
+                [f"param_{k}" for k in param_keys] + [f"metric_{k}" for k in metric_keys]
             
+            count = 0
+            with open(file_path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+                for result in self.iter_results(chunk_size=chunk_size, **filters):
+                    writer.writerow({
+                        'id': result.id,
+                        'symbol': result.symbol,
+                        'timeframe': result.timeframe,
+                        'strategy': result.strategy,
+                        'created_at': result.created_at.isoformat(),
+                        **{f"param_{k}": v for k, v in result.parameters.items()},
+                        **{f"metric_{k}": v for k, v in result.metrics.items()}
+                    })
+                    count += 1
+        
+        elif format == "json":
+            # Export as JSON, writing one result (with its details) at a time
+            count = 0
             with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+                f.write('[')
+                for result in self.iter_results(chunk_size=chunk_size, **filters):
+                    item = json.dumps({
+                        'id': result.id,
+                        'symbol': result.symbol,
+                        'timeframe': result.timeframe,
+                        'strategy': result.strategy,
+                        'parameters': result.parameters,
+                        'metrics': result.metrics,
+                        'details': self.get_details(result.id),
+                        'metadata': result.metadata,
+                        'created_at': result.created_at.isoformat()
+                    }, indent=2, ensure_ascii=False, default=_json_default)
+                    f.write((',\n' if count else '\n') + item)
+                    count += 1
+                f.write('\n]')
+        
+        elif format == "parquet":
+            count = self._export_parquet(file_path, filters, chunk_size)
+        
+        else:
+            raise ValueError(f"Unsupported export format: {format}")
         
-        print(f"📤 Exported {len(results)} results to {file_path}")
+        print(f"📤 Exported {count} results to {file_path}")
         return file_path
     
+    def _export_parquet(self, file_path: str, filters: Dict, chunk_size: int) -> int:
+        """Summary columns (parameters/metrics as JSON strings) as Parquet, one row group per chunk; needs pyarrow"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        real_columns = {"total_pnl", "winrate", "profit_factor", "max_drawdown", "sharpe_ratio",
+                        "total_trades", "sl_value", "be_value", "ts_trig_value", "ts_step_value"}
+        schema = pa.schema([(name, pa.float64() if name in real_columns else pa.string()) for name in SUMMARY_COLUMNS])
+        
+        def convert(name, value):
+            if value is None:
+                return None
+            return float(value) if name in real_columns else str(value)
+        
+        count = 0
+        after = None
+        with pq.ParquetWriter(file_path, schema) as writer:
+            while True:
+                rows = self._query_rows(limit=chunk_size, order_by="created_at", after=after, **filters)
+                if rows or not count:
+                    writer.write_table(pa.Table.from_pylist(
+                        [{name: convert(name, row[name]) for name in SUMMARY_COLUMNS} for row in rows],
+                        schema=schema
+                    ))
+                count += len(rows)
+                if len(rows) < chunk_size:
+                    return count
+                after = (rows[-1]['created_at'], rows[-1]['id'])
+    
     def compare_results(self, result_ids: List[str]) -> Dict:
         """Compare multiple results side by side"""
         
-        results = []
-        for result_id in result_ids:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.execute("SELECT * FROM backtest_results WHERE id = ?", [result_id])
-                row = cursor.fetchone()
-                if row:
-                    results.append(dict(row))
+        # Summary columns only; per-trade details stay in result_details (see iter_details)
+        placeholders = ",".join("?" * len(result_ids))
+        columns = ", ".join(f"backtest_results.{c}" for c in SUMMARY_COLUMNS)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(f"""
+                SELECT {columns}, result_details.trade_count AS detail_count
+                FROM backtest_results
+                LEFT JOIN result_details ON result_details.result_id = backtest_results.id
+                WHERE backtest_results.id IN ({placeholders})
+            """, list(result_ids)).fetchall() if result_ids else []
+        by_id = {row['id']: dict(row) for row in rows}
+        results = [by_id[rid] for rid in result_ids if rid in by_id]
         
         if not results:
             return {'error': 'No results found for given IDs'}
@@ -530,12 +866,18 @@ class ResultsManager:
         
         return analysis
 
-# Global instance
-results_manager = ResultsManager()
+# Global instance, created on first use so importing this module stays cheap
+_results_manager = None
+_results_manager_lock = threading.Lock()
 
 def get_results_manager() -> ResultsManager:
     """Get global results manager instance"""
-    return results_manager
+    global _results_manager
+    if _results_manager is None:
+        with _results_manager_lock:
+            if _results_manager is None:
+                _results_manager = ResultsManager()
+    return _results_manager
 
 if __name__ == "__main__":
     # Test the results manager
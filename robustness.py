@@ -0,0 +1,123 @@
+"""
+Bootstrap Robustness
+Đánh giá độ bền của các bộ tham số tốt nhất bằng cách lấy mẫu lại các lệnh.
+
+A best combination is one draw of history: a handful of lucky trades can carry it.
+Resampling its per-trade PnL thousands of times gives the spread its PnL, drawdown and
+winrate could have had with the same trade distribution:
+
+- bootstrap:       trades drawn independently with replacement
+- block bootstrap: circular blocks of consecutive trades (block_size, default ~n^(1/3)),
+                   keeping streaks together, which matters for drawdown
+
+Nothing is re-simulated. Each combination's per-trade PnL row (from the engine results
+or the combo cache) is indexed with one (samples x trades) index matrix and the whole
+matrix goes through trade_metrics.compute_metrics. All combinations with the same trade
+count share the same index matrix (common random numbers), so their intervals are
+directly comparable.
+"""
+
+import math
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from trade_metrics import compute_metrics
+
+ROBUSTNESS_SAMPLES = 2000
+ROBUSTNESS_TOP_K = 5
+ROBUSTNESS_CONFIDENCE = 0.95
+ROBUSTNESS_METRICS = ('pnl_total', 'max_drawdown', 'winrate')
+# Resampled rows per compute_metrics() call, bounds the temporary matrices
+SAMPLE_BATCH = 500
+
+Combo = Tuple[float, float, float, float]
+
+
+def default_block_size(n_trades: int) -> int:
+    return max(1, int(round(n_trades ** (1 / 3))))
+
+
+def bootstrap_indices(n_trades: int, n_samples: int, block_size: int = 1,
+                      rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """(samples x trades) trade indices; block_size > 1 draws circular blocks of consecutive trades"""
+    rng = rng or np.random.default_rng()
+    if n_trades == 0:
+        return np.zeros((n_samples, 0), dtype=int)
+    if block_size <= 1:
+        return rng.integers(0, n_trades, size=(n_samples, n_trades))
+    n_blocks = math.ceil(n_trades / block_size)
+    starts = rng.integers(0, n_trades, size=(n_samples, n_blocks))
+    blocks = (starts[:, :, None] + np.arange(block_size)) % n_trades
+    return blocks.reshape(n_samples, -1)[:, :n_trades]
+
+
+def resampled_metrics(pnl: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """compute_metrics() of pnl reordered by every row of indices"""
+    return np.concatenate([
+        compute_metrics(pnl[indices[start:start + SAMPLE_BATCH]])
+        for start in range(0, len(indices), SAMPLE_BATCH)
+    ]) if len(indices) else compute_metrics(np.empty((0, len(pnl))))
+
+
+def _interval(values: np.ndarray, point: float, confidence: float) -> Dict:
+    tail = (1 - confidence) / 2 * 100
+    low, median, high = np.percentile(values, [tail, 50, 100 - tail])
+    return {
+        'value': round(float(point), 4),
+        'mean': round(float(values.mean()), 4),
+        'median': round(float(median), 4),
+        'std': round(float(values.std()), 4),
+        'low': round(float(low), 4),
+        'high': round(float(high), 4),
+    }
+
+
+def bootstrap_summary(pnl: np.ndarray, indices: np.ndarray, confidence: float = ROBUSTNESS_CONFIDENCE) -> Dict:
+    """Confidence intervals of ROBUSTNESS_METRICS over the resamples, plus P(PnL > 0)"""
+    point = compute_metrics(pnl[None, :])[0]
+    samples = resampled_metrics(pnl, indices)
+    summary = {name: _interval(samples[name], point[name], confidence) for name in ROBUSTNESS_METRICS}
+    summary['prob_profit'] = round(float((samples['pnl_total'] > 0).mean()), 4) if len(samples) else None
+    return summary
+
+
+def robustness_report(combos: Sequence[Combo], pnl_rows: Sequence[Sequence[float]],
+                      n_samples: int = ROBUSTNESS_SAMPLES, block_size: Optional[int] = None,
+                      confidence: float = ROBUSTNESS_CONFIDENCE, seed: Optional[int] = None) -> Dict:
+    """
+    combos:   (sl, be, ts_trig, ts_step) per combination, best first
+    pnl_rows: per-trade PnL % of each combination, in trade order
+    Returns {'samples', 'confidence', 'combinations': [{params, trades, bootstrap, block_bootstrap}], ...}
+    """
+    started = time.time()
+    rng = np.random.default_rng(seed)
+    n_samples = max(1, int(n_samples))
+    shared: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def indices(n_trades, block):
+        if (n_trades, block) not in shared:
+            shared[(n_trades, block)] = bootstrap_indices(n_trades, n_samples, block, rng)
+        return shared[(n_trades, block)]
+
+    combinations = []
+    for combo, row in zip(combos, pnl_rows):
+        pnl = np.asarray(row, dtype=float)
+        pnl = pnl[~np.isnan(pnl)]
+        block = int(block_size) if block_size else default_block_size(len(pnl))
+        block_summary = bootstrap_summary(pnl, indices(len(pnl), block), confidence)
+        block_summary['block_size'] = block
+        combinations.append({
+            'params': {name: float(value) for name, value in zip(('sl', 'be', 'ts_trig', 'ts_step'), combo)},
+            'trades': int(len(pnl)),
+            'bootstrap': bootstrap_summary(pnl, indices(len(pnl), 1), confidence),
+            'block_bootstrap': block_summary,
+        })
+    return {
+        'samples': n_samples,
+        'confidence': confidence,
+        'seed': seed,
+        'combinations': combinations,
+        'seconds': round(time.time() - started, 3),
+    }
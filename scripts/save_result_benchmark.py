@@ -0,0 +1,117 @@
+"""Benchmark models.save_optimization_result: legacy per-row ORM adds vs bulk inserts.
+
+Each variant saves the same synthetic optimization (N trades) into a fresh SQLite file:
+
+  orm   - one TradeLog / PnLCurve object per row via db.session.add (previous implementation)
+  bulk  - Core executemany for trade_logs and pnl_curves (current default, 'rows' storage)
+  blob  - executemany for trade_logs, equity curve as one compressed array
+
+Usage:
+    python scripts/save_result_benchmark.py [--trades 5000] [--runs 3]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from flask import Flask  # noqa: E402
+from models import (db, init_db, OptimizationResult, TradeLog, PnLCurve,  # noqa: E402
+                    save_optimization_result, get_optimization_details)
+
+
+def make_app(db_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_db(app)
+    return app
+
+
+def make_run(n_trades, seed=0):
+    rng = random.Random(seed)
+    trades = []
+    for i in range(n_trades):
+        entry = 100 + rng.random() * 10
+        pnl = rng.gauss(0.1, 2.0)
+        trades.append({
+            'num': i + 1,
+            'side': rng.choice(['LONG', 'SHORT']),
+            'entry_price': entry,
+            'exit_price': entry * (1 + pnl / 100),
+            'exit_type': rng.choice(['SL', 'TS SL', 'EXIT']),
+            'pnl_pct': pnl,
+        })
+    result = {
+        'symbol': 'BENCHUSDT', 'timeframe': '30m', 'strategy': 'bench', 'engine': 'grid_search',
+        'criteria': 'pnl', 'parameters': {'sl': 2.0, 'be': 1.0, 'ts_trig': 1.5, 'ts_step': 0.5},
+        'total_pnl': sum(t['pnl_pct'] for t in trades), 'winrate': 50.0, 'total_trades': n_trades,
+        'win_count': 0, 'loss_count': 0, 'advanced_metrics': {}, 'iterations': 1,
+    }
+    return result, trades
+
+
+def save_orm(result_data, trades_data):
+    """The pre-bulk save_optimization_result, kept here for comparison"""
+    opt_result = OptimizationResult.create_from_result(result_data)
+    db.session.add(opt_result)
+    db.session.flush()
+    for trade in trades_data:
+        db.session.add(TradeLog.create_from_trade(opt_result.id, trade))
+    for point in PnLCurve.generate_from_trades(opt_result.id, trades_data):
+        db.session.add(point)
+    db.session.commit()
+    return opt_result
+
+
+VARIANTS = {
+    'orm': save_orm,
+    'bulk': lambda r, t: save_optimization_result(r, t, curve_storage='rows'),
+    'blob': lambda r, t: save_optimization_result(r, t, curve_storage='blob'),
+}
+
+
+def run_variant(name, n_trades, runs):
+    samples = []
+    curve = None
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'bench.db')
+            app = make_app(db_path)
+            result, trades = make_run(n_trades)
+            with app.app_context():
+                t0 = time.perf_counter()
+                saved = VARIANTS[name](result, trades)
+                samples.append(time.perf_counter() - t0)
+                curve = [round(p['cumulative_pnl'], 9) for p in get_optimization_details(saved.id)['pnl_curve']]
+                db.session.remove()
+                db.engine.dispose()
+            size = os.path.getsize(db_path)
+    return statistics.median(samples), size, curve
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trades', type=int, default=5000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"== save_optimization_result, {args.trades} trades, median of {args.runs} ==")
+    baseline = None
+    reference_curve = None
+    for name in VARIANTS:
+        seconds, size, curve = run_variant(name, args.trades, args.runs)
+        baseline = baseline or seconds
+        reference_curve = reference_curve or curve
+        same = 'same curve' if curve == reference_curve else 'CURVE MISMATCH'
+        print(f"{name:5s} {seconds * 1000:9.1f} ms  x{baseline / seconds:5.1f}  db {size / 1024:8.1f} KiB  {same}")
+
+
+if __name__ == '__main__':
+    main()
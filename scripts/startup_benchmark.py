@@ -0,0 +1,110 @@
+"""Measure web_app startup: import-time breakdown and time-to-first-request.
+
+Runs each measurement in a fresh interpreter so module caches don't skew results:
+
+  1. `python -X importtime -c "import web_app"` -> top modules by cumulative import time
+  2. import web_app + first GET /health via Flask's test client -> time-to-first-request
+
+Usage:
+    python scripts/startup_benchmark.py [--runs 3] [--top 15] [--budget-ms 1500]
+
+With --budget-ms the script exits non-zero when median time-to-first-request exceeds it.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+FIRST_REQUEST_SNIPPET = r'''
+import json, sys, time
+t0 = time.perf_counter()
+import web_app
+t1 = time.perf_counter()
+client = web_app.app.test_client()
+resp = client.get('/health')
+t2 = time.perf_counter()
+resp2 = client.get('/health')
+t3 = time.perf_counter()
+sys.stdout.write('\n__BENCH__' + json.dumps({
+    'import_ms': (t1 - t0) * 1000,
+    'first_request_ms': (t2 - t1) * 1000,
+    'second_request_ms': (t3 - t2) * 1000,
+    'time_to_first_request_ms': (t2 - t0) * 1000,
+    'status': resp.status_code,
+    'heavy_loaded': sorted(m for m in ('optuna', 'matplotlib', 'binance_fetcher') if m in sys.modules),
+}) + '\n')
+'''
+
+
+def _env():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = str(ROOT) + os.pathsep + env.get('PYTHONPATH', '')
+    env.setdefault('PYTHONIOENCODING', 'utf-8')
+    return env
+
+
+def import_profile(top):
+    """Return [(cumulative_us, self_us, module)] for the slowest imports of web_app"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import web_app'],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, encoding='utf-8', errors='replace'
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            _, self_us, cum_us, name = (part.strip() for part in line.replace('import time:', '|', 1).split('|'))
+            rows.append((int(cum_us), int(self_us), name))
+        except ValueError:
+            continue
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def first_request(runs):
+    samples = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, '-c', FIRST_REQUEST_SNIPPET],
+            cwd=ROOT, env=_env(), capture_output=True, text=True, encoding='utf-8', errors='replace'
+        )
+        marker = [ln for ln in proc.stdout.splitlines() if ln.startswith('__BENCH__')]
+        if proc.returncode != 0 or not marker:
+            print(proc.stdout[-2000:])
+            print(proc.stderr[-2000:])
+            raise SystemExit('startup benchmark run failed')
+        samples.append(json.loads(marker[-1][len('__BENCH__'):]))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--budget-ms', type=float, default=None)
+    args = parser.parse_args()
+
+    print("== Slowest imports (cumulative) for web_app ==")
+    for cum_us, self_us, name in import_profile(args.top):
+        print(f"{cum_us / 1000:9.1f} ms  (self {self_us / 1000:7.1f} ms)  {name}")
+
+    samples = first_request(args.runs)
+    ttfr = statistics.median(s['time_to_first_request_ms'] for s in samples)
+    print(f"\n== Time to first request over {args.runs} runs (median) ==")
+    for key in ('import_ms', 'first_request_ms', 'second_request_ms', 'time_to_first_request_ms'):
+        print(f"{key:26s} {statistics.median(s[key] for s in samples):9.1f} ms")
+    print(f"heavy modules loaded after first request: {samples[-1]['heavy_loaded'] or 'none'}")
+
+    if args.budget_ms is not None and ttfr > args.budget_ms:
+        print(f"\n❌ time-to-first-request {ttfr:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+"""
+Parameter Sensitivity Surface
+Bề mặt kết quả grid theo (sl, be, ts_trig, ts_step) - heatmap và độ ổn định tham số.
+
+Grid engines return a sorted list: the best cell wins even if every neighbour is much
+worse (a spike that will not survive small changes in the market). GridSurface puts
+the results back on the parameter lattice as one N-d array per metric (NaN where a
+cell was not evaluated, e.g. adaptive grid / NSGA-II) so that:
+
+- heatmap():     2D views over two parameters, the other axes reduced to their best
+                 value ('best'), averaged ('mean') or fixed at given values ('slice')
+- smoothness():  local scores from the 3^N - 1 neighbours of every cell (mean, worst
+                 neighbour, std): plateaus rank by the lower of a cell's value and its
+                 neighbourhood mean (good cell with good neighbours), spikes show up as
+                 a large gap between a cell and its neighbours; plus a global
+                 roughness (mean step between adjacent cells relative to the spread)
+
+Surfaces are stored as compressed npz blobs (axes + float32 arrays), not per-cell JSON.
+"""
+
+import io
+import itertools
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from pareto import PARETO_OBJECTIVES
+
+SURFACE_AXES = ('sl', 'be', 'ts_trig', 'ts_step')
+SURFACE_METRICS = ('pnl_total', 'winrate', 'pf', 'max_drawdown', 'sharpe_ratio', 'recovery_factor')
+HEATMAP_MODES = ('best', 'mean', 'slice')
+# Bump when the stored arrays change shape or meaning
+SURFACE_FORMAT = 1
+# result key -> higher is better
+HIGHER_IS_BETTER = {key: higher for key, higher in PARETO_OBJECTIVES.values()}
+
+
+def _json_values(array: np.ndarray) -> List:
+    """Nested lists with NaN / inf as None (jsonify would emit invalid JSON for them)"""
+    return np.where(np.isfinite(array), (np.round(array, 4) + 0.0).astype(object), None).tolist()
+
+
+def _json_number(value: float) -> Optional[float]:
+    """Rounded float, None for NaN / inf (e.g. a cell without evaluated neighbours)"""
+    value = float(value)
+    return round(value, 4) + 0.0 if np.isfinite(value) else None
+
+
+class GridSurface:
+    """One N-d array per metric over the parameter axes (NaN = cell not evaluated)"""
+
+    def __init__(self, axes: Dict[str, np.ndarray], values: Dict[str, np.ndarray]):
+        self.axes = {name: np.asarray(axes[name], dtype=float) for name in SURFACE_AXES}
+        self.values = values
+
+    @classmethod
+    def from_results(cls, results: Sequence[Dict], metrics: Sequence[str] = SURFACE_METRICS) -> 'GridSurface':
+        """Surface of grid-engine result dicts (sl, be, ts_trig, ts_step + metric keys)"""
+        axes = {name: np.unique(np.round([float(r[name]) for r in results], 6)) for name in SURFACE_AXES}
+        shape = tuple(len(axes[name]) for name in SURFACE_AXES)
+        position = tuple(np.searchsorted(axes[name], np.round([float(r[name]) for r in results], 6)) for name in SURFACE_AXES)
+        values = {}
+        for metric in metrics:
+            array = np.full(shape, np.nan, dtype=np.float32)
+            array[position] = [float(r.get(metric, np.nan)) for r in results]
+            values[metric] = array
+        return cls(axes, values)
+
+    @property
+    def shape(self):
+        return tuple(len(self.axes[name]) for name in SURFACE_AXES)
+
+    def evaluated(self) -> int:
+        return int((~np.isnan(next(iter(self.values.values())))).sum()) if self.values else 0
+
+    def _oriented(self, metric: str) -> np.ndarray:
+        """Metric array where higher is always better"""
+        values = self.values[metric].astype(float)
+        return values if HIGHER_IS_BETTER.get(metric, True) else -values
+
+    def _cell(self, index) -> Dict[str, float]:
+        return {name: float(self.axes[name][i]) for name, i in zip(SURFACE_AXES, index)}
+
+    def _axis_index(self, name: str, value: float) -> int:
+        return int(np.abs(self.axes[name] - float(value)).argmin())
+
+    # ---- heatmaps --------------------------------------------------------
+
+    def heatmap(self, metric: str = 'pnl_total', x: str = 'sl', y: str = 'be', mode: str = 'best',
+                at: Optional[Dict[str, float]] = None) -> Dict:
+        """
+        2D view of metric over parameters x and y; z[i][j] is y_values[i], x_values[j].
+        at: values of the other axes for mode 'slice' (nearest lattice value; default the
+            best cell's)
+        """
+        if metric not in self.values:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {list(self.values)}")
+        if x not in SURFACE_AXES or y not in SURFACE_AXES or x == y:
+            raise ValueError(f"x and y must be two different axes of {SURFACE_AXES}")
+        if mode not in HEATMAP_MODES:
+            raise ValueError(f"Unknown heatmap mode '{mode}', expected one of {HEATMAP_MODES}")
+        axis_x, axis_y = SURFACE_AXES.index(x), SURFACE_AXES.index(y)
+        others = tuple(i for i in range(len(SURFACE_AXES)) if i not in (axis_x, axis_y))
+        oriented = self._oriented(metric)
+        sign = 1.0 if HIGHER_IS_BETTER.get(metric, True) else -1.0
+        fixed = None
+        with np.errstate(all='ignore'):
+            if mode == 'slice':
+                best = self.best_cell(metric)
+                fixed = {SURFACE_AXES[i]: (at or {}).get(SURFACE_AXES[i], best[SURFACE_AXES[i]] if best else self.axes[SURFACE_AXES[i]][0])
+                         for i in others}
+                index = [slice(None)] * len(SURFACE_AXES)
+                for i in others:
+                    index[i] = self._axis_index(SURFACE_AXES[i], fixed[SURFACE_AXES[i]])
+                    fixed[SURFACE_AXES[i]] = float(self.axes[SURFACE_AXES[i]][index[i]])
+                plane = oriented[tuple(index)]
+                # remaining dimensions keep their original order (x/y may be swapped)
+                if axis_x < axis_y:
+                    plane = plane.T
+            else:
+                present = ~np.isnan(oriented)
+                count = present.sum(axis=others)
+                if mode == 'best':
+                    plane = np.where(present, oriented, -np.inf).max(axis=others)
+                else:
+                    plane = np.where(present, oriented, 0.0).sum(axis=others) / np.maximum(count, 1)
+                plane = np.where(count > 0, plane, np.nan)
+                if axis_x < axis_y:
+                    plane = plane.T
+        return {
+            'metric': metric,
+            'x': x,
+            'y': y,
+            'mode': mode,
+            'at': fixed,
+            'x_values': self.axes[x].tolist(),
+            'y_values': self.axes[y].tolist(),
+            'z': _json_values(sign * plane),
+        }
+
+    # ---- local stability -------------------------------------------------
+
+    def best_cell(self, metric: str) -> Optional[Dict[str, float]]:
+        oriented = self._oriented(metric)
+        if np.isnan(oriented).all():
+            return None
+        return self._cell(np.unravel_index(np.nanargmax(oriented), oriented.shape))
+
+    def top_cells(self, metric: str, limit: int = 5) -> List[Dict[str, float]]:
+        """Parameters of the best evaluated cells of metric, best first"""
+        oriented = self._oriented(metric)
+        order = np.argsort(-np.nan_to_num(oriented, nan=-np.inf), axis=None)[:max(0, limit)]
+        return [self._cell(np.unravel_index(i, oriented.shape)) for i in order if not np.isnan(oriented.flat[i])]
+
+    def neighborhood(self, metric: str):
+        """(mean, worst, std, count) of the evaluated neighbours of every cell (3^N box without
+        the cell itself), oriented higher-is-better"""
+        values = self._oriented(metric)
+        padded = np.pad(values, 1, constant_values=np.nan)
+        total = np.zeros(values.shape)
+        squares = np.zeros(values.shape)
+        count = np.zeros(values.shape)
+        worst = np.full(values.shape, np.inf)
+        for offset in itertools.product((0, 1, 2), repeat=values.ndim):
+            if all(o == 1 for o in offset):
+                continue
+            view = padded[tuple(slice(o, o + n) for o, n in zip(offset, values.shape))]
+            present = ~np.isnan(view)
+            filled = np.where(present, view, 0.0)
+            total += filled
+            squares += filled ** 2
+            count += present
+            worst = np.where(present, np.minimum(worst, view), worst)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+            std = np.sqrt(np.maximum(squares / np.maximum(count, 1) - mean ** 2, 0.0))
+        worst = np.where(np.isinf(worst), np.nan, worst)
+        return mean, worst, np.where(count > 0, std, np.nan), count
+
+    def roughness(self, metric: str) -> Optional[float]:
+        """Mean |step| between evaluated adjacent cells over all axes, relative to the metric std"""
+        values = self.values[metric].astype(float)
+        spread = np.nanstd(values) if (~np.isnan(values)).sum() > 1 else 0.0
+        steps = [np.abs(np.diff(values, axis=axis)) for axis in range(values.ndim) if values.shape[axis] > 1]
+        steps = np.concatenate([s[~np.isnan(s)] for s in steps]) if steps else np.empty(0)
+        if not len(steps) or not spread:
+            return None
+        return float(steps.mean() / spread)
+
+    def smoothness(self, metric: str = 'pnl_total', top: int = 5) -> Dict:
+        """
+        Plateau vs spike report of metric:
+        - best_cell:  highest value, its neighbourhood mean / worst neighbour and the spike
+                      (value minus neighbourhood mean, in the metric's better direction)
+        - plateaus:   cells with the best plateau score = min(value, neighbourhood mean), so
+                      neither a lone spike nor a weak cell next to one ranks high
+        - roughness / smoothness: 1 / (1 + roughness), 1.0 for a flat surface
+        """
+        sign = 1.0 if HIGHER_IS_BETTER.get(metric, True) else -1.0
+        oriented = self._oriented(metric)
+        mean, worst, std, count = self.neighborhood(metric)
+        # Cells without evaluated neighbours can't prove they sit on a plateau
+        plateau = np.where(count > 0, np.fmin(oriented, mean), np.nan)
+
+        def describe(index):
+            return {
+                'params': self._cell(index),
+                'value': _json_number(sign * oriented[index]),
+                'neighborhood_mean': _json_number(sign * mean[index]),
+                'worst_neighbor': _json_number(sign * worst[index]),
+                'neighborhood_std': _json_number(std[index]),
+                'neighbors': int(count[index]),
+                'spike': _json_number(oriented[index] - mean[index]),
+                'plateau_score': _json_number(sign * plateau[index]),
+            }
+
+        report = {'metric': metric, 'higher_is_better': sign > 0, 'best_cell': None, 'plateaus': []}
+        if not np.isnan(oriented).all():
+            report['best_cell'] = describe(np.unravel_index(np.nanargmax(oriented), oriented.shape))
+            order = np.argsort(-np.nan_to_num(plateau, nan=-np.inf), axis=None)[:max(1, top)]
+            report['plateaus'] = [describe(np.unravel_index(i, oriented.shape)) for i in order
+                                  if not np.isnan(plateau.flat[i])]
+        roughness = self.roughness(metric)
+        report['roughness'] = round(roughness, 4) if roughness is not None else None
+        report['smoothness'] = round(1 / (1 + roughness), 4) if roughness is not None else 1.0
+        return report
+
+    def summary(self, metric: str = 'pnl_total') -> Dict:
+        return {
+            'axes': {name: self.axes[name].tolist() for name in SURFACE_AXES},
+            'shape': list(self.shape),
+            'cells': int(np.prod(self.shape)),
+            'evaluated': self.evaluated(),
+            'metrics': list(self.values),
+            'smoothness': self.smoothness(metric),
+        }
+
+    # ---- storage ---------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            format=np.array([SURFACE_FORMAT]),
+            metrics=np.array(list(self.values)),
+            **{f'axis_{name}': self.axes[name] for name in SURFACE_AXES},
+            **{f'metric_{name}': array.astype(np.float32) for name, array in self.values.items()},
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> Optional['GridSurface']:
+        """Surface stored by to_bytes(), None if it was written in another format"""
+        data = np.load(io.BytesIO(blob))
+        if int(data['format'][0]) != SURFACE_FORMAT:
+            return None
+        axes = {name: data[f'axis_{name}'] for name in SURFACE_AXES}
+        values = {str(name): data[f'metric_{name}'] for name in data['metrics']}
+        return cls(axes, values)
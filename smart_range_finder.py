@@ -20,19 +20,26 @@ TS_TRIGGER_MIN = 2.5
 TS_STEP_FLOOR = 0.2
 
 class SmartRangeFinder:
-    def __init__(self, tradelist_path):
+    def __init__(self, tradelist_path, excursions=None):
         """
         Initialize Smart Range Finder
 
         Purpose: Find intelligent parameter ranges for efficient grid search
         NOTE: This implementation uses entry-based statistics (from entry records).
 
+        excursions: optional entry-trade DataFrame built from candles
+        (ExcursionProfile.to_tradelist_frame), used when the tradelist has no
+        run-up / drawdown columns or tradelist_path is None.
+
         Implementation notes:
         - Trailing-stop trigger (`TS_trigger`) is floored at `TS_TRIGGER_MIN` (percent) to avoid impractically small triggers.
         - Trailing-stop step (`TS_step`) uses a floor (`TS_STEP_FLOOR`) so step values are usable in real trading (e.g. 0.2%).
         """
         self.tradelist_path = tradelist_path
+        self.excursions = excursions
+        self.excursion_source = False
         self.df = None
+        self.runup_col = self.drawdown_col = self.pnl_col = self.type_col = None
         self.exit_trades = None  # kept for backward compatibility
         self.entry_trades = None
         self.range_analysis = {}
@@ -41,7 +48,7 @@ class SmartRangeFinder:
         self._analysis_warnings = []
 
         print("🎯 SMART RANGE FINDER (entry-based)")
-        print(f"Loading: {tradelist_path}")
+        print(f"Loading: {tradelist_path or 'candle excursion profile'}")
 
         # Load and validate data
         self._load_and_validate_data()
@@ -49,20 +56,14 @@ class SmartRangeFinder:
     def _load_and_validate_data(self):
         """Load and validate tradelist data with comprehensive error checking"""
         try:
-            self.df = pd.read_csv(self.tradelist_path)
-            print(f"✅ Loaded {len(self.df)} raw records")
-
-            # Clean column names for consistent access
-            orig_columns = list(self.df.columns)
-            clean_columns = [col.strip().lower().replace(' ', '_').replace('/', '_').replace('#', '').replace('&', '') for col in orig_columns]
-            self.df.columns = clean_columns
-
-            # Identify key columns with flexible naming
-            self.runup_col = self._find_key_column(['run_up_%', 'run-up_%', 'runup_%', 'max_favorable_%', 'runup'], 'Run-up')
-            self.drawdown_col = self._find_key_column(['drawdown_%', 'draw_down_%', 'max_adverse_%', 'drawdown'], 'Drawdown')
-            # PnL candidate detection (flexible)
-            self.pnl_col = self._find_key_column(['net_pnl_%', 'net_pl_%', 'pnl_%', 'p_l_%', 'pl_%', 'cumulative_p_l_%', 'netpnl'], 'P&L')
-            self.type_col = self._find_key_column(['type', 'signal_type', 'trade_type'], 'Type')
+            if self.tradelist_path:
+                self._set_frame(pd.read_csv(self.tradelist_path))
+                print(f"✅ Loaded {len(self.df)} raw records")
+            if self.excursions is not None and (self.df is None or not self.runup_col or not self.drawdown_col):
+                # No run-up / drawdown in the tradelist: MFE/MAE measured on the candles instead
+                self._set_frame(self.excursions.copy())
+                self.excursion_source = True
+                print(f"📐 Using candle excursion profile ({len(self.df)} trades) for run-up/drawdown")
 
             missing_cols = []
             if not self.runup_col: missing_cols.append('Run-up % column')
@@ -90,6 +91,21 @@ class SmartRangeFinder:
             self.validation_issues.append(msg)
             raise
 
+    def _set_frame(self, df):
+        """Use df as the tradelist and identify its key columns"""
+        self.df = df
+        # Clean column names for consistent access
+        orig_columns = list(self.df.columns)
+        clean_columns = [col.strip().lower().replace(' ', '_').replace('/', '_').replace('#', '').replace('&', '') for col in orig_columns]
+        self.df.columns = clean_columns
+
+        # Identify key columns with flexible naming
+        self.runup_col = self._find_key_column(['run_up_%', 'run-up_%', 'runup_%', 'max_favorable_%', 'runup'], 'Run-up')
+        self.drawdown_col = self._find_key_column(['drawdown_%', 'draw_down_%', 'max_adverse_%', 'drawdown'], 'Drawdown')
+        # PnL candidate detection (flexible)
+        self.pnl_col = self._find_key_column(['net_pnl_%', 'net_pl_%', 'pnl_%', 'p_l_%', 'pl_%', 'cumulative_p_l_%', 'netpnl'], 'P&L')
+        self.type_col = self._find_key_column(['type', 'signal_type', 'trade_type'], 'Type')
+
     def _find_key_column(self, patterns, column_name):
         if self.df is None:
             raise ValueError('DataFrame is None')
@@ -14,6 +14,16 @@ CUSTOM_TIMEFRAME_MAP = {
     '1d': '1d'
 }
 
+TIMEFRAME_MS = {
+    '1m': 60_000,
+    '5m': 300_000,
+    '15m': 900_000,
+    '30m': 1_800_000,
+    '1h': 3_600_000,
+    '4h': 14_400_000,
+    '1d': 86_400_000,
+}
+
 
 class BinanceFetcher:
     def __init__(self, rate_limit=True, **kwargs):
@@ -31,6 +41,10 @@ class BinanceFetcher:
             })
         # optional verbose flag
         self.verbose = bool(kwargs.get('verbose', False))
+        # request/retry counters, read by backfill() to journal each window
+        self.request_count = 0
+        self.retry_count = 0
+        self.last_error = None
 
     def _is_retryable(self, exc):
         # If ccxt types are not available, conservatively retry on generic network errors
@@ -44,6 +58,7 @@ class BinanceFetcher:
     def fetch_klines(self, symbol, timeframe='1m', since=None, limit=1000, max_retries=5):
         """Fetch klines from Binance (ccxt) starting from `since` (ms epoch) or latest `limit` candles.
         Returns pandas DataFrame with columns: ['timestamp','open','high','low','close','volume'] and timestamp in UTC datetime.
+        An empty frame is only a real (empty) page when last_error is None afterwards.
         """
         tf = CUSTOM_TIMEFRAME_MAP.get(timeframe, timeframe)
         all_rows = []
@@ -51,14 +66,17 @@ class BinanceFetcher:
         since_ms = int(since) if since is not None else None
         attempt = 0
         backoff = 1
+        self.last_error = None
         if self.exchange is None:
-            # ccxt not available in this environment
+            # ccxt not available in this environment; an error, not an empty history
+            self.last_error = RuntimeError("ccxt library not available")
             if self.verbose:
                 print("ccxt library not available; fetch_klines will return empty DataFrame")
             return pd.DataFrame(columns=['timestamp','open','high','low','close','volume'])
 
         while attempt < max_retries:
             try:
+                self.request_count += 1
                 fetched = self.exchange.fetch_ohlcv(symbol, timeframe=tf, since=since_ms, limit=limit)
                 df = pd.DataFrame(fetched, columns=['timestamp','open','high','low','close','volume'])
                 if not df.empty:
@@ -68,6 +86,7 @@ class BinanceFetcher:
                 return df
             except Exception as e:
                 attempt += 1
+                self.last_error = e
                 should_retry = self._is_retryable(e)
                 if self.verbose:
                     print(f"Fetch klines error for {symbol} {timeframe} (attempt {attempt}/{max_retries}): {e}")
@@ -81,6 +100,7 @@ class BinanceFetcher:
                     delay = min(backoff * jitter, 16)
                     if self.verbose:
                         print(f"Retrying in {delay:.2f}s (base {backoff}s, jitter {jitter:.2f})...")
+                    self.retry_count += 1
                     time.sleep(delay)
                     backoff = min(backoff * 2, 16)
         return pd.DataFrame(columns=['timestamp','open','high','low','close','volume'])
@@ -110,3 +130,116 @@ class BinanceFetcher:
                 print(f"Appended {appended} rows for {symbol} {tf}")
             results[tf] = appended
         return results
+
+    def backfill(self, session, symbol, timeframe, start_ms, end_ms=None, limit=1000, source='binance'):
+        """Backfill candles into the DB as a journaled FetchRun.
+
+        Each window of `limit` candles is written together with a FetchRunWindow row and
+        the run checkpoint in a single commit. If an unfinished run for the same
+        source/symbol/timeframe exists it is resumed from its checkpoint instead of
+        starting over. Returns the FetchRun.
+        """
+        from src import models
+
+        tf = CUSTOM_TIMEFRAME_MAP.get(timeframe, timeframe)
+        step_ms = TIMEFRAME_MS.get(tf)
+        if step_ms is None:
+            raise ValueError(f"Unsupported timeframe for backfill: {timeframe}")
+        if end_ms is None:
+            end_ms = int(pd.Timestamp.utcnow().timestamp() * 1000)
+
+        sym = session.query(models.Symbol).filter_by(name=symbol).one_or_none()
+        if sym is None:
+            sym = models.Symbol(name=symbol)
+            session.add(sym)
+            session.flush()
+
+        run = (session.query(models.FetchRun)
+               .filter_by(source=source, symbol=symbol, timeframe=tf)
+               .filter(models.FetchRun.status.in_(('running', 'failed')))
+               .order_by(models.FetchRun.id.desc())
+               .first())
+        if run is not None:
+            cursor = run.checkpoint_ms if run.checkpoint_ms is not None else run.range_start_ms
+            if self.verbose:
+                print(f"Resuming fetch run {run.id} for {symbol} {tf} from {cursor}")
+            run.status = 'running'
+            run.range_end_ms = max(run.range_end_ms or end_ms, end_ms)
+        else:
+            run = models.FetchRun(source=source, symbol=symbol, timeframe=tf, status='running',
+                                  range_start_ms=int(start_ms), range_end_ms=int(end_ms),
+                                  rows_written=0, request_count=0, retry_count=0, elapsed_seconds=0.0)
+            session.add(run)
+            cursor = int(start_ms)
+        session.commit()
+
+        while cursor < run.range_end_ms:
+            t0 = time.perf_counter()
+            req0, retry0 = self.request_count, self.retry_count
+            df = self.fetch_klines(symbol, timeframe=tf, since=cursor, limit=limit)
+            if df is None or df.empty:
+                if self.last_error is not None:
+                    # rate limited / network failure: leave run resumable at its checkpoint
+                    run.status = 'failed'
+                    run.notes = f"stopped at {cursor}: {self.last_error}"
+                    run.request_count += self.request_count - req0
+                    run.retry_count += self.retry_count - retry0
+                    run.elapsed_seconds += time.perf_counter() - t0
+                    session.commit()
+                    return run
+                # successful call, empty page: gap in exchange history (e.g. before listing), skip one window ahead
+                window_end = min(cursor + step_ms * limit, run.range_end_ms)
+                rows = []
+            else:
+                open_ms = (df['timestamp'] - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(milliseconds=1)
+                df = df.assign(_open_ms=open_ms)
+                df = df[(df['_open_ms'] >= cursor) & (df['_open_ms'] < run.range_end_ms)]
+                if df.empty:
+                    break
+                window_end = int(df['_open_ms'].max()) + step_ms
+                rows = df
+
+            written = 0
+            if len(rows):
+                times = [ts.to_pydatetime() for ts in rows['timestamp']]
+                existing = {
+                    (t if t.tzinfo else t.replace(tzinfo=timezone.utc)) for (t,) in session.query(models.Candle.open_time)
+                    .filter(models.Candle.symbol_id == sym.id, models.Candle.timeframe == tf,
+                            models.Candle.open_time >= times[0], models.Candle.open_time <= times[-1])
+                }
+                for ts, r in zip(times, rows.itertuples(index=False)):
+                    if ts in existing:
+                        continue
+                    session.add(models.Candle(
+                        symbol_id=sym.id, timeframe=tf, open_time=ts,
+                        close_time=ts + pd.Timedelta(milliseconds=step_ms - 1),
+                        open=r.open, high=r.high, low=r.low, close=r.close, volume=r.volume,
+                        fetch_run_id=run.id,
+                    ))
+                    written += 1
+
+            elapsed = time.perf_counter() - t0
+            window = models.FetchRunWindow(
+                fetch_run_id=run.id, window_start_ms=int(cursor), window_end_ms=int(window_end),
+                rows_written=written, request_count=self.request_count - req0,
+                retry_count=self.retry_count - retry0, elapsed_seconds=elapsed,
+            )
+            session.add(window)
+            run.checkpoint_ms = int(window_end)
+            run.rows_written += written
+            run.request_count += window.request_count
+            run.retry_count += window.retry_count
+            run.elapsed_seconds += elapsed
+            # candles, window row and checkpoint land atomically
+            session.commit()
+            if self.verbose:
+                print(f"Run {run.id}: committed window {cursor}-{window_end} ({written} rows)")
+            cursor = int(window_end)
+
+        run.status = 'completed'
+        run.finished_at = datetime.now(timezone.utc)
+        session.commit()
+        if self.verbose:
+            print(f"Run {run.id} completed: {run.rows_written} rows, {run.request_count} requests, "
+                  f"{run.retry_count} retries, {run.rows_per_second:.1f} rows/s")
+        return run
@@ -131,5 +131,39 @@ def update_config(key: str, value: str):
     typer.echo(f"Set config {key} = {value}")
 
 
+@app.command()
+def backfill(
+    symbol: str,
+    timeframe: str = typer.Option('1h', "--timeframe", help="Candle timeframe"),
+    days: int = typer.Option(730, "--days", help="How many days back to backfill"),
+    verbose: bool = typer.Option(False, "--verbose"),
+):
+    """Backfill candles as a journaled fetch run (resumes an unfinished run)."""
+    from datetime import datetime, timedelta, timezone
+    from src.binance_fetcher import BinanceFetcher
+
+    session = get_session()
+    models.Base.metadata.create_all(bind=session.get_bind())
+    end = datetime.now(timezone.utc)
+    start_ms = int((end - timedelta(days=days)).timestamp() * 1000)
+    run = BinanceFetcher(verbose=verbose).backfill(session, symbol, timeframe, start_ms, int(end.timestamp() * 1000))
+    typer.echo(f"Run {run.id} {run.status}: {run.rows_written} rows, {run.request_count} requests, "
+               f"{run.retry_count} retries, {run.rows_per_second:.1f} rows/s")
+    if run.status != 'completed':
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def list_fetch_runs(limit: int = typer.Option(20, "--limit")):
+    """List recent fetch runs with throughput stats."""
+    session = get_session()
+    models.Base.metadata.create_all(bind=session.get_bind())
+    runs = session.query(models.FetchRun).order_by(models.FetchRun.id.desc()).limit(limit).all()
+    for r in runs:
+        typer.echo(f"{r.id}\t{r.source}\t{r.symbol}\t{r.timeframe}\t{r.status}\t"
+                   f"rows={r.rows_written}\treq={r.request_count}\tretries={r.retry_count}\t"
+                   f"{r.rows_per_second:.1f} rows/s\tcheckpoint={r.checkpoint_ms}")
+
+
 if __name__ == '__main__':
     app()
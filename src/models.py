@@ -48,12 +48,55 @@ class FetchRun(Base):
     finished_at = sa.Column(sa.TIMESTAMP(timezone=True), nullable=True)
     source = sa.Column(sa.String(64), nullable=False)
     notes = sa.Column(sa.Text, nullable=True)
+    # Backfill journal: requested range (ms epoch) and last committed window end.
+    symbol = sa.Column(sa.String(128), nullable=True)
+    timeframe = sa.Column(sa.String(16), nullable=True)
+    status = sa.Column(sa.String(16), nullable=False, server_default='running')
+    range_start_ms = sa.Column(sa.BigInteger, nullable=True)
+    range_end_ms = sa.Column(sa.BigInteger, nullable=True)
+    checkpoint_ms = sa.Column(sa.BigInteger, nullable=True)
+    # Throughput counters, accumulated across resumes
+    rows_written = sa.Column(sa.BigInteger, nullable=False, server_default='0')
+    request_count = sa.Column(sa.Integer, nullable=False, server_default='0')
+    retry_count = sa.Column(sa.Integer, nullable=False, server_default='0')
+    elapsed_seconds = sa.Column(sa.Float, nullable=False, server_default='0')
     created_at = sa.Column(sa.TIMESTAMP(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False)
 
     candles = orm.relationship('Candle', back_populates='fetch_run', cascade='all, delete-orphan')
+    windows = orm.relationship('FetchRunWindow', back_populates='fetch_run', cascade='all, delete-orphan',
+                               order_by='FetchRunWindow.window_start_ms')
+
+    __table_args__ = (
+        sa.Index('ix_fetch_runs_source_symbol_tf', 'source', 'symbol', 'timeframe'),
+    )
+
+    @property
+    def rows_per_second(self):
+        if not self.elapsed_seconds:
+            return 0.0
+        return (self.rows_written or 0) / self.elapsed_seconds
+
+    def __repr__(self):
+        return f"<FetchRun(id={self.id}, source={self.source}, symbol={self.symbol}, status={self.status})>"
+
+
+class FetchRunWindow(Base):
+    """One committed window of a backfill; the run checkpoint advances with each row."""
+    __tablename__ = 'fetch_run_windows'
+    id = sa.Column(BIGINT_PK, primary_key=True, autoincrement=True)
+    fetch_run_id = sa.Column(sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), sa.ForeignKey('fetch_runs.id', ondelete='CASCADE'), nullable=False, index=True)
+    window_start_ms = sa.Column(sa.BigInteger, nullable=False)
+    window_end_ms = sa.Column(sa.BigInteger, nullable=False)
+    rows_written = sa.Column(sa.Integer, nullable=False, server_default='0')
+    request_count = sa.Column(sa.Integer, nullable=False, server_default='0')
+    retry_count = sa.Column(sa.Integer, nullable=False, server_default='0')
+    elapsed_seconds = sa.Column(sa.Float, nullable=False, server_default='0')
+    committed_at = sa.Column(sa.TIMESTAMP(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False)
+
+    fetch_run = orm.relationship('FetchRun', back_populates='windows')
 
     def __repr__(self):
-        return f"<FetchRun(id={self.id}, source={self.source})>"
+        return f"<FetchRunWindow(run={self.fetch_run_id}, start={self.window_start_ms}, end={self.window_end_ms})>"
 
 
 class Config(Base):
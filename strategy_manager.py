@@ -7,11 +7,16 @@ import os
 import re
 import pandas as pd
 import sqlite3
+import threading
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass
 from pathlib import Path
 import json
+from file_fingerprint import Fingerprint, FingerprintRegistry, hash_bytes
+
+# Content hashes of uploaded tradelists -> the strategy row they produced
+FINGERPRINT_NAMESPACE = 'tradelist_upload'
 
 @dataclass
 class StrategyInfo:
@@ -43,6 +48,7 @@ class StrategyManager:
         self.tradelist_dir = "tradelist"
         self.strategy_patterns = self._init_naming_patterns()
         self._init_database()
+        self._fingerprints = FingerprintRegistry(self.db_path)
     
     def _init_naming_patterns(self) -> List[Dict]:
         """Initialize các patterns để detect strategy info từ filename"""
@@ -324,6 +330,13 @@ class StrategyManager:
         if strategy_override:
             strategy_info.strategy_name = strategy_override.upper()
         
+        # 2b. Identical content already uploaded for this symbol/strategy: no-op
+        content_hash = hash_bytes(file_content.encode('utf-8'))
+        existing = self._find_unchanged_upload(content_hash, strategy_info)
+        if existing:
+            print(f"⏭️ Tradelist unchanged, reusing {existing.filename} ({existing.trade_count} trades)")
+            return existing
+        
         # 3. Load và analyze CSV data
         try:
             from io import StringIO
@@ -370,6 +383,13 @@ class StrategyManager:
         
         # 6. Store in database
         self._store_strategy_info(strategy_info)
+        st = os.stat(strategy_info.file_path)
+        self._fingerprints.record(
+            FINGERPRINT_NAMESPACE, strategy_info.file_path,
+            Fingerprint(st.st_size, st.st_mtime_ns, content_hash),
+            {'symbol': strategy_info.symbol, 'timeframe': strategy_info.timeframe,
+             'strategy_name': strategy_info.strategy_name, 'version': strategy_info.version}
+        )
         
         print(f"✅ Strategy uploaded: {organized_filename}")
         print(f"   Symbol: {strategy_info.symbol}")
@@ -379,6 +399,20 @@ class StrategyManager:
         
         return strategy_info
     
+    def _find_unchanged_upload(self, content_hash: str, strategy_info: StrategyInfo) -> Optional[StrategyInfo]:
+        """Return the stored strategy for byte-identical content with the same symbol/timeframe/strategy, if any"""
+        hit = self._fingerprints.find_by_hash(FINGERPRINT_NAMESPACE, content_hash)
+        if not hit:
+            return None
+        key = hit['extra']
+        if (key.get('symbol') != strategy_info.symbol or key.get('timeframe') != strategy_info.timeframe
+                or key.get('strategy_name') != strategy_info.strategy_name):
+            return None
+        existing = self.get_strategy(key['symbol'], key['timeframe'], key['strategy_name'], key.get('version'))
+        if existing is None or not os.path.exists(existing.file_path):
+            return None
+        return existing
+    
     def _generate_organized_filename(self, strategy_info: StrategyInfo) -> str:
         """Generate standardized filename"""
         return f"{strategy_info.symbol}_{strategy_info.timeframe}_{strategy_info.strategy_name}_{strategy_info.version}.csv"
@@ -697,12 +731,18 @@ class StrategyManager:
             
             return stats
 
-# Global instance
-strategy_manager = StrategyManager()
+# Global instance, created on first use so importing this module stays cheap
+_strategy_manager = None
+_strategy_manager_lock = threading.Lock()
 
 def get_strategy_manager() -> StrategyManager:
     """Get global strategy manager instance"""
-    return strategy_manager
+    global _strategy_manager
+    if _strategy_manager is None:
+        with _strategy_manager_lock:
+            if _strategy_manager is None:
+                _strategy_manager = StrategyManager()
+    return _strategy_manager
 
 if __name__ == "__main__":
     # Test the strategy manager
@@ -0,0 +1,156 @@
+"""
+Successive Halving over trade subsets
+Loại sớm các tổ hợp tham số kém chỉ sau một phần tradelist.
+
+Every parameter combination is first simulated on a small subset of the trade pairs;
+the best 1/eta are kept and simulated on a larger subset (only the trades they have
+not seen yet), and so on until the survivors have been simulated on the full
+tradelist. Survivors are then ranked exactly on all trades.
+
+Subsets are nested:
+- chronological: the first N trades (an earlier period decides who survives)
+- stratified:    N trades spread evenly over the whole tradelist
+
+The engine is independent of the simulator: callers pass an evaluate() that simulates
+a list of combinations on a list of trade indices (serially or with a process pool),
+a summarize() that turns per-trade details into a result dict and a score() to rank by.
+"""
+
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Fraction of survivors kept per rung is 1/HALVING_ETA
+HALVING_ETA = 3
+# Smallest subset a combination is judged on
+HALVING_MIN_TRADES = 20
+# Never cut below this many survivors (the UI shows the top 10)
+HALVING_MIN_SURVIVORS = 10
+HALVING_MODES = ('chronological', 'stratified')
+
+Combo = Tuple[float, float, float, float]
+
+
+def rung_sizes(n_trades: int, eta: int = HALVING_ETA, min_trades: int = HALVING_MIN_TRADES) -> List[int]:
+    """Subset sizes per rung, growing by eta and ending at the full tradelist"""
+    sizes = [n_trades]
+    while sizes[0] / eta >= min_trades:
+        sizes.insert(0, int(math.ceil(sizes[0] / eta)))
+    return sizes
+
+
+def rung_indices(n_trades: int, sizes: Sequence[int], mode: str = 'chronological') -> List[List[int]]:
+    """Nested, sorted trade indices of each rung"""
+    if mode not in HALVING_MODES:
+        raise ValueError(f"Unknown subset mode '{mode}', expected one of {HALVING_MODES}")
+    rungs, chosen = [], set()
+    for size in sizes:
+        if mode == 'chronological':
+            chosen = set(range(size))
+        else:
+            chosen |= set(np.linspace(0, n_trades - 1, size).round().astype(int).tolist())
+        rungs.append(sorted(chosen))
+    return rungs
+
+
+def survivors_per_rung(n_combos: int, n_rungs: int, eta: int = HALVING_ETA,
+                       min_survivors: int = HALVING_MIN_SURVIVORS) -> List[int]:
+    """Combinations evaluated on each rung"""
+    counts = [n_combos]
+    for _ in range(n_rungs - 1):
+        counts.append(min(counts[-1], max(min_survivors, int(math.ceil(counts[-1] / eta)))))
+    return counts
+
+
+def planned_evaluations(n_combos: int, n_trades: int, eta: int = HALVING_ETA, min_trades: int = HALVING_MIN_TRADES,
+                        min_survivors: int = HALVING_MIN_SURVIVORS) -> int:
+    """Combination evaluations successive_halving() plans over all rungs (its progress total)"""
+    eta = max(2, int(eta))
+    return sum(survivors_per_rung(n_combos, len(rung_sizes(n_trades, eta, min_trades)), eta, min_survivors))
+
+
+def successive_halving(combos: Sequence[Combo], n_trades: int,
+                       evaluate: Callable[[List[Combo], List[int]], List[Dict[int, Any]]],
+                       summarize: Callable[[Combo, List[Any]], Dict],
+                       score: Callable[[Dict], float],
+                       eta: int = HALVING_ETA, mode: str = 'chronological',
+                       min_trades: int = HALVING_MIN_TRADES, min_survivors: int = HALVING_MIN_SURVIVORS,
+                       deadline: Optional[float] = None,
+                       on_progress: Optional[Callable[[int, int], None]] = None,
+                       summarize_batch: Optional[Callable[[List[Combo], List[List[Any]]], List[Dict]]] = None
+                       ) -> Tuple[List[Dict], Dict]:
+    """
+    evaluate(combos, trade_indices) -> one {trade_index: detail or None} per combo
+    summarize(combo, details)       -> result dict, details in chronological order
+    score(result)                   -> higher is better
+    deadline:    time.time() after which no further rung is started
+    on_progress(done, total):       combination evaluations finished / planned
+    summarize_batch(combos, details_lists) -> result dicts, replaces summarize() with one
+                    call per rung (e.g. metrics of the whole rung as one matrix)
+
+    Returns (results of the last rung sorted by score, stats). When every rung ran
+    (stats['complete']) the results are exact full-tradelist results of the survivors.
+    """
+    eta = max(2, int(eta))
+    combos = list(dict.fromkeys(combos))
+    sizes = rung_sizes(n_trades, eta, min_trades)
+    rungs = rung_indices(n_trades, sizes, mode)
+    planned = survivors_per_rung(len(combos), len(rungs), eta, min_survivors)
+    total = sum(planned)
+
+    seen: Dict[Combo, Dict[int, Any]] = {combo: {} for combo in combos}
+    alive = combos
+    done = 0
+    results: List[Dict] = []
+    stats_rungs = []
+    for rung, (indices, keep) in enumerate(zip(rungs, planned)):
+        if rung > 0:
+            alive = [r['_combo'] for r in results[:keep]]
+            seen = {combo: seen[combo] for combo in alive}
+        started = time.time()
+        # Survivors already carry the trades of earlier rungs: simulate only the new ones
+        new_indices = [i for i in indices if i not in seen[alive[0]]] if alive else []
+        ordered = []
+        for combo, details in zip(alive, evaluate(alive, new_indices)):
+            seen[combo].update(details)
+            ordered.append([seen[combo][i] for i in sorted(seen[combo]) if seen[combo][i] is not None])
+        if summarize_batch is not None:
+            results = summarize_batch(alive, ordered)
+        else:
+            results = [summarize(combo, details) for combo, details in zip(alive, ordered)]
+        for combo, result in zip(alive, results):
+            result['_combo'] = combo
+        results.sort(key=score, reverse=True)
+        done += len(alive)
+        if on_progress:
+            on_progress(done, total)
+        stats_rungs.append({
+            'trades': len(indices),
+            'combinations': len(alive),
+            'new_trades_simulated': len(new_indices),
+            'seconds': round(time.time() - started, 3),
+        })
+        print(f"✂️ Halving rung {rung + 1}/{len(rungs)}: {len(alive)} combinations x {len(indices)} trades "
+              f"({len(new_indices)} new) in {stats_rungs[-1]['seconds']}s")
+        if deadline is not None and time.time() > deadline and rung < len(rungs) - 1:
+            print(f"⏱️ Successive halving deadline reached after rung {rung + 1}/{len(rungs)}")
+            break
+
+    for result in results:
+        result.pop('_combo', None)
+    full_simulations = len(combos) * n_trades
+    simulations = sum(r['combinations'] * r['new_trades_simulated'] for r in stats_rungs)
+    stats = {
+        'mode': mode,
+        'eta': eta,
+        'combinations': len(combos),
+        'survivors': len(results),
+        'complete': len(stats_rungs) == len(rungs),
+        'rungs': stats_rungs,
+        'trade_simulations': simulations,
+        'full_grid_trade_simulations': full_simulations,
+        'saved_pct': round((1 - simulations / full_simulations) * 100, 2) if full_simulations else 0.0,
+    }
+    return results, stats
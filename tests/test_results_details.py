@@ -0,0 +1,22 @@
+import numpy as np
+
+from results_manager import decode_details, encode_details
+
+
+def test_details_round_trip_is_lossless():
+    details = [
+        {'pnl': 1.5, 'mix': 1, 'bars': 3, 'win': True, 'side': 'long', 'note': None, 'only_first': 'x'},
+        {'pnl': -0.5, 'mix': 2.25, 'bars': None, 'win': False, 'side': 'short', 'note': 'stop'},
+        {'pnl': np.float64(0.0), 'mix': np.int64(7), 'bars': 5, 'win': None, 'side': 'long', 'note': None,
+         'only_last': 2},
+    ]
+    decoded = decode_details(encode_details(details))
+    expected = [{k: (v.item() if hasattr(v, 'item') else v) for k, v in trade.items()} for trade in details]
+    assert decoded == expected
+    # ints of a mixed int/float column keep their type, fields stay absent where they were
+    assert [type(trade['mix']) for trade in decoded] == [int, float, int]
+    assert 'only_first' not in decoded[1] and 'only_last' not in decoded[0]
+
+
+def test_empty_details_round_trip():
+    assert decode_details(encode_details([])) == []
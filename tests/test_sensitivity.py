@@ -0,0 +1,21 @@
+import json
+
+from sensitivity import GridSurface
+
+
+def _result(sl, be, ts_trig, ts_step, pnl_total):
+    return {'sl': sl, 'be': be, 'ts_trig': ts_trig, 'ts_step': ts_step, 'pnl_total': pnl_total,
+            'winrate': 50.0, 'pf': float('inf'), 'max_drawdown': 1.0, 'sharpe_ratio': 0.0, 'recovery_factor': 0.0}
+
+
+def test_isolated_cell_summary_is_valid_json():
+    # One-combination grid: the best cell has no evaluated neighbours
+    surface = GridSurface.from_results([_result(1.0, 2.0, 3.0, 4.0, 5.0)])
+    summary = surface.summary('pnl_total')
+    best = summary['smoothness']['best_cell']
+    assert best['value'] == 5.0
+    assert best['neighbors'] == 0
+    for key in ('neighborhood_mean', 'worst_neighbor', 'neighborhood_std', 'spike', 'plateau_score'):
+        assert best[key] is None
+    json.dumps(summary, allow_nan=False)
+    json.dumps(surface.heatmap('pf', 'sl', 'be'), allow_nan=False)
@@ -0,0 +1,149 @@
+"""
+Vectorized Trade Metrics
+Tính chỉ số hiệu suất cho cả ma trận kết quả (tổ hợp x lệnh) bằng NumPy.
+
+Input is a (combinations x trades) float matrix of per-trade PnL % in trade order.
+Rows may have different trade counts: pnl_matrix() pads them with NaN at the end and
+NaN entries are ignored. compute_metrics() returns one structured-array record per
+row with the metrics the grid engines and the baseline report use:
+
+    trades, win_trades, loss_trades, pnl_total, winrate, pf, gross_profit, gross_loss,
+    avg_trade, max_drawdown, avg_win, avg_loss, max_consecutive_wins,
+    max_consecutive_losses, sharpe_ratio, recovery_factor
+
+Conventions (unchanged from the former per-combination loops):
+- a win is PnL > 0, everything else (including 0) is a loss
+- pf = gross profit / gross loss; inf without losses but with profit; 0 otherwise
+- max drawdown is measured on cumulative PnL, peak starting at the first trade
+- sharpe = mean / sample std (ddof=1), 0 for fewer than 2 trades or zero std
+- recovery = total PnL / max drawdown; inf without drawdown but with profit; 0 otherwise
+"""
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+METRIC_FIELDS = [
+    ('trades', 'i8'),
+    ('win_trades', 'i8'),
+    ('loss_trades', 'i8'),
+    ('pnl_total', 'f8'),
+    ('winrate', 'f8'),
+    ('pf', 'f8'),
+    ('gross_profit', 'f8'),
+    ('gross_loss', 'f8'),
+    ('avg_trade', 'f8'),
+    ('max_drawdown', 'f8'),
+    ('avg_win', 'f8'),
+    ('avg_loss', 'f8'),
+    ('max_consecutive_wins', 'i8'),
+    ('max_consecutive_losses', 'i8'),
+    ('sharpe_ratio', 'f8'),
+    ('recovery_factor', 'f8'),
+]
+METRICS_DTYPE = np.dtype(METRIC_FIELDS)
+
+# Metrics calculate_advanced_metrics() reports as 0 for rows whose trades are all flat
+_FLAT_ZEROED = ('max_drawdown', 'avg_win', 'avg_loss', 'max_consecutive_wins',
+                'max_consecutive_losses', 'sharpe_ratio', 'recovery_factor')
+
+
+def pnl_matrix(rows: Sequence[Sequence[float]]) -> np.ndarray:
+    """Per-trade PnL rows (ragged allowed) as a NaN-padded (rows x max trades) matrix"""
+    width = max((len(row) for row in rows), default=0)
+    matrix = np.full((len(rows), width), np.nan)
+    for i, row in enumerate(rows):
+        matrix[i, :len(row)] = row
+    return matrix
+
+
+def details_pnl_matrix(details_list: Sequence[Sequence[Dict]]) -> np.ndarray:
+    """pnl_matrix of simulated trade details (the 'pnlPct' of each trade)"""
+    return pnl_matrix([[trade['pnlPct'] for trade in details] for details in details_list])
+
+
+def _longest_run(flags: np.ndarray) -> np.ndarray:
+    """Longest run of True per row"""
+    if flags.shape[1] == 0:
+        return np.zeros(flags.shape[0], dtype='i8')
+    counts = np.cumsum(flags, axis=1)
+    # count reached at the last False so far: subtracting it restarts the run
+    resets = np.maximum.accumulate(np.where(flags, 0, counts), axis=1)
+    return (counts - resets).max(axis=1)
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """numerator / denominator; inf when denominator is 0 and numerator > 0, else 0"""
+    safe = np.where(denominator > 0, denominator, 1.0)
+    return np.where(denominator > 0, numerator / safe, np.where(numerator > 0, np.inf, 0.0))
+
+
+def compute_metrics(pnl: np.ndarray, flat_as_empty: bool = False) -> np.ndarray:
+    """
+    Metrics of every row of a (combinations x trades) PnL % matrix, as a structured
+    array of METRICS_DTYPE.
+
+    flat_as_empty: rows whose trades all have 0 PnL report 0 drawdown/averages/streaks/
+    ratios (the calculate_advanced_metrics convention) instead of one long loss streak.
+    """
+    pnl = np.atleast_2d(np.asarray(pnl, dtype=float))
+    valid = ~np.isnan(pnl)
+    values = np.where(valid, pnl, 0.0)
+    wins = valid & (pnl > 0)
+    losses = valid & (pnl <= 0)
+
+    out = np.zeros(pnl.shape[0], dtype=METRICS_DTYPE)
+    trades = valid.sum(axis=1)
+    win_trades = wins.sum(axis=1)
+    loss_trades = losses.sum(axis=1)
+    pnl_total = values.sum(axis=1)
+    gross_profit = np.where(wins, values, 0.0).sum(axis=1)
+    loss_total = np.where(losses, values, 0.0).sum(axis=1)
+    gross_loss = -loss_total
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_trade = np.where(trades > 0, pnl_total / np.maximum(trades, 1), 0.0)
+        cumulative = np.cumsum(values, axis=1)
+        max_drawdown = (np.maximum.accumulate(cumulative, axis=1) - cumulative).max(axis=1, initial=0.0)
+        deviations = np.where(valid, values - avg_trade[:, None], 0.0)
+        std = np.sqrt((deviations ** 2).sum(axis=1) / np.maximum(trades - 1, 1))
+        sharpe = np.where((trades > 1) & (std > 0), avg_trade / np.where(std > 0, std, 1.0), 0.0)
+
+    out['trades'] = trades
+    out['win_trades'] = win_trades
+    out['loss_trades'] = loss_trades
+    out['pnl_total'] = pnl_total
+    out['winrate'] = np.where(trades > 0, win_trades / np.maximum(trades, 1) * 100, 0.0)
+    out['pf'] = _ratio(gross_profit, gross_loss)
+    out['gross_profit'] = gross_profit
+    out['gross_loss'] = gross_loss
+    out['avg_trade'] = avg_trade
+    out['max_drawdown'] = max_drawdown
+    out['avg_win'] = np.where(win_trades > 0, gross_profit / np.maximum(win_trades, 1), 0.0)
+    out['avg_loss'] = np.where(loss_trades > 0, loss_total / np.maximum(loss_trades, 1), 0.0)
+    out['max_consecutive_wins'] = _longest_run(wins)
+    out['max_consecutive_losses'] = _longest_run(losses)
+    out['sharpe_ratio'] = sharpe
+    out['recovery_factor'] = _ratio(pnl_total, max_drawdown)
+
+    if flat_as_empty:
+        flat = ~(valid & (pnl != 0)).any(axis=1)
+        for name in _FLAT_ZEROED:
+            out[name][flat] = 0
+    return out
+
+
+def metrics_dict(record) -> Dict[str, Any]:
+    """One compute_metrics() record as plain Python numbers"""
+    return {name: record[name].item() for name in METRICS_DTYPE.names}
+
+
+def series_metrics(pnl_list: Sequence[float], flat_as_empty: bool = False) -> Dict[str, Any]:
+    """Metrics of a single PnL % series"""
+    return metrics_dict(compute_metrics(pnl_matrix([list(pnl_list)]), flat_as_empty)[0])
+
+
+def details_metrics(details_list: Sequence[Sequence[Dict]], flat_as_empty: bool = False) -> List[Dict[str, Any]]:
+    """Metrics dict per list of simulated trade details, computed in one pass"""
+    if not details_list:
+        return []
+    return [metrics_dict(record) for record in compute_metrics(details_pnl_matrix(details_list), flat_as_empty)]
@@ -0,0 +1,262 @@
+"""
+Walk-Forward Optimization
+Tối ưu trên cửa sổ in-sample, kiểm tra trên cửa sổ out-of-sample kế tiếp.
+
+Optimizing SL/BE/TS on the whole tradelist measures how well the parameters fit the
+past, not how they would have traded. Walk-forward splits the trade pairs by entry
+date into folds + in_sample_periods periods of equal duration; fold k picks the best
+combination on its in-sample window and is scored on the following period:
+
+    rolling:  IS = periods k .. k+in_sample_periods-1,  OOS = period k+in_sample_periods
+    anchored: IS = periods 0 .. k+in_sample_periods-1,  OOS = period k+in_sample_periods
+
+Windows overlap but a combination's result on one trade is the same in every window
+containing it. Each trade is therefore simulated once per combination (trade chunks in
+parallel processes that receive the candles once through the pool initializer, cells
+already in the combo cache are not simulated at all) into a (combinations x trades)
+PnL matrix; a fold only slices its columns and ranks them with trade_metrics.
+
+Reported per fold: best parameters, in-sample and out-of-sample metrics and the
+walk-forward efficiency (OOS PnL per period / IS PnL per period). Over all folds: the
+chained out-of-sample metrics and the stability of each chosen parameter.
+"""
+
+import math
+import multiprocessing
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from pareto import PARETO_OBJECTIVES
+from trade_metrics import compute_metrics, metrics_dict
+
+WF_FOLDS = 4
+WF_IN_SAMPLE_PERIODS = 3
+WF_PARAMS = ('sl', 'be', 'ts_trig', 'ts_step')
+
+Combo = Tuple[float, float, float, float]
+
+
+def _entry_ns(pairs: Sequence[Dict]) -> np.ndarray:
+    return pd.to_datetime(pd.Series([pair['entryDt'] for pair in pairs])).values.astype('datetime64[ns]').view('int64')
+
+
+def walk_forward_folds(pairs: Sequence[Dict], folds: int = WF_FOLDS, in_sample_periods: int = WF_IN_SAMPLE_PERIODS,
+                       anchored: bool = False) -> List[Dict]:
+    """
+    Fold windows over the entry dates of pairs:
+    {'fold', 'in_sample': [trade indices], 'out_of_sample': [...], 'in_sample_periods',
+     'is_start', 'is_end', 'oos_start', 'oos_end'} (dates as ISO strings)
+
+    Folds without in-sample or out-of-sample trades are left out.
+    """
+    folds, in_sample_periods = max(1, int(folds)), max(1, int(in_sample_periods))
+    if not pairs:
+        return []
+    times = _entry_ns(pairs)
+    n_periods = folds + in_sample_periods
+    start, end = int(times.min()), int(times.max())
+    span = max(end - start, 1)
+    period = np.minimum(((times - start) / span * n_periods).astype(int), n_periods - 1)
+    bounds = [pd.Timestamp(start + span * p // n_periods).floor('s').isoformat() for p in range(n_periods)]
+    bounds.append(pd.Timestamp(end).floor('s').isoformat())
+
+    windows = []
+    for k in range(folds):
+        first = 0 if anchored else k
+        test = k + in_sample_periods
+        in_sample = np.flatnonzero((period >= first) & (period < test)).tolist()
+        out_of_sample = np.flatnonzero(period == test).tolist()
+        if not in_sample or not out_of_sample:
+            continue
+        windows.append({
+            'fold': k + 1,
+            'in_sample': in_sample,
+            'out_of_sample': out_of_sample,
+            'in_sample_periods': test - first,
+            'is_start': bounds[first],
+            'is_end': bounds[test],
+            'oos_start': bounds[test],
+            'oos_end': bounds[test + 1],
+        })
+    return windows
+
+
+def _json_metrics(record) -> Dict:
+    """metrics_dict() with non-finite ratios (e.g. pf without losses) as None"""
+    return {k: (None if isinstance(v, float) and not math.isfinite(v) else v) for k, v in metrics_dict(record).items()}
+
+
+def _stability(chosen: List[Combo]) -> Dict:
+    """Spread of every chosen parameter across folds (cv = std / |mean|)"""
+    report = {}
+    for position, name in enumerate(WF_PARAMS):
+        values = np.array([combo[position] for combo in chosen], dtype=float)
+        mean, std = float(values.mean()), float(values.std())
+        report[name] = {
+            'values': values.tolist(),
+            'mean': round(mean, 4),
+            'std': round(std, 4),
+            'cv': round(std / abs(mean), 4) if mean else None,
+            'min': float(values.min()),
+            'max': float(values.max()),
+        }
+    report['changes'] = sum(1 for a, b in zip(chosen, chosen[1:]) if a != b)
+    return report
+
+
+def evaluate_folds(combos: Sequence[Combo], pnl: np.ndarray, windows: List[Dict], opt_type: str = 'pnl') -> Dict:
+    """
+    combos:  (sl, be, ts_trig, ts_step) of every row of pnl
+    pnl:     (combinations x trades) PnL % matrix in trade order, NaN for skipped trades
+    windows: walk_forward_folds() output
+    opt_type: in-sample ranking, same vocabulary as the grid engines (pnl, winrate, pf,
+              sharpe, recovery, drawdown)
+    """
+    metric, higher = PARETO_OBJECTIVES.get(opt_type, ('pnl_total', True))
+    folds, chosen, oos_series, efficiencies = [], [], [], []
+    for window in windows:
+        in_sample = compute_metrics(pnl[:, window['in_sample']])
+        values = in_sample[metric] if higher else -in_sample[metric]
+        best = int(np.argmax(values))
+        oos_pnl = pnl[best, window['out_of_sample']]
+        out_of_sample = compute_metrics(oos_pnl[None, :])[0]
+        is_per_period = float(in_sample[best]['pnl_total']) / window['in_sample_periods']
+        efficiency = round(float(out_of_sample['pnl_total']) / is_per_period, 4) if is_per_period > 0 else None
+        if efficiency is not None:
+            efficiencies.append(efficiency)
+        chosen.append(tuple(combos[best]))
+        oos_series.append(oos_pnl)
+        folds.append({
+            'fold': window['fold'],
+            'is_start': window['is_start'], 'is_end': window['is_end'],
+            'oos_start': window['oos_start'], 'oos_end': window['oos_end'],
+            'params': {name: float(value) for name, value in zip(WF_PARAMS, combos[best])},
+            'in_sample': _json_metrics(in_sample[best]),
+            'out_of_sample': _json_metrics(out_of_sample),
+            'efficiency': efficiency,
+        })
+    report = {'opt_type': opt_type, 'folds': folds}
+    if folds:
+        report['out_of_sample'] = _json_metrics(compute_metrics(np.concatenate(oos_series)[None, :])[0])
+        report['efficiency'] = round(float(np.mean(efficiencies)), 4) if efficiencies else None
+        report['parameter_stability'] = _stability(chosen)
+    return report
+
+
+def _trade_chunks(indices: List[int], n_chunks: int) -> List[List[int]]:
+    return [chunk.tolist() for chunk in np.array_split(np.array(indices, dtype=int), max(1, n_chunks)) if len(chunk)]
+
+
+def walk_forward_matrix(pairs: List[Dict], df_candle: pd.DataFrame, combos: Sequence[Combo],
+                        processes: int = 1, use_cache: bool = True, deadline: Optional[float] = None,
+                        on_progress: Optional[Callable[[int, int], None]] = None) -> Tuple[np.ndarray, Dict]:
+    """
+    (combinations x trades) PnL % matrix of combos on every trade pair.
+
+    Cells in the combo cache are read back; the others are simulated once per trade in
+    contiguous trade chunks (processes > 1: a pool whose workers get pairs, candles and
+    excursions once) and stored as full cells. on_progress(trades done, trades total).
+    Stats report 'complete': False when the deadline stopped the simulation.
+    """
+    from backtest_gridsearch_slbe_ts_Version3 import DominanceSimulator, init_window_worker, simulate_window
+    from excursion_profile import get_excursion_profile
+
+    combos = [tuple(combo) for combo in combos]
+    excursions = get_excursion_profile(pairs, df_candle, use_cache).excursions
+    valid = [i for i, excursion in enumerate(excursions) if excursion is not None]
+    pnl = np.full((len(combos), len(pairs)), np.nan)
+    row_of = {combo: row for row, combo in enumerate(combos)}
+
+    combo_cache = None
+    if use_cache:
+        try:
+            from optimization_cache import ComboCacheSession
+            combo_cache = ComboCacheSession(pairs, df_candle)
+            combo_cache.preload(combos)
+        except Exception as e:
+            print(f"⚠️ Combo cache unavailable: {e}")
+            combo_cache = None
+
+    missing = []
+    for combo in combos:
+        details = combo_cache.get(*combo) if combo_cache else None
+        # Cached cells hold the non-skipped trades in order: they line up with valid
+        if details is not None and len(details) == len(valid):
+            pnl[row_of[combo], valid] = [trade['pnlPct'] for trade in details]
+        else:
+            missing.append(combo)
+
+    stats = {
+        'combinations': len(combos),
+        'cached_combinations': len(combos) - len(missing),
+        'trade_simulations': len(missing) * len(valid),
+        'processes': 1,
+        'complete': True,
+    }
+    if not missing or not valid:
+        return pnl, stats
+
+    processes = max(1, min(int(processes or 1), len(valid)))
+    chunks = _trade_chunks(valid, processes * 2 if processes > 1 else 1)
+    total = len(missing) * len(valid)
+    done = 0
+    simulated = {combo: {} for combo in missing}
+    pool = multiprocessing.Pool(processes, initializer=init_window_worker,
+                                initargs=(pairs, df_candle, excursions)) if processes > 1 else None
+    if pool:
+        stats['processes'] = processes
+        iterator = pool.imap_unordered(simulate_window, [(missing, chunk) for chunk in chunks])
+    else:
+        dominance = DominanceSimulator(pairs, df_candle, excursions)
+        iterator = ([{i: dominance.simulate(i, *combo) for i in chunk} for combo in missing] for chunk in chunks)
+    try:
+        for window_results in iterator:
+            for combo, results in zip(missing, window_results):
+                simulated[combo].update(results)
+                row = row_of[combo]
+                for i, result in results.items():
+                    if result is not None:
+                        pnl[row, i] = result['pnlPct']
+                done += len(results)
+            if on_progress:
+                on_progress(done, total)
+            if deadline is not None and time.time() > deadline and done < total:
+                print(f"⏱️ Walk-forward deadline reached after {done}/{total} trade simulations")
+                stats['complete'] = False
+                break
+    finally:
+        if pool:
+            pool.terminate()
+            pool.join()
+
+    if combo_cache and stats['complete']:
+        try:
+            for combo, results in simulated.items():
+                combo_cache.add(*combo, [results[i] for i in sorted(results) if results[i] is not None])
+            combo_cache.flush()
+        except Exception as e:
+            print(f"⚠️ Could not store combo cache: {e}")
+    return pnl, stats
+
+
+def run_walk_forward(pairs: List[Dict], df_candle: pd.DataFrame, combos: Sequence[Combo], opt_type: str = 'pnl',
+                     folds: int = WF_FOLDS, in_sample_periods: int = WF_IN_SAMPLE_PERIODS, anchored: bool = False,
+                     processes: int = 1, use_cache: bool = True, deadline: Optional[float] = None,
+                     on_progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """Walk-forward report of combos over pairs (folds empty when the deadline cut the simulation)"""
+    started = time.time()
+    combos = list(dict.fromkeys(tuple(combo) for combo in combos))
+    windows = walk_forward_folds(pairs, folds, in_sample_periods, anchored)
+    pnl, stats = walk_forward_matrix(pairs, df_candle, combos, processes, use_cache, deadline, on_progress)
+    report = evaluate_folds(combos, pnl, windows, opt_type) if stats['complete'] else {'opt_type': opt_type, 'folds': []}
+    report.update({
+        'mode': 'anchored' if anchored else 'rolling',
+        'requested_folds': int(folds),
+        'in_sample_periods': int(in_sample_periods),
+        'simulation': stats,
+        'seconds': round(time.time() - started, 3),
+    })
+    return report
@@ -1,7 +1,7 @@
 ﻿# === API: Data Management Dashboard ===
 
 import sqlite3
-from flask import Flask, render_template, request, jsonify, send_file, send_from_directory, make_response
+from flask import Flask, render_template, request, jsonify, send_file, send_from_directory, make_response, Response, stream_with_context
 
 # Flask app initialization
 app = Flask(__name__)
@@ -108,7 +108,7 @@ except Exception:
     # If reconfigure is not available, set PYTHONIOENCODING environment fallback
     os.environ.setdefault('PYTHONIOENCODING', 'utf-8')
 
-from flask import Flask, render_template, request, jsonify, send_file, send_from_directory, make_response
+from flask import Flask, render_template, request, jsonify, send_file, send_from_directory, make_response, Response, stream_with_context
 import pandas as pd
 import numpy as np
 import json
@@ -116,7 +116,10 @@ import io
 import base64
 import math
 import random
+import time
+import itertools
 import tempfile
+import uuid
 import os
 import sqlite3
 
@@ -182,17 +185,22 @@ def validate_optuna_trials(user_input, default=DEFAULT_OPTUNA_TRIALS):
 import traceback
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-import optuna
 import threading
 from src.tradelist_manager import TradelistManager
 from data_manager import DataManager, get_data_manager
 from results_manager import ResultsManager, get_results_manager
 from strategy_manager import StrategyManager, get_strategy_manager
-
-# Data management imports
+from optimization_jobs import get_job_queue, wants_async, RequestSnapshot, QueueFullError, compute_eta, progress_stream
+from successive_halving import successive_halving, rung_sizes, survivors_per_rung, HALVING_ETA, HALVING_MODES
+from trade_metrics import series_metrics, details_metrics
+from pareto import PARETO_OBJECTIVES, DEFAULT_PARETO_OBJECTIVES, parse_objectives, pareto_front
+from walk_forward import run_walk_forward, WF_FOLDS, WF_IN_SAMPLE_PERIODS
+from robustness import robustness_report, ROBUSTNESS_SAMPLES, ROBUSTNESS_TOP_K, ROBUSTNESS_CONFIDENCE
+from sensitivity import GridSurface, SURFACE_AXES
+
+# Data management imports (the Binance fetcher is imported on first use, see WebDataManager)
 try:
     from csv_to_db import migrate_csv_to_db, show_database_status
-    from binance_fetcher import BinanceFetcher
     from candlestick_db import init_db as init_candle_db
     DATA_MANAGEMENT_AVAILABLE = True
 except ImportError as e:
@@ -205,7 +213,7 @@ _advanced_import_error = None
 try:
     # Try package import first (preferred if module is inside web_backtest package)
     from web_backtest.backtest_gridsearch_slbe_ts_Version3 import (
-        simulate_trade, grid_search_parallel,
+        simulate_trade, grid_search_parallel, DominanceSimulator,
         load_trade_csv as load_trade_csv_file,
         load_candle_csv as load_candle_csv_file,
         get_trade_pairs as get_trade_pairs_file
@@ -216,7 +224,7 @@ except Exception as e_pkg:
     try:
         # Fallback to top-level module if package import failed
         from backtest_gridsearch_slbe_ts_Version3 import (
-            simulate_trade, grid_search_parallel,
+            simulate_trade, grid_search_parallel, DominanceSimulator,
             load_trade_csv as load_trade_csv_file,
             load_candle_csv as load_candle_csv_file,
             get_trade_pairs as get_trade_pairs_file
@@ -230,6 +238,8 @@ except Exception as e_pkg:
         ADVANCED_MODE = False
 
         # Fallback functions
+        DominanceSimulator = None
+
         def simulate_trade(*args, **kwargs):
             return None, ["MÃ´ phá»ng nÃ¢ng cao khÃ´ng kháº£ dá»¥ng"]
 
@@ -290,26 +300,40 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
     'pool_pre_ping': True
 }
 
-# Initialize Database
-from models import init_db, db, OptimizationResult, TradeLog, PnLCurve
+# Initialize Database (tables are created on the first request, see _deferred_startup)
+from models import init_db, create_tables_for, db, OptimizationResult, TradeLog, PnLCurve
 from models import save_optimization_result, get_optimization_results, get_optimization_details, export_optimization_results
-
-init_db(app)
-
-# Data Management for Binance Updates
-class WebDataManager:
-    """Data manager for web app Binance updates"""
-    def __init__(self):
+from models import count_optimization_results, encode_results_cursor
+from models import iter_export_optimization_results, write_parquet_optimization_results
+
+init_db(app, create_tables=False)
+
+_startup_done = False
+_startup_lock = threading.Lock()
+
+@app.before_request
+def _deferred_startup():
+    """One-time DB setup moved out of import so the server starts serving immediately"""
+    global _startup_done
+    if _startup_done:
+        return
+    with _startup_lock:
+        if _startup_done:
+            return
+        create_tables_for(app)
         if DATA_MANAGEMENT_AVAILABLE:
-            self.fetcher = BinanceFetcher()
-            # Initialize candlestick database
             try:
                 init_candle_db()
                 print("✅ Candlestick database initialized for data management")
             except Exception as e:
                 print(f"⚠️ Warning: Could not initialize candlestick database: {e}")
-        else:
-            self.fetcher = None
+        _startup_done = True
+
+# Data Management for Binance Updates
+class WebDataManager:
+    """Data manager for web app Binance updates"""
+    def __init__(self):
+        self._fetcher = None
         self.update_status = {
             'running': False,
             'progress': 0,
@@ -317,6 +341,17 @@ class WebDataManager:
             'log': []
         }
 
+    @property
+    def fetcher(self):
+        """Binance fetcher, imported and created on first use (None if unavailable)"""
+        if self._fetcher is None and DATA_MANAGEMENT_AVAILABLE:
+            try:
+                from binance_fetcher import BinanceFetcher
+                self._fetcher = BinanceFetcher()
+            except ImportError as e:
+                print(f"⚠️ Binance fetcher not available: {e}")
+        return self._fetcher
+
 
 # ================== SYMBOL/TIMEFRAME NORMALIZATION ===================
 import re
@@ -651,6 +686,9 @@ def analytics_dashboard():
             .chart-row { display: flex; justify-content: space-between; margin: 20px 0; }
             .chart-box { width: 48%; height: 300px; background: white; border: 1px solid #ddd; border-radius: 5px; padding: 10px; }
             .analytics-stats { background: #e2e3e5; padding: 15px; border-radius: 8px; margin: 10px 0; }
+            .sensitivity-controls select { margin: 0 10px 10px 0; padding: 4px; }
+            .heatmap { border-collapse: collapse; font-size: 12px; }
+            .heatmap td, .heatmap th { padding: 4px 6px; text-align: center; border: 1px solid #eee; }
         </style>
     </head>
     <body>
@@ -694,7 +732,97 @@ def analytics_dashboard():
             </div>
         </div>
         
+        <div class="chart-container" id="sensitivityPanel">
+            <h3>🗺️ Parameter Sensitivity Heatmap</h3>
+            <p>Bề mặt kết quả grid theo từng cặp tham số - ưu tiên vùng ổn định (plateau) thay vì đỉnh nhọn (spike).</p>
+            <div class="sensitivity-controls">
+                <select id="surfaceSelect"></select>
+                <select id="metricSelect">
+                    <option value="pnl_total">PnL</option>
+                    <option value="winrate">Winrate</option>
+                    <option value="pf">Profit Factor</option>
+                    <option value="max_drawdown">Max Drawdown</option>
+                    <option value="sharpe_ratio">Sharpe</option>
+                    <option value="recovery_factor">Recovery</option>
+                </select>
+                <select id="xSelect"><option>sl</option><option>be</option><option>ts_trig</option><option>ts_step</option></select>
+                <select id="ySelect"><option>sl</option><option selected>be</option><option>ts_trig</option><option>ts_step</option></select>
+                <select id="modeSelect">
+                    <option value="best">Best of other axes</option>
+                    <option value="mean">Mean of other axes</option>
+                    <option value="slice">Slice at best cell</option>
+                </select>
+            </div>
+            <div id="sensitivitySummary"></div>
+            <div id="heatmapContainer"><p>Chưa có surface nào - chạy Grid Search trên trang chính.</p></div>
+        </div>
+        
         <script>
+            // Parameter sensitivity surfaces stored by /optimize_ranges
+            async function loadSurfaces() {
+                const response = await fetch('/api/sensitivity');
+                const data = await response.json();
+                const select = document.getElementById('surfaceSelect');
+                select.innerHTML = (data.surfaces || []).map(s => {
+                    const m = s.meta || {};
+                    return `<option value="${s.key}">${m.symbol || ''} ${m.timeframe || ''} ${m.engine || ''} - ${s.created_at.slice(0, 16)}</option>`;
+                }).join('');
+                if (data.surfaces && data.surfaces.length) {
+                    renderSensitivity();
+                }
+            }
+            
+            function heatColor(value, min, max, higherIsBetter) {
+                if (value === null) return '#f8f9fa';
+                let t = max > min ? (value - min) / (max - min) : 0.5;
+                if (!higherIsBetter) t = 1 - t;
+                return `hsl(${Math.round(t * 120)}, 70%, 75%)`;
+            }
+            
+            async function renderSensitivity() {
+                const key = document.getElementById('surfaceSelect').value;
+                if (!key) return;
+                const metric = document.getElementById('metricSelect').value;
+                const x = document.getElementById('xSelect').value;
+                const y = document.getElementById('ySelect').value;
+                const mode = document.getElementById('modeSelect').value;
+                const container = document.getElementById('heatmapContainer');
+                if (x === y) {
+                    container.innerHTML = '<p>Chọn hai tham số khác nhau cho trục X và Y.</p>';
+                    return;
+                }
+                const [summary, heatmap] = await Promise.all([
+                    fetch(`/api/sensitivity/${key}?metric=${metric}`).then(r => r.json()),
+                    fetch(`/api/sensitivity/${key}/heatmap?metric=${metric}&x=${x}&y=${y}&mode=${mode}`).then(r => r.json())
+                ]);
+                if (!heatmap.success) {
+                    container.innerHTML = `<p>${heatmap.error}</p>`;
+                    return;
+                }
+                const smooth = summary.smoothness || {};
+                const best = smooth.best_cell;
+                const plateau = (smooth.plateaus || [])[0];
+                const fmt = p => p ? `SL ${p.sl}% / BE ${p.be}% / TS ${p.ts_trig}% / Step ${p.ts_step}%` : '-';
+                document.getElementById('sensitivitySummary').innerHTML = `
+                    <p><strong>${summary.evaluated}</strong> / ${summary.cells} cells, smoothness <strong>${smooth.smoothness}</strong></p>
+                    <p>Best cell: ${fmt(best && best.params)} = ${best ? best.value : '-'}
+                       (neighbourhood ${best ? best.neighborhood_mean : '-'}, worst neighbour ${best ? best.worst_neighbor : '-'}, spike ${best ? best.spike : '-'})</p>
+                    <p>Best plateau: ${fmt(plateau && plateau.params)} = ${plateau ? plateau.value : '-'}
+                       (neighbourhood ${plateau ? plateau.neighborhood_mean : '-'})</p>`;
+                const values = heatmap.z.flat().filter(v => v !== null);
+                const min = Math.min(...values), max = Math.max(...values);
+                const header = heatmap.x_values.map(v => `<th>${v}</th>`).join('');
+                const rows = heatmap.z.map((row, i) => `<tr><th>${heatmap.y_values[i]}</th>${row.map(v =>
+                    `<td style="background: ${heatColor(v, min, max, smooth.higher_is_better !== false)}">${v === null ? '' : v.toFixed(2)}</td>`).join('')}</tr>`).join('');
+                container.innerHTML = `
+                    <p>${metric} - ${y} (rows) x ${x} (columns)${heatmap.at ? ', slice at ' + JSON.stringify(heatmap.at) : ''}</p>
+                    <table class="heatmap"><tr><th>${y} / ${x}</th>${header}</tr>${rows}</table>`;
+            }
+            
+            ['surfaceSelect', 'metricSelect', 'xSelect', 'ySelect', 'modeSelect'].forEach(id =>
+                document.getElementById(id).addEventListener('change', renderSensitivity));
+            loadSurfaces();
+            
             // Sample Chart.js initialization
             const ctx1 = document.getElementById('perfChart').getContext('2d');
             new Chart(ctx1, {
@@ -745,20 +873,26 @@ def api_batch_optimize():
             },
             'optional_payload': {
                 'parameters': {
-                    'sl_min': 1.0,
-                    'sl_max': 5.0,
-                    'be_min': 2.0,
-                    'be_max': 2.0,
-                    'ts_min': 2.0,
-                    'ts_max': 1.5
-                }
+                    'sl_min': 1.0, 'sl_max': 5.0, 'sl_step': 0.5,
+                    'be_min': 0.5, 'be_max': 3.0, 'be_step': 0.5,
+                    'ts_trig_min': 1.0, 'ts_trig_max': 4.0, 'ts_trig_step': 0.5,
+                    'ts_step_min': 0.1, 'ts_step_max': 1.0, 'ts_step_step': 0.1
+                },
+                'optimization_method': 'optuna | grid',
+                'n_trials': 100,
+                'parallel_symbols': 2,
+                'execution_mode': 'process | thread',
+                'cpu_budget': 'cores shared by symbol workers and grid pools (default: all)',
+                'timeout_per_symbol': 300,
+                'strategy_name': 'latest uploaded strategy for the symbol if omitted',
+                'opt_type': 'pnl | winrate | pf'
             },
             'example_curl': 'curl -X POST "http://127.0.0.1:5000/api/batch_optimize" -H "Content-Type: application/json" -d \'{"symbols": ["BINANCE_BTCUSDT"], "timeframes": ["30"]}\''
         })
     
     # Handle POST requests
     try:
-        data = request.get_json()
+        data = request.get_json() or {}
         symbols = data.get('symbols', [])
         timeframes = data.get('timeframes', {})
         parameters = data.get('parameters', {})
@@ -775,78 +909,104 @@ def api_batch_optimize():
                 tfs = [timeframes] if timeframes else []
             for tf in tfs:
                 norm_sym, norm_tf = normalize_symbol_and_timeframe(f"{sym}_{tf}")
-                normalized_pairs.append((norm_sym, norm_tf))
+                if (norm_sym, norm_tf) not in normalized_pairs:
+                    normalized_pairs.append((norm_sym, norm_tf))
 
         if not normalized_pairs:
             return jsonify({'success': False, 'error': 'No valid symbol/timeframe pairs selected'}), 400
 
-        # Return sample response for now (but with normalized pairs)
+        # deferred: multi_symbol_processor pulls in optuna
+        from multi_symbol_processor import BatchConfig, get_multi_symbol_processor
+
+        def param_range(name, default_min, default_max, default_step, alias=None):
+            lo = parameters.get(f'{name}_min', parameters.get(f'{alias}_min', default_min) if alias else default_min)
+            hi = parameters.get(f'{name}_max', parameters.get(f'{alias}_max', default_max) if alias else default_max)
+            step = parameters.get(f'{name}_step', parameters.get(f'{alias}_step', default_step) if alias else default_step)
+            lo, hi, step = float(lo), float(hi), float(step)
+            return (min(lo, hi), max(lo, hi), step if step > 0 else default_step)
+
+        method = str(data.get('optimization_method', data.get('optimization_engine', 'optuna'))).lower()
+        config = BatchConfig(
+            symbols=sorted({s for s, _ in normalized_pairs}),
+            timeframes=sorted({t for _, t in normalized_pairs}),
+            pairs=normalized_pairs,
+            sl_range=param_range('sl', 1.0, 5.0, 0.5),
+            be_range=param_range('be', 0.5, 3.0, 0.5),
+            ts_trig_range=param_range('ts_trig', 1.0, 4.0, 0.5, alias='ts'),
+            ts_step_range=param_range('ts_step', 0.1, 1.0, 0.1),
+            optimization_method='grid' if method in ('grid', 'grid_search') else 'optuna',
+            n_trials=int(data.get('n_trials', 100)),
+            timeout_per_symbol=int(data.get('timeout_per_symbol', 300)),
+            parallel_symbols=max(1, int(data.get('parallel_symbols', 2))),
+            execution_mode='thread' if data.get('execution_mode') == 'thread' else 'process',
+            cpu_budget=int(data['cpu_budget']) if data.get('cpu_budget') else None,
+            strategy_name=data.get('strategy_name') or None,
+            opt_type=data.get('opt_type', 'pnl'),
+            generate_reports=bool(data.get('generate_reports', True)),
+            grid_halving=bool(data.get('successive_halving', False)),
+            halving_eta=max(2, int(data.get('halving_eta') or HALVING_ETA)),
+            halving_mode=data.get('halving_mode') if data.get('halving_mode') in HALVING_MODES else 'chronological',
+            walk_forward=bool(data.get('walk_forward', False)),
+            wf_folds=max(1, int(data.get('wf_folds') or WF_FOLDS)),
+            wf_in_sample_periods=max(1, int(data.get('wf_in_sample_periods') or WF_IN_SAMPLE_PERIODS)),
+            wf_anchored=data.get('wf_mode') == 'anchored',
+            persist_studies=bool(data.get('persist_study', True)),
+        )
+        batch_id = get_multi_symbol_processor().start_batch(config)
+
         return jsonify({
             'success': True,
             'message': 'Batch optimization started',
-            'job_id': 'batch_001',
+            'job_id': batch_id,
             'symbols': [f"{s}_{t}" for s, t in normalized_pairs],
-            'estimated_time': len(normalized_pairs) * 30  # seconds
-        })
+            'optimization_method': config.optimization_method,
+            'status_url': f'/api/batch_status/{batch_id}',
+            'results_url': f'/api/batch_results/{batch_id}',
+        }), 202
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/batch_status/<job_id>', methods=['GET'])
 def api_batch_status(job_id):
     """ðŸ“Š Get batch optimization progress"""
-    # Sample progress data
+    from multi_symbol_processor import get_batch_progress
+    progress = get_batch_progress(job_id)
+    if progress is None:
+        return jsonify({'success': False, 'error': f'Batch {job_id} not found'}), 404
+
+    if not progress['is_completed']:
+        status = 'running'
+    elif progress['completed'] == 0 and progress['total_symbols'] > 0:
+        status = 'failed'
+    else:
+        status = 'completed'
     return jsonify({
+        'success': True,
         'job_id': job_id,
-        'status': 'running',
-        'progress': 65,
-        'completed_symbols': 2,
-        'total_symbols': 3,
-        'current_symbol': 'BINANCE_BTCUSDT',
-        'estimated_remaining': 45
+        'status': status,
+        'progress': round(progress['overall_progress'], 2),
+        'completed_symbols': progress['completed'],
+        'failed_symbols': progress['errors'],
+        'total_symbols': progress['total_symbols'],
+        'current_symbol': progress['current_symbols'][0] if progress['current_symbols'] else None,
+        **progress,
     })
 
 @app.route('/api/batch_results/<job_id>', methods=['GET'])
 def api_batch_results(job_id):
     """ðŸ“ˆ Get batch optimization results"""
-    # Sample results data
-    # In real implementation, ensure all result symbol/timeframe are normalized before returning
-    # In real implementation, fetch actual optimization results and calculate advanced metrics
-    # Here, we patch the sample to always include max_drawdown
-    def fake_details(pnl):
-        # Fake trade details for demonstration
-        return [{'pnlPct': pnl/2}, {'pnlPct': pnl/2}]
-
-    def get_performance(pnl, winrate, sharpe):
-        details = fake_details(pnl)
-        from numpy import cumsum, maximum
-        # Calculate max_drawdown using same logic as calculate_advanced_metrics
-        pnl_list = [t['pnlPct'] for t in details]
-        cumulative_pnl = cumsum(pnl_list)
-        max_drawdown = float(maximum.accumulate(cumulative_pnl).max() - cumulative_pnl.min()) if len(cumulative_pnl) else 0.0
-        return {
-            'pnl': pnl,
-            'winrate': winrate,
-            'sharpe': sharpe,
-            'max_drawdown': round(max_drawdown, 2)
-        }
+    from multi_symbol_processor import get_multi_symbol_processor, get_batch_progress
+    include_details = request.args.get('details', 'false').lower() == 'true'
+    results = get_multi_symbol_processor().get_batch_results(job_id, include_details=include_details)
+    if results is None:
+        return jsonify({'success': False, 'error': f'Batch {job_id} not found'}), 404
 
-    results = [
-        {
-            'symbol': normalize_symbol_and_timeframe('BINANCE_BTCUSDT_30')[0],
-            'timeframe': normalize_symbol_and_timeframe('BINANCE_BTCUSDT_30')[1],
-            'best_params': {'sl': 2.5, 'be': 1.2, 'ts_trig': 0.8, 'ts_step': 5.0},
-            'performance': get_performance(15.67, 68.5, 1.24)
-        },
-        {
-            'symbol': normalize_symbol_and_timeframe('BINANCE_BOMEUSDT_240')[0],
-            'timeframe': normalize_symbol_and_timeframe('BINANCE_BOMEUSDT_240')[1],
-            'best_params': {'sl': 3.0, 'be': 1.5, 'ts_trig': 1.0, 'ts_step': 5.0},
-            'performance': get_performance(12.34, 72.1, 1.18)
-        }
-    ]
+    progress = get_batch_progress(job_id)
     return jsonify({
+        'success': True,
         'job_id': job_id,
-        'status': 'completed',
+        'status': 'completed' if progress['is_completed'] else 'running',
+        'summary': progress['summary_stats'],
         'results': results
     })
 
@@ -1369,9 +1529,54 @@ optimization_status = {
     'total_combinations': 0,
     'current_progress': 0,
     'estimated_completion': None,
-    'status_message': 'Ready'
+    'status_message': 'Ready',
+    'trades_per_combination': 0,
+    'best_so_far': None,
+    'successive_halving': None
 }
 
+# opt_type -> result key used to rank combinations (drawdown: lower is better)
+OPT_SCORE_KEYS = {'pnl': 'pnl_total', 'winrate': 'winrate', 'pf': 'pf', 'sharpe': 'sharpe_ratio',
+                  'recovery': 'recovery_factor', 'drawdown': 'max_drawdown'}
+
+def begin_progress(total_combinations, trades_per_combination, message='Running'):
+    """Reset optimization_status at the start of a grid/Optuna run"""
+    optimization_status.update({
+        'running': True,
+        'start_time': datetime.now(),
+        'total_combinations': total_combinations,
+        'current_progress': 0,
+        'estimated_completion': None,
+        'status_message': message,
+        'trades_per_combination': trades_per_combination,
+        'best_so_far': None,
+        'successive_halving': None
+    })
+
+def finish_progress(message):
+    optimization_status.update({'running': False, 'status_message': message})
+
+def report_best_so_far(params, metrics, opt_type, score=None):
+    """Keep the best combination seen so far in optimization_status (pushed by the SSE streams)"""
+    if score is None:
+        score = metrics.get(OPT_SCORE_KEYS.get(opt_type, 'pnl_total'))
+    try:
+        score = float(score)
+    except (TypeError, ValueError):
+        return
+    if math.isnan(score):
+        return
+    if opt_type == 'drawdown':
+        score = -score
+    best = optimization_status.get('best_so_far')
+    if best is None or score > best['score']:
+        optimization_status['best_so_far'] = {
+            'score': score,
+            'combination': optimization_status.get('current_progress', 0),
+            **{k: float(v) for k, v in params.items()},
+            **{k: safe_float(metrics[k]) for k in ('pnl_total', 'winrate', 'pf', 'max_drawdown') if k in metrics}
+        }
+
 def convert_to_serializable(obj):
     """Convert numpy/pandas types to native Python types for JSON serialization"""
     if isinstance(obj, np.integer):
@@ -2153,105 +2358,32 @@ def calculate_original_performance(pairs):
     if not pairs:
         return None
     
-    total_trades = len(pairs)
-    win_trades = 0
-    loss_trades = 0
-    total_pnl = 0
-    gross_profit = 0
-    gross_loss = 0
-    win_amounts = []
-    loss_amounts = []
-    pnl_list = []
-    
-    # Sort trades theo thá»i gian Ä‘á»ƒ tÃ­nh drawdown
+    # Sort trades theo thời gian để tính drawdown
     sorted_pairs = sorted(pairs, key=lambda x: x['entryDt'])
-    
-    for pair in sorted_pairs:
-        if pair['side'] == 'LONG':
-            pnl_pct = (pair['exitPrice'] - pair['entryPrice']) / pair['entryPrice'] * 100
-        else:  # SHORT
-            pnl_pct = (pair['entryPrice'] - pair['exitPrice']) / pair['entryPrice'] * 100
-        
-        pnl_list.append(pnl_pct)
-        total_pnl += pnl_pct
-        
-        if pnl_pct > 0:
-            win_trades += 1
-            gross_profit += pnl_pct
-            win_amounts.append(pnl_pct)
-        else:
-            loss_trades += 1
-            gross_loss += abs(pnl_pct)
-            loss_amounts.append(pnl_pct)
-    
-    # TÃ­nh cÃ¡c chá»‰ sá»‘ cÆ¡ báº£n
-    winrate = (win_trades / total_trades * 100) if total_trades > 0 else 0
-    profit_factor = (gross_profit / gross_loss) if gross_loss > 0 else float('inf') if gross_profit > 0 else 0
-    avg_trade = total_pnl / total_trades if total_trades > 0 else 0
-    
-    # TÃ­nh Max Drawdown
-    cumulative_pnl = []
-    running_total = 0
-    for pnl in pnl_list:
-        running_total += pnl
-        cumulative_pnl.append(running_total)
-    
-    max_drawdown = 0
-    peak = cumulative_pnl[0] if cumulative_pnl else 0
-    for value in cumulative_pnl:
-        if value > peak:
-            peak = value
-        drawdown = peak - value
-        if drawdown > max_drawdown:
-            max_drawdown = drawdown
-    
-    # TÃ­nh Average Win/Loss
-    avg_win = sum(win_amounts) / len(win_amounts) if win_amounts else 0
-    avg_loss = sum(loss_amounts) / len(loss_amounts) if loss_amounts else 0
-    
-    # TÃ­nh Consecutive Wins/Losses
-    max_consecutive_wins = 0
-    max_consecutive_losses = 0
-    current_win_streak = 0
-    current_loss_streak = 0
-    
-    for pnl in pnl_list:
-        if pnl > 0:
-            current_win_streak += 1
-            current_loss_streak = 0
-            max_consecutive_wins = max(max_consecutive_wins, current_win_streak)
-        else:
-            current_loss_streak += 1
-            current_win_streak = 0
-            max_consecutive_losses = max(max_consecutive_losses, current_loss_streak)
-    
-    # TÃ­nh Sharpe Ratio (Ä‘Æ¡n giáº£n hoÃ¡)
-    if len(pnl_list) > 1:
-        std_dev = math.sqrt(sum([(x - avg_trade) ** 2 for x in pnl_list]) / (len(pnl_list) - 1))
-        sharpe_ratio = avg_trade / std_dev if std_dev > 0 else 0
-    else:
-        sharpe_ratio = 0
-    
-    # TÃ­nh Recovery Factor
-    recovery_factor = total_pnl / max_drawdown if max_drawdown > 0 else float('inf') if total_pnl > 0 else 0
+    pnl_list = [
+        (pair['exitPrice'] - pair['entryPrice']) / pair['entryPrice'] * 100 if pair['side'] == 'LONG'
+        else (pair['entryPrice'] - pair['exitPrice']) / pair['entryPrice'] * 100
+        for pair in sorted_pairs
+    ]
+    metrics = series_metrics(pnl_list)
     
     return {
-        'total_trades': total_trades,
-        'win_trades': win_trades,
-        'loss_trades': loss_trades,
-        'total_pnl': total_pnl,
-        'winrate': winrate,
-        'profit_factor': safe_float(profit_factor),
-        'avg_trade': avg_trade,
-        'gross_profit': gross_profit,
-        'gross_loss': gross_loss,
-        'max_drawdown': max_drawdown,
-        'avg_win': avg_win,
-        'avg_loss': avg_loss,
-        'max_consecutive_wins': max_consecutive_wins,
-        'max_consecutive_losses': max_consecutive_losses,
-        'sharpe_ratio': safe_float(sharpe_ratio),
-        'recovery_factor': safe_float(recovery_factor)
+        'total_trades': metrics['trades'],
+        'win_trades': metrics['win_trades'],
+        'loss_trades': metrics['loss_trades'],
+        'total_pnl': metrics['pnl_total'],
+        'winrate': metrics['winrate'],
+        'profit_factor': safe_float(metrics['pf']),
+        'avg_trade': metrics['avg_trade'],
+        'gross_profit': metrics['gross_profit'],
+        'gross_loss': metrics['gross_loss'],
+        'max_drawdown': metrics['max_drawdown'],
+        'avg_win': metrics['avg_win'],
+        'avg_loss': metrics['avg_loss'],
+        'max_consecutive_wins': metrics['max_consecutive_wins'],
+        'max_consecutive_losses': metrics['max_consecutive_losses'],
+        'sharpe_ratio': safe_float(metrics['sharpe_ratio']),
+        'recovery_factor': safe_float(metrics['recovery_factor'])
     }
 
 def create_original_baseline_details(trade_pairs):
@@ -2380,52 +2512,15 @@ def calculate_advanced_metrics(details):
     """
     âš¡ Tá»I Æ¯U: TÃ­nh toÃ¡n cÃ¡c chá»‰ sá»‘ nÃ¢ng cao, tá»‘i giáº£n log, tÄƒng tá»‘c Ä‘á»™
     """
-    if not details:
-        return {
-            'max_drawdown': 0, 'avg_win': 0, 'avg_loss': 0,
-            'max_consecutive_wins': 0, 'max_consecutive_losses': 0,
-            'sharpe_ratio': 0, 'recovery_factor': 0
-        }
-    pnl_list = [trade['pnlPct'] for trade in details]
-    if all(pnl == 0 for pnl in pnl_list):
-        return {
-            'max_drawdown': 0, 'avg_win': 0, 'avg_loss': 0,
-            'max_consecutive_wins': 0, 'max_consecutive_losses': 0,
-            'sharpe_ratio': 0, 'recovery_factor': 0
-        }
-    cumulative_pnl = np.cumsum(pnl_list)
-    max_drawdown = float(np.max(np.maximum.accumulate(cumulative_pnl) - cumulative_pnl)) if len(cumulative_pnl) else 0
-    win_amounts = [pnl for pnl in pnl_list if pnl > 0]
-    loss_amounts = [pnl for pnl in pnl_list if pnl <= 0]
-    avg_win = float(np.mean(win_amounts)) if win_amounts else 0
-    avg_loss = float(np.mean(loss_amounts)) if loss_amounts else 0
-    max_consecutive_wins = max_consecutive_losses = 0
-    cur_win = cur_loss = 0
-    for pnl in pnl_list:
-        if pnl > 0:
-            cur_win += 1
-            cur_loss = 0
-            max_consecutive_wins = max(max_consecutive_wins, cur_win)
-        else:
-            cur_loss += 1
-            cur_win = 0
-            max_consecutive_losses = max(max_consecutive_losses, cur_loss)
-    avg_trade = float(np.mean(pnl_list)) if pnl_list else 0
-    if len(pnl_list) > 1:
-        std_dev = float(np.std(pnl_list, ddof=1))
-        sharpe_ratio = avg_trade / std_dev if std_dev > 0 else 0
-    else:
-        sharpe_ratio = 0
-    total_pnl = float(np.sum(pnl_list))
-    recovery_factor = total_pnl / max_drawdown if max_drawdown > 0 else float('inf') if total_pnl > 0 else 0
+    metrics = series_metrics([trade['pnlPct'] for trade in details], flat_as_empty=True)
     return {
-        'max_drawdown': max_drawdown,
-        'avg_win': avg_win,
-        'avg_loss': avg_loss,
-        'max_consecutive_wins': max_consecutive_wins,
-        'max_consecutive_losses': max_consecutive_losses,
-        'sharpe_ratio': sharpe_ratio,
-        'recovery_factor': recovery_factor
+        'max_drawdown': metrics['max_drawdown'],
+        'avg_win': metrics['avg_win'],
+        'avg_loss': metrics['avg_loss'],
+        'max_consecutive_wins': metrics['max_consecutive_wins'],
+        'max_consecutive_losses': metrics['max_consecutive_losses'],
+        'sharpe_ratio': metrics['sharpe_ratio'],
+        'recovery_factor': metrics['recovery_factor']
     }
 
 def grid_search_sl_fallback(pairs, df_candle, sl_min, sl_max, sl_step, opt_type, 
@@ -2439,6 +2534,7 @@ def grid_search_sl_fallback(pairs, df_candle, sl_min, sl_max, sl_step, opt_type,
     results = []
     sl_list = list(np.arange(sl_min, sl_max + sl_step/2, sl_step))
     total_combinations = len(sl_list)
+    begin_progress(total_combinations, len(pairs))
     progress_interval = max(1, total_combinations // 4)
     for i, sl in enumerate(sl_list):
         optimization_status['current_progress'] = i + 1
@@ -2482,6 +2578,7 @@ def grid_search_sl_fallback(pairs, df_candle, sl_min, sl_max, sl_step, opt_type,
             'recovery_factor': safe_float(advanced_metrics['recovery_factor']),
             'details': details
         })
+        report_best_so_far({'sl': sl}, results[-1], opt_type)
     sort_map = {
         'pnl': ('pnl_total', True),
         'winrate': ('winrate', True),
@@ -2495,23 +2592,146 @@ def grid_search_sl_fallback(pairs, df_candle, sl_min, sl_max, sl_step, opt_type,
     if results:
         best = results[0]
         print(f"ðŸ† BEST RESULT: SL={best['sl']:.1f}% -> PnL={best['pnl_total']:.4f}%, WR={best['winrate']:.2f}%")
+    finish_progress(f'Completed {total_combinations} combinations')
     return results
 
-def grid_search_realistic_full(pairs, df_candle, sl_list, be_list, ts_trig_list, ts_step_list, opt_type):
+def open_dominance(pairs, df_candle, use_cache=True):
+    """DominanceSimulator for one run: equivalent SL/BE/TS cells reuse one simulation per trade
+
+    Trade excursions come from the stored per-trade excursion profile of this dataset.
+    """
+    if DominanceSimulator is None:
+        return None
+    try:
+        from excursion_profile import get_excursion_profile
+        profile = get_excursion_profile(pairs, df_candle, use_cache)
+        return DominanceSimulator(pairs, df_candle, profile.excursions)
+    except Exception as e:
+        print(f"⚠️ Dominance precomputation unavailable: {e}")
+        return None
+
+def report_dominance(dominance):
+    if dominance is not None:
+        stats = dominance.stats()
+        print(f"🧮 Dominance: {stats['trade_simulations']:,} trade simulations, {stats['first_touch_exits']:,} first-touch exits, "
+              f"{stats['reused']:,} reused from equivalent cells ({stats['reused_pct']}%)")
+
+def simulate_grid_trade(pair, df_candle, sl, be, ts_trig, ts_step, dominance=None, index=None):
+    """Simulate one trade pair with one SL/BE/TS parameter set (None when it can't be simulated)
+
+    With a DominanceSimulator, index is the pair's position in the pairs it was built from.
+    """
+    try:
+        if dominance is not None:
+            return dominance.simulate(index, sl, be, ts_trig, ts_step)
+        result, log = simulate_trade(pair, df_candle, sl, be, ts_trig, ts_step)
+        return result
+    except Exception as e:
+        print(f"⚠️ Grid Search error for pair {pair.get('num', 'unknown')}: {e}")
+        return None
+
+def simulate_grid_cell(pairs, df_candle, sl, be, ts_trig, ts_step, dominance=None):
+    """Simulate every trade pair with one SL/BE/TS parameter set, return the per-trade details"""
+    details = []
+    for index, pair in enumerate(pairs):
+        result = simulate_grid_trade(pair, df_candle, sl, be, ts_trig, ts_step, dominance, index)
+        if result is not None:
+            details.append(result)
+    return details
+
+def grid_cell_result(sl, be, ts_trig, ts_step, details, metrics=None):
+    """Result dict of one grid cell - the metrics every grid engine reports
+
+    metrics: the cell's entry of details_metrics() when computed for a batch of cells
+    """
+    if metrics is None:
+        metrics = details_metrics([details], flat_as_empty=True)[0]
+    return {
+        'sl': float(sl),
+        'be': float(be),
+        'ts_trig': float(ts_trig),
+        'ts_step': float(ts_step),
+        'pnl_total': float(metrics['pnl_total']),
+        'winrate': float(metrics['winrate']),
+        'pf': safe_float(metrics['pf']),
+        'max_drawdown': safe_float(metrics['max_drawdown']),
+        'avg_win': safe_float(metrics['avg_win']),
+        'avg_loss': safe_float(metrics['avg_loss']),
+        'max_consecutive_wins': safe_int(metrics['max_consecutive_wins']),
+        'max_consecutive_losses': safe_int(metrics['max_consecutive_losses']),
+        'sharpe_ratio': safe_float(metrics['sharpe_ratio']),
+        'recovery_factor': safe_float(metrics['recovery_factor']),
+        'details': details
+    }
+
+def grid_cell_results(cells, details_list):
+    """grid_cell_result of many cells, metrics computed on one (cells x trades) PnL matrix"""
+    metrics = details_metrics(details_list, flat_as_empty=True)
+    return [grid_cell_result(*cell, details, m) for cell, details, m in zip(cells, details_list, metrics)]
+
+# opt_type -> (result key, higher is better)
+GRID_SORT_KEYS = {
+    'pnl': ('pnl_total', True),
+    'winrate': ('winrate', True),
+    'pf': ('pf', True),
+    'sharpe': ('sharpe_ratio', True),
+    'recovery': ('recovery_factor', True),
+    'drawdown': ('max_drawdown', False),
+}
+
+def sort_grid_results(results, opt_type):
+    """Sort grid results in place by the optimization type (default: total PnL)"""
+    metric, descending = GRID_SORT_KEYS.get(opt_type, ('pnl_total', True))
+    results.sort(key=lambda x: x[metric], reverse=descending)
+    return results
+
+def open_combo_cache(pairs, df_candle, use_cache=True):
+    """Combo cache session for one run, or None when caching is off or unavailable"""
+    if not use_cache:
+        return None
+    try:
+        from optimization_cache import ComboCacheSession
+        return ComboCacheSession(pairs, df_candle)
+    except Exception as e:
+        print(f"⚠️ Combo cache unavailable: {e}")
+        return None
+
+def grid_search_realistic_full(pairs, df_candle, sl_list, be_list, ts_trig_list, ts_step_list, opt_type, use_cache=True,
+                               halving=None):
     """
     TÃŒM KIáº¾M LÆ¯á»šI TOÃ€N DIá»†N vá»›i mÃ´ phá»ng Ä‘áº§y Ä‘á»§ SL + BE + TS
     HÃ m nÃ y Ä‘áº£m báº£o MÃ” PHá»ŽNG GIAO Dá»ŠCH THá»°C Táº¾ cho táº¥t cáº£ tá»• há»£p tham sá»‘
+    
+    halving: None for the full grid, or True / {'eta': 3, 'mode': 'chronological'|'stratified'}
+             for successive halving over trade subsets (stats in optimization_status['successive_halving'])
     """
     global optimization_status
     
+    if halving:
+        options = halving if isinstance(halving, dict) else {}
+        results, stats = successive_halving_grid_search(
+            pairs, df_candle, sl_list, be_list, ts_trig_list, ts_step_list, opt_type,
+            eta=options.get('eta') or HALVING_ETA, mode=options.get('mode') or 'chronological', use_cache=use_cache
+        )
+        optimization_status['successive_halving'] = stats
+        return results
+    
     print(f"ðŸš€ TÃŒM KIáº¾M LÆ¯á»šI THá»°C Táº¾ TOÃ€N DIá»†N Báº®T Äáº¦U!")
     print(f"ðŸ“Š CHáº¾ Äá»˜ MÃ” PHá»ŽNG: SL + Breakeven + Trailing Stop Ä‘áº§y Ä‘á»§")
     print(f"ðŸ”¢ Tham sá»‘: SL={len(sl_list)}, BE={len(be_list)}, TS_TRIG={len(ts_trig_list)}, TS_STEP={len(ts_step_list)}")
     
     results = []
     total_combinations = len(sl_list) * len(be_list) * len(ts_trig_list) * len(ts_step_list)
+    begin_progress(total_combinations, len(pairs))
     combination_count = 0
     
+    # Per-combination cache: cells already simulated on this tradelist + candle range are reused
+    combo_cache = open_combo_cache(pairs, df_candle, use_cache)
+    dominance = open_dominance(pairs, df_candle, use_cache)
+    if combo_cache:
+        hits = combo_cache.preload(itertools.product(sl_list, be_list, ts_trig_list, ts_step_list))
+        print(f"🗄️ Combo cache: {hits}/{total_combinations} combinations already computed")
+    
     print(f"ðŸ”„ CHáº¾ Äá»˜ THá»°C Táº¾: Thá»­ nghiá»‡m {total_combinations:,} tá»• há»£p tham sá»‘...")
     print(f"ðŸ’¡ Má»—i lá»‡nh sáº½ Ä‘Æ°á»£c mÃ´ phá»ng vá»›i:")
     print(f"   - Stop Loss: Báº£o vá»‡ vá»‘n Ä‘á»™ng")
@@ -2519,6 +2739,7 @@ def grid_search_realistic_full(pairs, df_candle, sl_list, be_list, ts_trig_list,
     print(f"   - Trailing Stop: Báº£o vá»‡ lá»£i nhuáº­n Ä‘á»™ng vá»›i tiáº¿n trÃ¬nh tá»«ng bÆ°á»›c")
     
     for sl in sl_list:
+        row_cells, row_details = [], []
         for be in be_list:
             for ts_trig in ts_trig_list:
                 for ts_step in ts_step_list:
@@ -2530,100 +2751,389 @@ def grid_search_realistic_full(pairs, df_candle, sl_list, be_list, ts_trig_list,
                     if combination_count % 100 == 0 or combination_count <= 10:
                         print(f"Tiáº¿n Ä‘á»™: {combination_count}/{total_combinations} - Thá»­ nghiá»‡m SL:{sl:.1f}% BE:{be:.1f}% TS:{ts_trig:.1f}%/{ts_step:.1f}%")
                     
-                    # Simulate all trades with current parameter set
-                    details = []
-                    win_count = 0
-                    gain_sum = 0
-                    loss_sum = 0
-                    
-                    for pair in pairs:
-                        # Sá»­ dá»¥ng hÃ m simulate_trade NÃ‚NG CAO vá»›i logic BE+TS Ä‘áº§y Ä‘á»§
-                        if True:  # 🔧 UNIFIED LOGIC: Always use simulate_trade() to match Optuna behavior (ADVANCED_MODE removed)
-                            try:
-                                result, log = simulate_trade(pair, df_candle, sl, be, ts_trig, ts_step)
-                            except Exception as e:
-                                print(f"⚠️ Grid Search error for pair {pair.get('num', 'unknown')}: {e}")
-                                result = None
-                        else:
-                            # Dá»± phÃ²ng mÃ´ phá»ng chá»‰ SL  
-                            result = simulate_trade_sl_only(pair, df_candle, sl)
-                            result.update({'be': be, 'ts_trig': ts_trig, 'ts_step': ts_step})
-                        
-                        if result is not None:
-                            details.append(result)
-                            pnl = result['pnlPct']
-                            if pnl > 0: 
-                                win_count += 1
-                                gain_sum += pnl
-                            else: 
-                                loss_sum += abs(pnl)
-                    
-                    # TÃ­nh toÃ¡n cÃ¡c chá»‰ sá»‘ hiá»‡u suáº¥t
-                    total_trades = len(details)
-                    winrate = (win_count / total_trades * 100) if total_trades > 0 else 0
-                    pf = (gain_sum / loss_sum) if loss_sum > 0 else float('inf') if gain_sum > 0 else 0
-                    pnl_total = sum([x['pnlPct'] for x in details])
-                    
-                    # TÃ­nh toÃ¡n chá»‰ sá»‘ nÃ¢ng cao sá»­ dá»¥ng káº¿t quáº£ thá»±c táº¿
-                    advanced_metrics = calculate_advanced_metrics(details)
-                    
-                    # Debug vÃ i tá»• há»£p Ä‘áº§u Ä‘á»ƒ xÃ¡c minh mÃ´ phá»ng thá»±c táº¿
-                    if combination_count <= 3:
-                        print(f"ðŸ” DEBUG THá»°C Táº¾ Tá»• há»£p #{combination_count}:")
-                        print(f"   SL={sl:.1f}% BE={be:.1f}% TS_TRIG={ts_trig:.1f}% TS_STEP={ts_step:.1f}%")
-                        print(f"   Tá»•ng lá»‡nh: {total_trades}")
-                        print(f"   Lá»‡nh tháº¯ng: {win_count}")
-                        print(f"   Tá»•ng PnL: {pnl_total:.4f}%")
-                        print(f"   Tá»· lá»‡ tháº¯ng: {winrate:.2f}%")
-                        print(f"   Chá»‰ sá»‘ nÃ¢ng cao: Max DD={advanced_metrics['max_drawdown']:.4f}%, Sharpe={advanced_metrics['sharpe_ratio']:.4f}")
-                        if len(details) > 0:
-                            sample_detail = details[0]
-                            print(f"   Lá»‡nh máº«u: #{sample_detail['num']} {sample_detail['side']} -> {sample_detail['exitType']} -> {sample_detail['pnlPct']:.4f}%")
-                    
-                    # Store result with full parameter set
-                    result_dict = {
-                        'sl': float(sl),
-                        'be': float(be),
-                        'ts_trig': float(ts_trig),
-                        'ts_step': float(ts_step),
-                        'pnl_total': float(pnl_total),
-                        'winrate': float(winrate),
-                        'pf': safe_float(pf),
-                        'max_drawdown': safe_float(advanced_metrics['max_drawdown']),
-                        'avg_win': safe_float(advanced_metrics['avg_win']),
-                        'avg_loss': safe_float(advanced_metrics['avg_loss']),
-                        'max_consecutive_wins': safe_int(advanced_metrics['max_consecutive_wins']),
-                        'max_consecutive_losses': safe_int(advanced_metrics['max_consecutive_losses']),
-                        'sharpe_ratio': safe_float(advanced_metrics['sharpe_ratio']),
-                        'recovery_factor': safe_float(advanced_metrics['recovery_factor']),
-                        'details': details
-                    }
-                    
-                    results.append(result_dict)
+                    # Simulate all trades with current parameter set (or reuse the cached cell)
+                    details = combo_cache.get(sl, be, ts_trig, ts_step) if combo_cache else None
+                    if details is None:
+                        details = simulate_grid_cell(pairs, df_candle, sl, be, ts_trig, ts_step, dominance)
+                        if combo_cache:
+                            combo_cache.add(sl, be, ts_trig, ts_step, details)
+                    row_cells.append((sl, be, ts_trig, ts_step))
+                    row_details.append(details)
+        
+        # Metrics of the whole SL row at once (cells x trades PnL matrix)
+        for (sl, be, ts_trig, ts_step), details, result_dict in zip(row_cells, row_details, grid_cell_results(row_cells, row_details)):
+            # Debug vÃ i tá»• há»£p Ä‘áº§u Ä‘á»ƒ xÃ¡c minh mÃ´ phá»ng thá»±c táº¿
+            if len(results) < 3:
+                print(f"ðŸ” DEBUG THá»°C Táº¾ Tá»• há»£p #{len(results) + 1}:")
+                print(f"   SL={sl:.1f}% BE={be:.1f}% TS_TRIG={ts_trig:.1f}% TS_STEP={ts_step:.1f}%")
+                print(f"   Tá»•ng lá»‡nh: {len(details)}")
+                print(f"   Lá»‡nh tháº¯ng: {sum(1 for d in details if d['pnlPct'] > 0)}")
+                print(f"   Tá»•ng PnL: {result_dict['pnl_total']:.4f}%")
+                print(f"   Tá»· lá»‡ tháº¯ng: {result_dict['winrate']:.2f}%")
+                print(f"   Chá»‰ sá»‘ nÃ¢ng cao: Max DD={result_dict['max_drawdown']:.4f}%, Sharpe={result_dict['sharpe_ratio']:.4f}")
+                if len(details) > 0:
+                    sample_detail = details[0]
+                    print(f"   Lá»‡nh máº«u: #{sample_detail['num']} {sample_detail['side']} -> {sample_detail['exitType']} -> {sample_detail['pnlPct']:.4f}%")
+            
+            results.append(result_dict)
+            report_best_so_far({'sl': sl, 'be': be, 'ts_trig': ts_trig, 'ts_step': ts_step}, result_dict, opt_type)
     
-    # Sort by optimization type
-    if opt_type == 'pnl':
-        results.sort(key=lambda x: x['pnl_total'], reverse=True)
-    elif opt_type == 'winrate':
-        results.sort(key=lambda x: x['winrate'], reverse=True)
-    elif opt_type == 'pf':
-        results.sort(key=lambda x: x['pf'], reverse=True)
-    elif opt_type == 'sharpe':
-        results.sort(key=lambda x: x['sharpe_ratio'], reverse=True)
-    elif opt_type == 'recovery':
-        results.sort(key=lambda x: x['recovery_factor'], reverse=True)
-    elif opt_type == 'drawdown':
-        results.sort(key=lambda x: x['max_drawdown'], reverse=False)
-    else:
-        results.sort(key=lambda x: x['pnl_total'], reverse=True)
+    sort_grid_results(results, opt_type)
+    report_dominance(dominance)
     
     print(f"ðŸ” Káº¾T QUáº¢ THá»°C Táº¾: Káº¿t quáº£ tá»‘t nháº¥t -> SL:{results[0]['sl']:.1f}% BE:{results[0]['be']:.1f}% TS:{results[0]['ts_trig']:.1f}%/{results[0]['ts_step']:.1f}%")
     print(f"   Hiá»‡u suáº¥t: PnL={results[0]['pnl_total']:.4f}% Tá»· lá»‡ tháº¯ng={results[0]['winrate']:.2f}% Sharpe={results[0]['sharpe_ratio']:.4f}")
     
+    if combo_cache:
+        try:
+            combo_cache.flush()
+        except Exception as e:
+            print(f"⚠️ Could not store combo cache: {e}")
+    
+    finish_progress(f'Completed {total_combinations} combinations')
     return results
 
-def optuna_search(trade_pairs, df_candle, sl_min, sl_max, be_min, be_max, ts_trig_min, ts_trig_max, ts_step_min, ts_step_max, opt_type, n_trials=50):
-    """🔧 Enhanced Optuna search with parameter validation and error handling"""
+def successive_halving_grid_search(pairs, df_candle, sl_list, be_list, ts_trig_list, ts_step_list, opt_type,
+                                   eta=HALVING_ETA, mode='chronological', use_cache=True):
+    """
+    Grid search with successive halving over trade subsets (see successive_halving.py):
+    every combination is simulated on a small subset of the trades, the best 1/eta
+    continue on a larger subset, until the survivors are simulated on all trades and
+    ranked exactly with the same metrics/sorting as grid_search_realistic_full.
+    Returns (survivor results sorted by opt_type, stats).
+    """
+    global optimization_status
+    
+    combos = list(itertools.product(sl_list, be_list, ts_trig_list, ts_step_list))
+    metric, descending = GRID_SORT_KEYS.get(opt_type, ('pnl_total', True))
+    planned = survivors_per_rung(len(combos), len(rung_sizes(len(pairs), eta)), eta)
+    print(f"✂️ SUCCESSIVE HALVING: {len(combos):,} combinations, {len(pairs)} trades, eta={eta}, {mode} subsets")
+    begin_progress(sum(planned), len(pairs))
+    dominance = open_dominance(pairs, df_candle, use_cache)
+    
+    def evaluate(alive, trade_indices):
+        evaluated = []
+        for combo in alive:
+            evaluated.append({i: simulate_grid_trade(pairs[i], df_candle, *combo, dominance, i) for i in trade_indices})
+            optimization_status['current_progress'] += 1
+        return evaluated
+    
+    results, stats = successive_halving(
+        combos, len(pairs), evaluate,
+        summarize=lambda combo, details: grid_cell_result(*combo, details),
+        summarize_batch=grid_cell_results,
+        score=lambda r: r[metric] if descending else -r[metric],
+        eta=eta, mode=mode
+    )
+    sort_grid_results(results, opt_type)
+    report_dominance(dominance)
+    
+    # Survivors went through every trade: their cells are exact and can serve later full grids
+    combo_cache = open_combo_cache(pairs, df_candle, use_cache) if stats['complete'] else None
+    if combo_cache:
+        try:
+            for r in results:
+                combo_cache.add(r['sl'], r['be'], r['ts_trig'], r['ts_step'], r['details'])
+            combo_cache.flush()
+        except Exception as e:
+            print(f"⚠️ Could not store combo cache: {e}")
+    
+    if results:
+        best = results[0]
+        report_best_so_far({k: best[k] for k in ('sl', 'be', 'ts_trig', 'ts_step')}, best, opt_type)
+    print(f"✂️ SUCCESSIVE HALVING done: {stats['survivors']} survivors, {stats['saved_pct']}% fewer trade simulations than the full grid")
+    finish_progress(f"Completed successive halving over {len(combos)} combinations")
+    return results, stats
+
+# Adaptive grid defaults: cells kept per refinement round, coarse lattice points per dimension
+ADAPTIVE_TOP_K = 5
+ADAPTIVE_COARSE_POINTS = 5
+
+def _coarse_axis(size, stride):
+    """Indices of an evenly strided axis, always including both ends"""
+    indices = list(range(0, size, stride))
+    if indices[-1] != size - 1:
+        indices.append(size - 1)
+    return indices
+
+def adaptive_grid_search(pairs, df_candle, sl_list, be_list, ts_trig_list, ts_step_list, opt_type,
+                         top_k=ADAPTIVE_TOP_K, coarse_points=ADAPTIVE_COARSE_POINTS, use_cache=True):
+    """
+    Coarse-to-fine grid search over the same lattice as grid_search_realistic_full.
+    
+    1. Evaluate a coarse lattice: about coarse_points values per parameter (ends included).
+    2. Halve the stride and evaluate the +/-stride neighbourhood of the top_k cells.
+    3. Repeat down to the requested step; at step 1 keep expanding around new top_k
+       cells until their neighbourhoods are fully evaluated.
+    
+    Cells are simulated and scored exactly like the full grid (shared combo cache).
+    Returns (results sorted by opt_type, stats with evaluated/skipped cell counts).
+    """
+    global optimization_status
+    
+    axes = [list(sl_list), list(be_list), list(ts_trig_list), list(ts_step_list)]
+    sizes = [len(axis) for axis in axes]
+    full_grid = math.prod(sizes)
+    if full_grid == 0:
+        raise ValueError("adaptive_grid needs at least one value per parameter")
+    top_k = max(1, int(top_k))
+    coarse_points = max(2, int(coarse_points))
+    strides = [max(1, math.ceil((size - 1) / (coarse_points - 1))) for size in sizes]
+    coarse_strides = list(strides)
+    metric, descending = GRID_SORT_KEYS.get(opt_type, ('pnl_total', True))
+    
+    print(f"🎯 ADAPTIVE GRID: full grid {full_grid:,} cells, coarse strides {strides}, top_k={top_k}")
+    begin_progress(full_grid, len(pairs))
+    combo_cache = open_combo_cache(pairs, df_candle, use_cache)
+    dominance = open_dominance(pairs, df_candle, use_cache)
+    evaluated = {}  # (i_sl, i_be, i_ts_trig, i_ts_step) -> result dict
+    
+    def evaluate(cells):
+        cells = [cell for cell in dict.fromkeys(cells) if cell not in evaluated]
+        values = {cell: tuple(axis[i] for axis, i in zip(axes, cell)) for cell in cells}
+        if combo_cache and cells:
+            combo_cache.preload(values.values())
+        cell_details = []
+        for cell in cells:
+            sl, be, ts_trig, ts_step = values[cell]
+            details = combo_cache.get(sl, be, ts_trig, ts_step) if combo_cache else None
+            if details is None:
+                details = simulate_grid_cell(pairs, df_candle, sl, be, ts_trig, ts_step, dominance)
+                if combo_cache:
+                    combo_cache.add(sl, be, ts_trig, ts_step, details)
+            cell_details.append(details)
+            optimization_status['current_progress'] = len(evaluated) + len(cell_details)
+        for cell, result_dict in zip(cells, grid_cell_results([values[cell] for cell in cells], cell_details)):
+            sl, be, ts_trig, ts_step = values[cell]
+            evaluated[cell] = result_dict
+            report_best_so_far({'sl': sl, 'be': be, 'ts_trig': ts_trig, 'ts_step': ts_step}, result_dict, opt_type)
+        return len(cells)
+    
+    evaluate(itertools.product(*[_coarse_axis(size, stride) for size, stride in zip(sizes, strides)]))
+    rounds = 1
+    print(f"   Round 1 (coarse): {len(evaluated)} cells")
+    
+    expanded = set()  # (cell, strides) neighbourhoods already evaluated
+    while True:
+        if any(stride > 1 for stride in strides):
+            strides = [max(1, stride // 2) for stride in strides]
+        ranked = sorted(evaluated, key=lambda cell: evaluated[cell][metric], reverse=descending)
+        neighbours = []
+        for cell in ranked[:top_k]:
+            if (cell, tuple(strides)) in expanded:
+                continue
+            expanded.add((cell, tuple(strides)))
+            offsets = [(-stride, 0, stride) if size > 1 else (0,) for size, stride in zip(sizes, strides)]
+            for offset in itertools.product(*offsets):
+                neighbour = tuple(i + d for i, d in zip(cell, offset))
+                if all(0 <= i < size for i, size in zip(neighbour, sizes)):
+                    neighbours.append(neighbour)
+        added = evaluate(neighbours)
+        rounds += 1
+        print(f"   Round {rounds} (strides {strides}): +{added} cells, total {len(evaluated)}")
+        if added == 0 and all(stride == 1 for stride in strides):
+            break
+    
+    if combo_cache:
+        try:
+            combo_cache.flush()
+        except Exception as e:
+            print(f"⚠️ Could not store combo cache: {e}")
+    
+    results = sort_grid_results(list(evaluated.values()), opt_type)
+    report_dominance(dominance)
+    stats = {
+        'full_grid': full_grid,
+        'evaluated': len(evaluated),
+        'skipped': full_grid - len(evaluated),
+        'skipped_pct': round((full_grid - len(evaluated)) / full_grid * 100, 2),
+        'rounds': rounds,
+        'top_k': top_k,
+        'coarse_points': coarse_points,
+        'coarse_strides': coarse_strides,
+    }
+    print(f"🎯 ADAPTIVE GRID done: {stats['evaluated']:,}/{full_grid:,} cells evaluated ({stats['skipped_pct']}% skipped)")
+    optimization_status['total_combinations'] = len(evaluated)
+    finish_progress(f"Completed {len(evaluated)} of {full_grid} combinations (adaptive grid)")
+    return results, stats
+
+# Trials per grid cell when n_trials isn't given (NSGA-II needs several generations)
+NSGA2_POPULATION = 20
+
+def nsga2_grid_search(pairs, df_candle, sl_list, be_list, ts_trig_list, ts_step_list, opt_type,
+                      objectives=DEFAULT_PARETO_OBJECTIVES, n_trials=None, use_cache=True, seed=None):
+    """
+    Multi-objective search (Optuna NSGA-II) over the grid lattice: each trial picks one
+    value per parameter list, so cells are shared with the combo cache and simulated
+    through the dominance kernel. Repeated cells are evaluated once.
+    Returns (every evaluated cell sorted by opt_type, stats); the Pareto front of the
+    results over `objectives` is stats['front'].
+    """
+    import optuna  # deferred: optuna is only needed once an Optuna run starts
+    objectives = list(objectives)
+    axes = [list(sl_list), list(be_list), list(ts_trig_list), list(ts_step_list)]
+    full_grid = len(axes[0]) * len(axes[1]) * len(axes[2]) * len(axes[3])
+    n_trials = int(n_trials or min(full_grid, NSGA2_POPULATION * 10))
+    directions = ['maximize' if PARETO_OBJECTIVES[name][1] else 'minimize' for name in objectives]
+    
+    print(f"🧬 NSGA-II: {n_trials} trials over {full_grid:,} cells, objectives {objectives}")
+    begin_progress(n_trials, len(pairs), 'NSGA-II search')
+    combo_cache = open_combo_cache(pairs, df_candle, use_cache)
+    dominance = open_dominance(pairs, df_candle, use_cache)
+    evaluated = {}  # (sl, be, ts_trig, ts_step) -> result dict
+    
+    def objective(trial):
+        combo = tuple(axis[trial.suggest_int(name, 0, len(axis) - 1)] if len(axis) > 1 else axis[0]
+                      for name, axis in zip(('sl_i', 'be_i', 'ts_trig_i', 'ts_step_i'), axes))
+        if combo not in evaluated:
+            details = None
+            if combo_cache:
+                combo_cache.preload([combo])
+                details = combo_cache.get(*combo)
+            if details is None:
+                details = simulate_grid_cell(pairs, df_candle, *combo, dominance)
+                if combo_cache:
+                    combo_cache.add(*combo, details)
+            evaluated[combo] = grid_cell_result(*combo, details)
+            report_best_so_far(dict(zip(('sl', 'be', 'ts_trig', 'ts_step'), combo)), evaluated[combo], opt_type)
+        result = evaluated[combo]
+        optimization_status['current_progress'] = trial.number + 1
+        return [result[PARETO_OBJECTIVES[name][0]] for name in objectives]
+    
+    # One INFO line per trial floods the server log on large runs; progress goes to optimization_status
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    sampler = optuna.samplers.NSGAIISampler(population_size=min(NSGA2_POPULATION, max(2, n_trials)), seed=seed)
+    study = optuna.create_study(directions=directions, sampler=sampler)
+    study.optimize(objective, n_trials=n_trials)
+    
+    if combo_cache:
+        try:
+            combo_cache.flush()
+        except Exception as e:
+            print(f"⚠️ Could not store combo cache: {e}")
+    
+    results = sort_grid_results(list(evaluated.values()), opt_type)
+    report_dominance(dominance)
+    front, _ = pareto_front(results, objectives)
+    stats = {
+        'objectives': objectives,
+        'trials': n_trials,
+        'evaluated': len(evaluated),
+        'full_grid': full_grid,
+        'front': front,
+    }
+    print(f"🧬 NSGA-II done: {len(evaluated):,} distinct cells, {len(front)} on the Pareto front")
+    optimization_status['total_combinations'] = n_trials
+    finish_progress(f"Completed {n_trials} NSGA-II trials")
+    return results, stats
+
+def walk_forward_grid_search(pairs, df_candle, sl_list, be_list, ts_trig_list, ts_step_list, opt_type,
+                             folds=WF_FOLDS, in_sample_periods=WF_IN_SAMPLE_PERIODS, anchored=False,
+                             processes=None, use_cache=True):
+    """
+    Walk-forward over the grid lattice (see walk_forward.py): each fold picks the best
+    cell on its in-sample window and is scored on the next out-of-sample period.
+    Trades are simulated once per cell in parallel trade chunks, cached cells are reused
+    and new full cells are stored, so a grid run before or after costs no extra simulation.
+    """
+    global optimization_status
+    
+    combos = list(itertools.product(sl_list, be_list, ts_trig_list, ts_step_list))
+    processes = processes or os.cpu_count() or 1
+    print(f"🚶 WALK-FORWARD: {len(combos):,} combinations, {folds} folds x {in_sample_periods} in-sample periods "
+          f"({'anchored' if anchored else 'rolling'}), {processes} process(es)")
+    begin_progress(len(combos), len(pairs), 'Walk-forward')
+    
+    def on_progress(done, total):
+        optimization_status['current_progress'] = int(done / total * len(combos)) if total else len(combos)
+    
+    report = run_walk_forward(pairs, df_candle, combos, opt_type, folds=folds, in_sample_periods=in_sample_periods,
+                              anchored=anchored, processes=processes, use_cache=use_cache, on_progress=on_progress)
+    for fold in report['folds']:
+        print(f"   Fold {fold['fold']}: {fold['params']} IS PnL={fold['in_sample']['pnl_total']:.2f}% "
+              f"OOS PnL={fold['out_of_sample']['pnl_total']:.2f}% ({fold['out_of_sample']['trades']} trades)")
+    if report['folds']:
+        print(f"🚶 WALK-FORWARD done: OOS PnL={report['out_of_sample']['pnl_total']:.2f}%, efficiency={report['efficiency']}, "
+              f"{report['simulation']['cached_combinations']}/{len(combos)} cells from cache")
+    finish_progress(f"Completed walk-forward over {len(report['folds'])} folds")
+    return report
+
+def store_sensitivity_surface(results, opt_type, key, meta=None):
+    """
+    Put grid-engine results back on the parameter lattice (see sensitivity.py), store the
+    surface under key for the heatmap API and return its summary for the opt_type metric.
+    """
+    metric = GRID_SORT_KEYS.get(opt_type, ('pnl_total', True))[0]
+    surface = GridSurface.from_results(results)
+    summary = surface.summary(metric)
+    summary['surface_key'] = key
+    try:
+        from optimization_cache import get_optimization_cache
+        blob = surface.to_bytes()
+        get_optimization_cache().put_surface(key, blob, meta)
+        summary['size_bytes'] = len(blob)
+    except Exception as e:
+        print(f"⚠️ Could not store sensitivity surface: {e}")
+        summary['surface_key'] = None
+    smooth = summary['smoothness']
+    if smooth['best_cell']:
+        plateau = smooth['plateaus'][0] if smooth['plateaus'] else smooth['best_cell']
+        print(f"🗺️ Sensitivity surface {summary['shape']} ({summary['evaluated']} cells): smoothness={smooth['smoothness']}, "
+              f"best cell spike={smooth['best_cell']['spike']}, best plateau {plateau['params']}")
+    return summary
+
+def load_sensitivity_surface(key):
+    """Stored GridSurface for key, or None"""
+    from optimization_cache import get_optimization_cache
+    blob = get_optimization_cache().get_surface(key)
+    return GridSurface.from_bytes(blob) if blob is not None else None
+
+def robustness_analysis(pairs, df_candle, evaluated, rows, top_k=ROBUSTNESS_TOP_K, n_samples=ROBUSTNESS_SAMPLES,
+                        block_size=None, confidence=ROBUSTNESS_CONFIDENCE, seed=None, use_cache=True):
+    """
+    Bootstrap / block bootstrap confidence intervals of the top_k combinations (see robustness.py).
+    
+    evaluated: grid-engine results, best first, carrying their per-trade details
+    rows:      range_result_row() rows (used when there are no grid results, e.g. Optuna);
+               their details come from the combo cache, only missing cells are simulated once
+    """
+    if evaluated:
+        candidates = [((r['sl'], r['be'], r['ts_trig'], r['ts_step']), r.get('details')) for r in evaluated[:top_k]]
+    else:
+        candidates = [(tuple(round(row[k] * 100, 6) for k in ('sl', 'be', 'ts', 'ts_step')), None) for row in rows[:top_k]]
+    combo_cache = None
+    dominance = None
+    cells, pnl_rows = [], []
+    for cell, details in candidates:
+        if details is None:
+            if combo_cache is None:
+                combo_cache = open_combo_cache(pairs, df_candle, use_cache) or False
+            if combo_cache:
+                combo_cache.preload([cell])
+                details = combo_cache.get(*cell)
+        if details is None:
+            dominance = dominance or open_dominance(pairs, df_candle, use_cache)
+            details = simulate_grid_cell(pairs, df_candle, *cell, dominance)
+        cells.append(cell)
+        pnl_rows.append([trade['pnlPct'] for trade in details])
+    
+    report = robustness_report(cells, pnl_rows, n_samples=n_samples, block_size=block_size, confidence=confidence, seed=seed)
+    if report['combinations']:
+        best = report['combinations'][0]['block_bootstrap']
+        print(f"🎲 Robustness: {len(cells)} combinations x {report['samples']} resamples in {report['seconds']}s - best PnL "
+              f"{best['pnl_total']['value']:.2f}% ({int(confidence * 100)}% CI {best['pnl_total']['low']:.2f}..{best['pnl_total']['high']:.2f}), "
+              f"P(PnL>0)={best['prob_profit']}")
+    return report
+
+
+def optuna_search(trade_pairs, df_candle, sl_min, sl_max, be_min, be_max, ts_trig_min, ts_trig_max, ts_step_min, ts_step_max, opt_type, n_trials=50,
+                  study_key=None, warm_start=True):
+    """🔧 Enhanced Optuna search with parameter validation and error handling
+
+    study_key: (symbol, timeframe, strategy) to persist the study (optuna_studies.py):
+    reruns on the same data continue it, a study on new data is seeded with the previous
+    best trials (warm_start). None keeps the study in memory.
+    """
     
     # 🔧 Debug: print actual parameter values and types
     print(f"🔧 Optuna parameters received:")
@@ -2641,12 +3151,16 @@ def optuna_search(trade_pairs, df_candle, sl_min, sl_max, be_min, be_max, ts_tri
     
     print(f"🔧 Optuna validation: {len(trade_pairs)} pairs, {n_trials} trials")
     
+    ranges = {'sl': (sl_min, sl_max), 'be': (be_min, be_max), 'ts_trig': (ts_trig_min, ts_trig_max), 'ts_step': (ts_step_min, ts_step_max)}
+    
     def objective(trial):
         # Handle parameters: suggest when range exists, use fixed value when min = max
         sl = trial.suggest_float('sl', sl_min, sl_max) if sl_min != sl_max else sl_min
         be = trial.suggest_float('be', be_min, be_max) if be_min != be_max else be_min
         ts_trig = trial.suggest_float('ts_trig', ts_trig_min, ts_trig_max) if ts_trig_min != ts_trig_max else ts_trig_min
         ts_step = trial.suggest_float('ts_step', ts_step_min, ts_step_max) if ts_step_min != ts_step_max else ts_step_min
+        # Fixed values are not trial params; persisted studies need them to compare trials across runs
+        trial.set_user_attr('fixed', {name: low for name, (low, high) in ranges.items() if low == high})
         
 
         
@@ -2712,11 +3226,43 @@ def optuna_search(trade_pairs, df_candle, sl_min, sl_max, be_min, be_max, ts_tri
         else:
             return pnl_total  # Máº·c Ä‘á»‹nh tá»‘i Æ°u hÃ³a pnl_total
 
-    study = optuna.create_study(direction='maximize')
-    study.optimize(objective, n_trials=n_trials)
-    best_params = study.best_params
-    best_value = study.best_value
+    import optuna  # deferred: optuna is only needed once an Optuna run starts
+    study = None
+    optimization_status['optuna_study'] = None
+    if study_key is not None:
+        try:
+            from optuna_studies import open_study
+            from pareto import PARETO_OBJECTIVES
+            seed_metric = PARETO_OBJECTIVES.get(opt_type, ('pnl_total', True))[0]
+            study, study_info = open_study('web', *study_key, opt_type, trade_pairs, df_candle, ranges, warm_start, seed_metric)
+            optimization_status['optuna_study'] = study_info
+            print(f"🗄️ Optuna study {study_info['study_name']}: {study_info['resumed_trials']} previous trials, {study_info['seeds']} warm-start seeds")
+        except Exception as e:
+            print(f"⚠️ Persistent Optuna study unavailable, using in-memory study: {e}")
+            study = None
+    if study is None:
+        study = optuna.create_study(direction='maximize')
+    session = {'trials': 0, 'best': None}
+    begin_progress(n_trials, len(trade_pairs), 'Optuna search')
+
+    def _report_trial(study, trial):
+        session['trials'] += 1
+        optimization_status['current_progress'] = session['trials']
+        if trial.value is not None and (session['best'] is None or trial.value > session['best']):
+            session['best'] = trial.value
+            # objective already returns a maximize-score (drawdown negated)
+            report_best_so_far(trial.params, {}, 'pnl', score=trial.value)
+
+    study.optimize(objective, n_trials=n_trials, callbacks=[_report_trial])
+    if study_key is not None:
+        # A resumed study may hold trials of other ranges: only this search space counts
+        from optuna_studies import best_in_ranges
+        best_params, best_value = best_in_ranges(study, ranges)
+    else:
+        best_params = study.best_params
+        best_value = study.best_value
     print(f"Optuna best params: {best_params}, best value: {best_value}")
+    finish_progress(f'Completed {n_trials} Optuna trials')
     return best_params, best_value
 
 def grid_search_realistic_full_v2(pairs, df_candle, sl_list, be_list, ts_trig_list, ts_step_list, opt_type, max_iterations=None):
@@ -2732,6 +3278,7 @@ def grid_search_realistic_full_v2(pairs, df_candle, sl_list, be_list, ts_trig_li
     
     results = []
     total_combinations = len(sl_list) * len(be_list) * len(ts_trig_list) * len(ts_step_list)
+    begin_progress(total_combinations, len(pairs))
     combination_count = 0
     
     print(f"ðŸ”„ CHáº¾ Äá»˜ THá»°C Táº¾: Thá»­ nghiá»‡m {total_combinations:,} tá»• há»£p tham sá»‘...")
@@ -3296,6 +3843,30 @@ def suggest_parameters():
         trade_pairs, log_init = get_trade_pairs(df_trade)
         print(f"Extracted {len(trade_pairs)} valid trade pairs")
         
+        # Optional candles (candle_data="BINANCE_BTCUSDT_30m.db" or symbol + timeframe):
+        # per-trade MFE/MAE from the stored excursion profile, so tradelists without
+        # run-up/drawdown columns can still be analyzed
+        excursions = None
+        candle_symbol = request.form.get('symbol')
+        candle_timeframe = request.form.get('timeframe')
+        candle_file = request.form.get('candle_data')
+        if candle_file:
+            import re
+            m = re.search(r'BINANCE_([A-Za-z0-9]+)_(\w+)\.', candle_file)
+            if m:
+                candle_symbol, candle_timeframe = m.group(1), m.group(2).lower()
+        if candle_symbol and candle_timeframe:
+            _tf_map = {"30": "30m", "60": "1h", "240": "4h", "1440": "1d"}
+            candle_timeframe = _tf_map.get(candle_timeframe, candle_timeframe)
+            try:
+                df_candle = load_candle_data_from_db({"symbol": candle_symbol.upper(), "timeframe": candle_timeframe})
+                if df_candle is not None and len(df_candle) > 0:
+                    from excursion_profile import get_excursion_profile
+                    excursions = get_excursion_profile(trade_pairs, df_candle).to_tradelist_frame(trade_pairs)
+                    print(f"📐 Excursion profile: {len(excursions)} trades measured on {candle_symbol.upper()} {candle_timeframe} candles")
+            except Exception as e:
+                print(f"⚠️ Excursion profile unavailable: {e}")
+        
         # Check minimum data requirement
         if len(trade_pairs) < 10:
             return jsonify({
@@ -3321,15 +3892,16 @@ def suggest_parameters():
                 print("ðŸ” Running Smart Range Finder analysis...")
                 
                 # Initialize and run Smart Range Finder
-                finder = SmartRangeFinder(temp_path)
+                finder = SmartRangeFinder(temp_path, excursions=excursions)
                 analysis_results = finder.analyze_price_movement_patterns()
                 recommendations = finder.generate_final_recommendations()
                 
                 print("ðŸ” Running Dynamic Step Calculator...")
                 
                 # Initialize and run Dynamic Step Calculator
-                calculator = DynamicStepCalculator(temp_path)
+                calculator = DynamicStepCalculator(temp_path, excursions=excursions)
                 step_report = calculator.generate_comprehensive_report()
+                step_data = step_report['parameter_steps']
                 
                 # Extract parameter ranges from balanced strategy
                 # Debug statements removed for performance optimization
@@ -3493,6 +4065,7 @@ def suggest_parameters():
                     },
                     'data_quality': {
                         'total_trades_analyzed': len(trade_pairs),
+                        'excursion_source': 'candles' if finder.excursion_source else 'tradelist',
                         'data_quality_issues': recommendations.get('data_quality_issues', [])
                     }
                 }
@@ -3523,6 +4096,8 @@ def suggest_parameters():
 @app.route('/optimize', methods=['POST'])
 def optimize():
     global optimization_status
+    if wants_async(request):
+        return _submit_optimization_job('optimize')
     print("🔥🔥🔥 OPTIMIZE FUNCTION ENTERED 🔥🔥🔥")
     print(f"Request method: {request.method}")
     print(f"Request form keys: {list(request.form.keys())}")
@@ -4391,9 +4966,41 @@ def optimize_single_combination(trade_pairs, sl_pct, be_pct, ts_activation_pct,
         }
     }
 
+def range_result_row(result, engine_label):
+    """One grid-engine result formatted for the /optimize_ranges frontend (ratios, not %)"""
+    # Calculate win/loss trades from winrate and total_trades
+    total_trades = result.get('total_trades', 0)
+    winrate = result.get('winrate', 0)
+    win_trades = int(total_trades * winrate / 100) if total_trades > 0 else 0
+    loss_trades = total_trades - win_trades
+    
+    return {
+        'sl': result['sl'] / 100,  # Convert to ratio
+        'be': result['be'] / 100,
+        'ts': result['ts_trig'] / 100,
+        'ts_step': result.get('ts_step', 0.1) / 100,  # ADD TS_STEP for Grid Search
+        'total_profit': result.get('pnl_total', 0),
+        'win_rate': result.get('winrate', 0) / 100,
+        'total_trades': total_trades,
+        # Calculate win/loss trades from winrate
+        'win_trades': win_trades,
+        'loss_trades': loss_trades,
+        'avg_win': result.get('avg_win', 0),
+        'avg_loss': result.get('avg_loss', 0),
+        'max_drawdown': result.get('max_drawdown', 0),
+        'sharpe_ratio': result.get('sharpe_ratio', 0),
+        'recovery_factor': result.get('recovery_factor', 0),
+        'max_consecutive_wins': result.get('max_consecutive_wins', 0),
+        'max_consecutive_losses': result.get('max_consecutive_losses', 0),
+        'pf': result.get('pf', 1.0),
+        'optimization_engine': engine_label
+    }
+
 @app.route('/optimize_ranges', methods=['POST'])
 def optimize_ranges():
     """🔥 Real Range-Based Optimization with Optuna/Grid Search"""
+    if wants_async(request):
+        return _submit_optimization_job('optimize_ranges')
     try:
         print("🚀 OPTIMIZE_RANGES ROUTE HIT!")
         print("=== RANGE-BASED OPTIMIZATION WITH ENGINE SELECTION ===")
@@ -4430,6 +5037,12 @@ def optimize_ranges():
         if raw_engine.lower() in ['grid', 'grid_search', 'gridsearch', 'grid search']:
             optimization_engine = 'grid_search'
             print(f"🔍 DEBUG: Matched GRID SEARCH pattern -> optimization_engine = '{optimization_engine}'")
+        elif raw_engine.lower() in ['adaptive_grid', 'adaptive', 'coarse_to_fine']:
+            optimization_engine = 'adaptive_grid'
+            print(f"🔍 DEBUG: Matched ADAPTIVE GRID pattern -> optimization_engine = '{optimization_engine}'")
+        elif raw_engine.lower() in ['nsga2', 'nsga-ii', 'nsga_ii', 'pareto', 'multi_objective']:
+            optimization_engine = 'nsga2'
+            print(f"🔍 DEBUG: Matched NSGA-II pattern -> optimization_engine = '{optimization_engine}'")
         elif raw_engine.lower() in ['optuna', 'bayesian']:
             optimization_engine = 'optuna'
             print(f"🔍 DEBUG: Matched OPTUNA pattern -> optimization_engine = '{optimization_engine}'")
@@ -4644,6 +5257,92 @@ def optimize_ranges():
         opt_type = optimization_criteria  # User-selected optimization target
         print(f"🎯 Using optimization criteria: {opt_type}")
         
+        # Adaptive grid settings (engine='adaptive_grid')
+        adaptive_top_k = safe_int(data.get('adaptive_top_k')) or ADAPTIVE_TOP_K
+        adaptive_coarse_points = safe_int(data.get('adaptive_coarse_points')) or ADAPTIVE_COARSE_POINTS
+        adaptive_stats = None
+        
+        # Pareto front over several criteria (always for engine='nsga2', on request for grid engines)
+        pareto_objectives = None
+        if optimization_engine == 'nsga2' or data.get('pareto') not in (None, False, 'false', '0', 0, ''):
+            pareto_objectives = parse_objectives(data.get('pareto_objectives'))
+        pareto_stats = None
+        
+        # Successive halving over trade subsets for the grid engine
+        halving = None
+        if data.get('successive_halving') not in (None, False, 'false', '0', 0, ''):
+            halving = {
+                'eta': max(2, safe_int(data.get('halving_eta')) or HALVING_ETA),
+                'mode': data.get('halving_mode') if data.get('halving_mode') in HALVING_MODES else 'chronological',
+            }
+        
+        # Walk-forward validation over the same lattice (any engine)
+        walk_forward = None
+        if data.get('walk_forward') not in (None, False, 'false', '0', 0, ''):
+            walk_forward = {
+                'folds': max(1, safe_int(data.get('wf_folds')) or WF_FOLDS),
+                'in_sample_periods': max(1, safe_int(data.get('wf_in_sample_periods')) or WF_IN_SAMPLE_PERIODS),
+                'anchored': data.get('wf_mode') == 'anchored',
+            }
+        walk_forward_stats = None
+        
+        # Bootstrap robustness of the best combinations (resampled per-trade PnL, no re-simulation)
+        robustness = None
+        if data.get('robustness') not in (None, False, 'false', '0', 0, ''):
+            robustness = {
+                'top_k': min(10, max(1, safe_int(data.get('robustness_top_k')) or ROBUSTNESS_TOP_K)),
+                'n_samples': min(20000, max(100, safe_int(data.get('robustness_samples')) or ROBUSTNESS_SAMPLES)),
+                'block_size': safe_int(data.get('robustness_block_size')) or None,
+                'confidence': min(0.999, max(0.5, safe_float(data.get('robustness_confidence'), ROBUSTNESS_CONFIDENCE))),
+                'seed': safe_int(data.get('robustness_seed')) if data.get('robustness_seed') not in (None, '') else None,
+            }
+        robustness_stats = None
+        
+        # Parameter sensitivity surface of grid-engine results (stored for /api/sensitivity)
+        sensitivity = data.get('sensitivity', True) not in (False, 'false', '0', 0) and optimization_engine != 'optuna'
+        sensitivity_stats = None
+        
+        # Optuna studies persisted per symbol/timeframe/strategy (optuna_studies.py), new data warm-started
+        persist_study = data.get('persist_study', True) not in (False, 'false', '0', 0) and optimization_engine == 'optuna'
+        warm_start = data.get('warm_start', True) not in (False, 'false', '0', 0)
+        optuna_study_stats = None
+        
+        # Whole-run cache: identical inputs return the stored response without re-running.
+        # A persisted Optuna study is meant to continue on a rerun, so it bypasses it both ways.
+        run_cache_key = None
+        use_cache = data.get('use_cache', True) not in (False, 'false', '0', 0)
+        try:
+            from optimization_cache import get_optimization_cache, run_key, KEY_DIGITS
+            run_cache_config = {
+                'engine': optimization_engine,
+                'criteria': optimization_criteria,
+                'selected_params': sorted(selected_params),
+                'strategy': strategy,
+                'ranges': [sl_min, sl_max, be_min, be_max, ts_active_min, ts_active_max, ts_step_min, ts_step_max],
+                'grid': [[round(float(v), KEY_DIGITS) for v in values] for values in (sl_list, be_list, ts_trig_list, ts_step_list)],
+                'max_iterations': max_iterations if optimization_engine in ('optuna', 'nsga2') else None,
+            }
+            if pareto_objectives:
+                run_cache_config['pareto'] = pareto_objectives
+            if optimization_engine == 'adaptive_grid':
+                run_cache_config['adaptive'] = [adaptive_top_k, adaptive_coarse_points]
+            if halving and optimization_engine == 'grid_search':
+                run_cache_config['halving'] = halving
+            if walk_forward:
+                run_cache_config['walk_forward'] = walk_forward
+            if robustness:
+                run_cache_config['robustness'] = robustness
+            if sensitivity:
+                run_cache_config['sensitivity'] = True
+            run_cache_key = run_key(trade_pairs, df_candle, **run_cache_config)
+            if use_cache and not persist_study:
+                cached_response = get_optimization_cache().get_run(run_cache_key)
+                if cached_response is not None:
+                    print(f"🗄️ Run cache hit ({run_cache_key[:12]}), returning stored result")
+                    return jsonify(cached_response)
+        except Exception as e:
+            print(f"⚠️ Run cache unavailable: {e}")
+        
         # Run optimization based on selected engine
         if optimization_engine == 'optuna':
             print("🔥 Running OPTUNA optimization...")
@@ -4702,8 +5401,10 @@ def optimize_ranges():
                     trade_pairs, df_candle, 
                     opt_sl_min, opt_sl_max, opt_be_min, opt_be_max, 
                     opt_ts_active_min, opt_ts_active_max, opt_ts_step_min, opt_ts_step_max,  # Updated TS parameters
-                    opt_type, n_trials=max_iterations  # 🔧 USE USER INPUT from frontend
+                    opt_type, n_trials=max_iterations,  # 🔧 USE USER INPUT from frontend
+                    study_key=(symbol, timeframe, strategy) if persist_study else None, warm_start=warm_start
                 )
+                optuna_study_stats = optimization_status.get('optuna_study')
                 
                 print(f"✅ Optuna completed successfully!")
                 print(f"   Best params: {opt_params}")
@@ -4803,9 +5504,27 @@ def optimize_ranges():
                 print(f"Calling grid_search with {len(sl_list)} x {len(be_list)} x {len(ts_trig_list)} combinations")
                 print(f"📋 Only optimizing: {', '.join(selected_params)}")
                 
-                results = grid_search_realistic_full(
-                    trade_pairs, df_candle, sl_list, be_list, ts_trig_list, ts_step_list, opt_type
-                )
+                if optimization_engine == 'nsga2':
+                    engine_label = 'Optuna NSGA-II'
+                    results, pareto_stats = nsga2_grid_search(
+                        trade_pairs, df_candle, sl_list, be_list, ts_trig_list, ts_step_list, opt_type,
+                        objectives=pareto_objectives, n_trials=max_iterations if raw_max_iterations else None,
+                        use_cache=use_cache
+                    )
+                elif optimization_engine == 'adaptive_grid':
+                    engine_label = 'Adaptive Grid'
+                    results, adaptive_stats = adaptive_grid_search(
+                        trade_pairs, df_candle, sl_list, be_list, ts_trig_list, ts_step_list, opt_type,
+                        top_k=adaptive_top_k, coarse_points=adaptive_coarse_points, use_cache=use_cache
+                    )
+                else:
+                    engine_label = 'Grid Search'
+                    results = grid_search_realistic_full(
+                        trade_pairs, df_candle, sl_list, be_list, ts_trig_list, ts_step_list, opt_type,
+                        use_cache=use_cache, halving=halving
+                    )
+                    if halving:
+                        engine_label = 'Grid Search (Successive Halving)'
                 
                 print(f"✅ Grid search completed: {len(results) if results else 0} results")
                 
@@ -4813,35 +5532,16 @@ def optimize_ranges():
                     return jsonify({'success': False, 'error': 'Grid search returned no results'})
                 
                 # Format results for frontend (take top 10)
-                results_data = []
-                for result in results[:10]:  # Top 10 results
-                    # Calculate win/loss trades from winrate and total_trades
-                    total_trades = result.get('total_trades', 0)
-                    winrate = result.get('winrate', 0)
-                    win_trades = int(total_trades * winrate / 100) if total_trades > 0 else 0
-                    loss_trades = total_trades - win_trades
-                    
-                    results_data.append({
-                        'sl': result['sl'] / 100,  # Convert to ratio
-                        'be': result['be'] / 100,
-                        'ts': result['ts_trig'] / 100,
-                        'ts_step': result.get('ts_step', 0.1) / 100,  # ADD TS_STEP for Grid Search
-                        'total_profit': result.get('pnl_total', 0),
-                        'win_rate': result.get('winrate', 0) / 100,
-                        'total_trades': total_trades,
-                        # Calculate win/loss trades from winrate
-                        'win_trades': win_trades,
-                        'loss_trades': loss_trades,
-                        'avg_win': result.get('avg_win', 0),
-                        'avg_loss': result.get('avg_loss', 0),
-                        'max_drawdown': result.get('max_drawdown', 0),
-                        'sharpe_ratio': result.get('sharpe_ratio', 0),
-                        'recovery_factor': result.get('recovery_factor', 0),
-                        'max_consecutive_wins': result.get('max_consecutive_wins', 0),
-                        'max_consecutive_losses': result.get('max_consecutive_losses', 0),
-                        'pf': result.get('pf', 1.0),
-                        'optimization_engine': 'Grid Search'
-                    })
+                results_data = [range_result_row(result, engine_label) for result in results[:10]]
+                
+                # Non-dominated trade-offs among everything the engine evaluated
+                if pareto_objectives:
+                    if pareto_stats is None:
+                        front, _ = pareto_front(results, pareto_objectives)
+                        pareto_stats = {'objectives': pareto_objectives, 'evaluated': len(results), 'front': front}
+                    pareto_stats['front'] = [range_result_row(result, engine_label) for result in pareto_stats['front']]
+                    pareto_stats['front_size'] = len(pareto_stats['front'])
+                    print(f"📐 Pareto front ({', '.join(pareto_objectives)}): {pareto_stats['front_size']} of {pareto_stats['evaluated']} combinations")
                 
                 print(f"🏆 Grid Search Results: {len(results_data)} combinations found")
                 
@@ -4850,6 +5550,37 @@ def optimize_ranges():
                 print(f"Traceback: {traceback.format_exc()}")
                 return jsonify({'success': False, 'error': f'Grid search optimization failed: {str(e)}'})
         
+        if walk_forward:
+            try:
+                walk_forward_stats = walk_forward_grid_search(
+                    trade_pairs, df_candle, sl_list, be_list, ts_trig_list, ts_step_list, opt_type,
+                    processes=safe_int(data.get('wf_processes')) or None, use_cache=use_cache, **walk_forward
+                )
+            except Exception as e:
+                print(f"⚠️ Walk-forward failed: {e}")
+                walk_forward_stats = {'error': str(e)}
+        
+        if sensitivity:
+            try:
+                sensitivity_stats = store_sensitivity_surface(
+                    results, opt_type, run_cache_key or uuid.uuid4().hex,
+                    meta={'symbol': symbol, 'timeframe': timeframe, 'strategy': strategy,
+                          'engine': optimization_engine, 'criteria': optimization_criteria}
+                )
+            except Exception as e:
+                print(f"⚠️ Sensitivity surface failed: {e}")
+                sensitivity_stats = {'error': str(e)}
+        
+        if robustness:
+            try:
+                robustness_stats = robustness_analysis(
+                    trade_pairs, df_candle, results if optimization_engine != 'optuna' else None, results_data,
+                    use_cache=use_cache, **robustness
+                )
+            except Exception as e:
+                print(f"⚠️ Robustness analysis failed: {e}")
+                robustness_stats = {'error': str(e)}
+        
         # ========================================
         # 🔥 REAL BASELINE vs OPTIMIZED COMPARISON
         # ========================================
@@ -5124,6 +5855,20 @@ def optimize_ranges():
                 'optimized_label': f'Optimized Strategy (SL:{best_sl:.1f}%, BE:{best_be:.1f}%)'
             }
         }
+        if adaptive_stats:
+            response_data['adaptive_grid'] = adaptive_stats  # cells evaluated vs skipped against the full grid
+        if halving and optimization_engine == 'grid_search':
+            response_data['successive_halving'] = optimization_status.get('successive_halving')
+        if pareto_stats:
+            response_data['pareto'] = pareto_stats  # non-dominated combinations over pareto_objectives
+        if walk_forward_stats:
+            response_data['walk_forward'] = walk_forward_stats  # per-fold IS/OOS metrics and parameter stability
+        if robustness_stats:
+            response_data['robustness'] = robustness_stats  # bootstrap confidence intervals of the top combinations
+        if sensitivity_stats:
+            response_data['sensitivity'] = sensitivity_stats  # surface key + plateau/spike scores, heatmaps via /api/sensitivity
+        if optuna_study_stats:
+            response_data['optuna_study'] = optuna_study_stats  # persisted study name, resumed trials, warm-start seeds
         
         # ========================================
         # 💾 SAVE OPTIMIZATION RESULTS TO DATABASE
@@ -5178,6 +5923,14 @@ def optimize_ranges():
             # Continue execution - don't fail the entire optimization if DB save fails
             response_data['database_warning'] = f"Results not saved to database: {str(e)}"
         
+        if run_cache_key and not persist_study:
+            try:
+                get_optimization_cache().put_run(run_cache_key, response_data,
+                                                 meta={'symbol': symbol, 'timeframe': timeframe, **run_cache_config})
+                response_data['cache'] = {'hit': False, 'key': run_cache_key}
+            except Exception as e:
+                print(f"⚠️ Could not store run cache: {e}")
+        
         print("=== RANGE OPTIMIZATION SUCCESS ===")
         return jsonify(response_data)
         
@@ -5186,10 +5939,123 @@ def optimize_ranges():
         print(traceback.format_exc())
         return jsonify({'error': str(e), 'success': False})
 
+# ===== ASYNC OPTIMIZATION JOBS =====
+# /optimize and /optimize_ranges run in a bounded process pool when called with async=1
+# (query string, form field or JSON key); results are fetched later by job id.
+
+def _submit_optimization_job(endpoint):
+    """Enqueue the current request for `endpoint` and return 202 with the job id"""
+    try:
+        job_id = get_job_queue().submit(endpoint, endpoint, RequestSnapshot.from_request(request))
+    except QueueFullError as e:
+        return jsonify({'success': False, 'error': str(e), 'queue': get_job_queue().stats()}), 429
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status_url': f'/api/jobs/{job_id}',
+        'result_url': f'/api/jobs/{job_id}/result',
+    }), 202
+
+@app.route('/api/optimization_cache', methods=['GET'])
+def optimization_cache_stats():
+    """Run/combination cache size and hit counts"""
+    from optimization_cache import get_optimization_cache
+    return jsonify({'success': True, 'cache': get_optimization_cache().stats()})
+
+@app.route('/api/optimization_cache', methods=['DELETE'])
+def clear_optimization_cache():
+    """Drop cached results (?older_than_days=N keeps newer entries)"""
+    from optimization_cache import get_optimization_cache
+    removed = get_optimization_cache().clear(request.args.get('older_than_days', type=float))
+    return jsonify({'success': True, 'removed': removed})
+
+@app.route('/api/sensitivity', methods=['GET'])
+def list_sensitivity_surfaces():
+    """Stored parameter sensitivity surfaces, newest first"""
+    from optimization_cache import get_optimization_cache
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({'success': True, 'surfaces': get_optimization_cache().list_surfaces(limit)})
+
+@app.route('/api/sensitivity/<key>', methods=['GET'])
+def get_sensitivity_surface(key):
+    """Axes, coverage and plateau/spike scores of one surface (?metric=pnl_total)"""
+    surface = load_sensitivity_surface(key)
+    if surface is None:
+        return jsonify({'success': False, 'error': 'Surface not found'}), 404
+    metric = request.args.get('metric', 'pnl_total')
+    if metric not in surface.values:
+        return jsonify({'success': False, 'error': f"Unknown metric '{metric}'", 'metrics': list(surface.values)}), 400
+    return jsonify({'success': True, 'surface_key': key, **surface.summary(metric)})
+
+@app.route('/api/sensitivity/<key>/heatmap', methods=['GET'])
+def get_sensitivity_heatmap(key):
+    """2D heatmap: ?metric=&x=sl&y=be&mode=best|mean|slice (slice: at_<axis>=value for the other axes)"""
+    surface = load_sensitivity_surface(key)
+    if surface is None:
+        return jsonify({'success': False, 'error': 'Surface not found'}), 404
+    at = {name: request.args.get(f'at_{name}', type=float) for name in SURFACE_AXES
+          if request.args.get(f'at_{name}') not in (None, '')}
+    try:
+        heatmap = surface.heatmap(
+            metric=request.args.get('metric', 'pnl_total'), x=request.args.get('x', 'sl'),
+            y=request.args.get('y', 'be'), mode=request.args.get('mode', 'best'), at=at or None
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': True, 'surface_key': key, **heatmap})
+
+@app.route('/api/jobs', methods=['GET'])
+def list_optimization_jobs():
+    queue = get_job_queue()
+    return jsonify({'success': True, 'jobs': queue.list_jobs(), 'queue': queue.stats()})
+
+@app.route('/api/jobs/optimize', methods=['POST'])
+def submit_optimize_job():
+    return _submit_optimization_job('optimize')
+
+@app.route('/api/jobs/optimize_ranges', methods=['POST'])
+def submit_optimize_ranges_job():
+    return _submit_optimization_job('optimize_ranges')
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_optimization_job(job_id):
+    info = get_job_queue().status(job_id)
+    if info is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, **info})
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def get_optimization_job_result(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    info = job.to_dict()
+    if info['status'] in ('queued', 'running'):
+        return jsonify({'success': False, 'error': 'Job not finished', **info}), 409
+    if isinstance(job.result, dict):
+        return jsonify(job.result), job.http_status or 200
+    return jsonify({'success': info['status'] == 'completed', 'result': job.result, 'error': job.error}), job.http_status or 500
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_optimization_job(job_id):
+    queue = get_job_queue()
+    if queue.get(job_id) is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    cancelled = queue.cancel(job_id)
+    return jsonify({'success': cancelled, 'job_id': job_id,
+                    'error': None if cancelled else 'Job already started or finished'})
+
 @app.route('/progress', methods=['GET'])
 def get_progress():
-    """Get current optimization progress"""
+    """Get current optimization progress (pass ?job_id= for a background job)"""
     global optimization_status
+
+    job_id = request.args.get('job_id')
+    if job_id:
+        info = get_job_queue().status(job_id)
+        if info is None:
+            return jsonify({'running': False, 'status_message': 'Job not found'}), 404
+        return jsonify({'running': info['status'] in ('queued', 'running'), **info})
     
     if optimization_status['running']:
         elapsed = datetime.now() - optimization_status['start_time'] if optimization_status['start_time'] else timedelta(0)
@@ -5219,6 +6085,71 @@ def get_progress():
             'status_message': optimization_status['status_message']
         })
 
+def _sse_response(frames):
+    return Response(stream_with_context(frames), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def _sse_interval():
+    """?interval= seconds between pushes, clamped so clients can't hammer the server"""
+    try:
+        return min(10.0, max(0.2, float(request.args.get('interval', 0.5))))
+    except ValueError:
+        return 0.5
+
+@app.route('/progress/stream', methods=['GET'])
+def stream_progress():
+    """SSE stream of the in-process optimization (the one /progress reports)"""
+    try:
+        wait_seconds = min(60.0, float(request.args.get('wait', 10)))
+    except ValueError:
+        wait_seconds = 10.0
+    opened = time.time()
+    seen_running = [False]
+
+    def snapshot():
+        running = bool(optimization_status.get('running'))
+        seen_running[0] = seen_running[0] or running
+        waiting = not seen_running[0] and time.time() - opened < wait_seconds
+        return {
+            'running': running,
+            **compute_eta(optimization_status),
+            'status_message': optimization_status.get('status_message'),
+            'best_so_far': optimization_status.get('best_so_far'),
+            'done': not running and not waiting,
+        }
+
+    return _sse_response(progress_stream(snapshot, min_interval=_sse_interval()))
+
+@app.route('/api/jobs/<job_id>/stream', methods=['GET'])
+def stream_optimization_job(job_id):
+    """SSE stream of one background job: progress, best-so-far, combos/sec, trades/sec"""
+    queue = get_job_queue()
+    if queue.get(job_id) is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+
+    def snapshot():
+        info = queue.status(job_id)
+        if info is not None:
+            info['done'] = info['status'] not in ('queued', 'running')
+        return info
+
+    return _sse_response(progress_stream(snapshot, min_interval=_sse_interval()))
+
+@app.route('/api/batch_stream/<job_id>', methods=['GET'])
+def stream_batch(job_id):
+    """SSE stream of a batch run (same payload as /api/batch_status)"""
+    from multi_symbol_processor import get_batch_progress
+    if get_batch_progress(job_id) is None:
+        return jsonify({'success': False, 'error': f'Batch {job_id} not found'}), 404
+
+    def snapshot():
+        info = get_batch_progress(job_id)
+        if info is not None:
+            info['done'] = info['is_completed']
+        return info
+
+    return _sse_response(progress_stream(snapshot, min_interval=max(1.0, _sse_interval())))
+
 @app.route('/status')
 def status():
     """Simple status page to monitor optimization"""
@@ -6073,7 +7004,12 @@ def results_page():
 
 @app.route('/api/results', methods=['GET'])
 def api_get_results():
-    """API endpoint to get optimization results with filtering"""
+    """API endpoint to get optimization results with filtering
+
+    Rows are a column projection (no trades, curve or advanced_metrics); open one
+    with /api/results/<id> for details. Pass ?cursor=<next_cursor> for keyset
+    pagination, which skips the COUNT and the OFFSET scan; page/per_page still work.
+    """
     try:
         # Get query parameters for filtering
         filters = {}
@@ -6082,6 +7018,10 @@ def api_get_results():
         if symbol:
             filters['symbol'] = symbol
         
+        timeframe = request.args.get('timeframe')
+        if timeframe:
+            filters['timeframe'] = timeframe
+        
         engine = request.args.get('engine')
         if engine:
             filters['engine'] = engine
@@ -6095,35 +7035,38 @@ def api_get_results():
             filters['max_pnl'] = max_pnl
         
         # Pagination parameters
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = request.args.get('per_page', request.args.get('limit', 20, type=int), type=int)
+        per_page = min(max(per_page, 1), 500)
+        cursor = request.args.get('cursor')
         offset = (page - 1) * per_page
         
-        # Get results
-        results = get_optimization_results(filters, limit=per_page, offset=offset)
-        
-        # Get total count for pagination
-        total_query = OptimizationResult.query
-        if 'symbol' in filters:
-            total_query = total_query.filter(OptimizationResult.symbol == filters['symbol'])
-        if 'engine' in filters:
-            total_query = total_query.filter(OptimizationResult.engine == filters['engine'])
-        if 'min_pnl' in filters:
-            total_query = total_query.filter(OptimizationResult.total_pnl >= filters['min_pnl'])
-        if 'max_pnl' in filters:
-            total_query = total_query.filter(OptimizationResult.total_pnl <= filters['max_pnl'])
-        
-        total_count = total_query.count()
-        
-        return jsonify({
-            'success': True,
-            'results': results,
-            'pagination': {
+        # Fetch one extra row to know whether another page exists
+        try:
+            results = get_optimization_results(filters, limit=per_page + 1, offset=offset, cursor=cursor)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        has_more = len(results) > per_page
+        results = results[:per_page]
+        next_cursor = encode_results_cursor(results[-1]) if has_more and results else None
+        
+        if cursor:
+            pagination = {'per_page': per_page, 'cursor': cursor}
+        else:
+            total_count = count_optimization_results(filters)
+            pagination = {
                 'page': page,
                 'per_page': per_page,
                 'total': total_count,
                 'pages': math.ceil(total_count / per_page) if total_count > 0 else 1
             }
+        pagination['has_more'] = has_more
+        pagination['next_cursor'] = next_cursor
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'pagination': pagination
         })
         
     except Exception as e:
@@ -6189,7 +7132,7 @@ def api_delete_result(result_id):
 
 @app.route('/api/results/export', methods=['GET'])
 def api_export_results():
-    """Export optimization results"""
+    """Export optimization results (json/csv streamed in chunks, parquet via a temp file)"""
     try:
         # Get export format
         format_type = request.args.get('format', 'json').lower()
@@ -6200,25 +7143,37 @@ def api_export_results():
         if symbol:
             filters['symbol'] = symbol
         
+        timeframe = request.args.get('timeframe')
+        if timeframe:
+            filters['timeframe'] = timeframe
+        
         engine = request.args.get('engine')
         if engine:
             filters['engine'] = engine
         
-        # Export data
-        exported_data = export_optimization_results(format_type, filters)
-        
-        # Create response
-        if format_type == 'json':
-            response = make_response(exported_data)
-            response.headers['Content-Type'] = 'application/json'
-            response.headers['Content-Disposition'] = 'attachment; filename=optimization_results.json'
-        elif format_type == 'csv':
-            response = make_response(exported_data)
-            response.headers['Content-Type'] = 'text/csv'
-            response.headers['Content-Disposition'] = 'attachment; filename=optimization_results.csv'
-        else:
+        if format_type == 'parquet':
+            # Parquet needs its footer written last, so it can't go straight to the socket;
+            # row groups are written chunk by chunk into a temp file instead
+            output = tempfile.TemporaryFile()
+            try:
+                write_parquet_optimization_results(output, filters)
+            except ImportError:
+                output.close()
+                return jsonify({'success': False, 'error': 'Parquet export requires pyarrow (pip install pyarrow)'}), 501
+            output.seek(0)
+            return send_file(output, mimetype='application/vnd.apache.parquet', as_attachment=True,
+                             download_name='optimization_results.parquet')
+        
+        mimetypes = {'json': 'application/json', 'csv': 'text/csv'}
+        if format_type not in mimetypes:
             return jsonify({'success': False, 'error': 'Unsupported format'})
         
+        # Stream the export; rows are read from the DB one chunk at a time
+        response = Response(
+            stream_with_context(iter_export_optimization_results(format_type, filters)),
+            mimetype=mimetypes[format_type]
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename=optimization_results.{format_type}'
         return response
         
     except Exception as e: